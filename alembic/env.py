@@ -6,12 +6,13 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.data.utils.database import Base
-from app.data.models.account_models import Account, VirtualBankAccount
+from app.data.models.account_models import Account, AccountStripe, VirtualBankAccount
 from app.data.models.admin_models import Admin
 from app.data.models.password_models import PasswordReset
 from app.data.models.product_models import Product, ProductImage
+from app.data.models.reconciliation_models import BalanceMismatch, ReconciliationRun
 from app.data.models.store_models import Store, StoreSubscription, Subscription
-from app.data.models.transaction_models import Transaction
+from app.data.models.transaction_models import PaymentGroup, Transaction, TransactionReference, TransactionRollup
 from app.data.models.user_models import User
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,39 @@
+"""Account stripes
+
+Revision ID: d53ed85d6957
+Revises: 057189be058d
+Create Date: 2026-10-19 09:00:12.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd53ed85d6957'
+down_revision: Union[str, None] = '057189be058d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('accounts', sa.Column('stripe_count', sa.Integer(), nullable=True))
+    op.create_table('account_stripes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('stripe', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'stripe', name='uq_account_stripes_account_id_stripe')
+    )
+    op.create_index(op.f('ix_account_stripes_id'), 'account_stripes', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_account_stripes_id'), table_name='account_stripes')
+    op.drop_table('account_stripes')
+    op.drop_column('accounts', 'stripe_count')
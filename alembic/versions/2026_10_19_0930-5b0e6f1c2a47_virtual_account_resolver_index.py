@@ -0,0 +1,32 @@
+"""Virtual account resolver index
+
+Revision ID: 5b0e6f1c2a47
+Revises: d53ed85d6957
+Create Date: 2026-10-19 09:30:41.118254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e6f1c2a47'
+down_revision: Union[str, None] = 'd53ed85d6957'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_virtual_bank_accounts_active_number',
+        'virtual_bank_accounts',
+        ['account_number', 'account_id'],
+        unique=False,
+        postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_virtual_bank_accounts_active_number', table_name='virtual_bank_accounts')
@@ -0,0 +1,60 @@
+"""Balance reconciliation
+
+Revision ID: 9c4d2e7a1f30
+Revises: 5b0e6f1c2a47
+Create Date: 2026-10-19 10:00:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d2e7a1f30'
+down_revision: Union[str, None] = '5b0e6f1c2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reconciliation_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('last_virtual_account_id', sa.Integer(), nullable=False),
+    sa.Column('checked_count', sa.Integer(), nullable=False),
+    sa.Column('mismatch_count', sa.Integer(), nullable=False),
+    sa.Column('error_count', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reconciliation_runs_id'), 'reconciliation_runs', ['id'], unique=False)
+    op.create_table('balance_mismatches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('virtual_account_id', sa.Integer(), nullable=False),
+    sa.Column('account_number', sa.String(), nullable=False),
+    sa.Column('ledger_balance', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('provider_balance', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('difference', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.ForeignKeyConstraint(['run_id'], ['reconciliation_runs.id'], ),
+    sa.ForeignKeyConstraint(['virtual_account_id'], ['virtual_bank_accounts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_balance_mismatches_id'), 'balance_mismatches', ['id'], unique=False)
+    op.create_index(op.f('ix_balance_mismatches_run_id'), 'balance_mismatches', ['run_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_balance_mismatches_run_id'), table_name='balance_mismatches')
+    op.drop_index(op.f('ix_balance_mismatches_id'), table_name='balance_mismatches')
+    op.drop_table('balance_mismatches')
+    op.drop_index(op.f('ix_reconciliation_runs_id'), table_name='reconciliation_runs')
+    op.drop_table('reconciliation_runs')
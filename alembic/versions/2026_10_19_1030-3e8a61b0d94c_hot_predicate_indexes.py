@@ -0,0 +1,57 @@
+"""Hot predicate indexes
+
+Revision ID: 3e8a61b0d94c
+Revises: 9c4d2e7a1f30
+Create Date: 2026-10-19 10:30:08.914377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8a61b0d94c'
+down_revision: Union[str, None] = '9c4d2e7a1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns). Built CONCURRENTLY so live tables are not locked
+# against writes; CONCURRENTLY cannot run inside a transaction, hence the
+# autocommit block. if_not_exists lets a failed run simply be re-applied.
+INDEXES = [
+    ('ix_transactions_account_id_created_at', 'transactions', ['account_id', 'created_at']),
+    ('ix_transactions_account_id_type_status', 'transactions', ['account_id', 'type', 'status']),
+    ('ix_accounts_user_id_type', 'accounts', ['user_id', 'type']),
+    ('ix_users_username', 'users', ['username']),
+    ('ix_products_user_id', 'products', ['user_id']),
+    ('ix_product_images_product_id', 'product_images', ['product_id']),
+    ('ix_stores_user_id', 'stores', ['user_id']),
+    ('ix_store_subscriptions_store_id_is_active', 'store_subscriptions', ['store_id', 'is_active']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True
+            )
@@ -0,0 +1,55 @@
+"""Transaction rollups
+
+Revision ID: b71f2c9e4a58
+Revises: 3e8a61b0d94c
+Create Date: 2026-10-19 11:00:44.206731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71f2c9e4a58'
+down_revision: Union[str, None] = '3e8a61b0d94c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transaction_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('total_fees', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'day', 'type', name='uq_transaction_rollups_account_id_day_type')
+    )
+    op.create_index(op.f('ix_transaction_rollups_id'), 'transaction_rollups', ['id'], unique=False)
+
+    # Backfill from completed history; new completions keep it current
+    op.execute("""
+        INSERT INTO transaction_rollups (account_id, day, type, count, total_amount, total_fees, updated_at)
+        SELECT account_id,
+               CAST(created_at AS DATE),
+               type,
+               COUNT(*),
+               SUM(amount),
+               COALESCE(SUM(fee_amount), 0),
+               CURRENT_TIMESTAMP
+        FROM transactions
+        WHERE status = 'completed'
+        GROUP BY account_id, CAST(created_at AS DATE), type
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transaction_rollups_id'), table_name='transaction_rollups')
+    op.drop_table('transaction_rollups')
@@ -0,0 +1,98 @@
+"""Partition transactions by month
+
+Revision ID: c4a9e3d18b62
+Revises: b71f2c9e4a58
+Create Date: 2026-10-19 11:30:19.660418
+
+Rebuilds transactions as a table range-partitioned on created_at, one
+partition per month plus a default partition, and copies the existing rows
+across. The copy holds an exclusive lock on transactions for its duration,
+so run it in a maintenance window.
+
+Postgres requires unique constraints on a partitioned table to include the
+partition key, so the primary key becomes (id, created_at) and reference is
+unique per (reference, created_at). Global reference uniqueness is kept by
+transaction_references, which TransactionRepository writes alongside every
+transaction.
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e3d18b62'
+down_revision: Union[str, None] = 'b71f2c9e4a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_constraints_and_indexes(partitioned: bool) -> None:
+    if partitioned:
+        op.create_primary_key('transactions_pkey', 'transactions', ['id', 'created_at'])
+        op.create_unique_constraint('uq_transactions_reference_created_at', 'transactions', ['reference', 'created_at'])
+    else:
+        op.create_primary_key('transactions_pkey', 'transactions', ['id'])
+        op.create_unique_constraint('transactions_reference_key', 'transactions', ['reference'])
+    op.create_foreign_key('transactions_account_id_fkey', 'transactions', 'accounts', ['account_id'], ['id'])
+    op.create_foreign_key('transactions_virtual_account_id_fkey', 'transactions', 'virtual_bank_accounts', ['virtual_account_id'], ['id'])
+    op.create_index(op.f('ix_transactions_id'), 'transactions', ['id'], unique=False)
+    op.create_index('ix_transactions_account_id_created_at', 'transactions', ['account_id', 'created_at'], unique=False)
+    op.create_index('ix_transactions_account_id_type_status', 'transactions', ['account_id', 'type', 'status'], unique=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    op.execute("UPDATE transactions SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+
+    op.create_table('transaction_references',
+    sa.Column('reference', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('reference')
+    )
+    op.execute("INSERT INTO transaction_references (reference, created_at) SELECT reference, created_at FROM transactions")
+
+    op.execute("CREATE TABLE transactions_partitioned (LIKE transactions INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.execute("ALTER TABLE transactions_partitioned ALTER COLUMN created_at SET NOT NULL")
+
+    # One partition per month from the oldest row to MONTHS_AHEAD months out
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM transactions")).scalar() or datetime.utcnow()
+    month = date(oldest.year, oldest.month, 1)
+    last = date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE transactions_{month:%Y_%m} PARTITION OF transactions_partitioned "
+            f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+        )
+        month = _next_month(month)
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions_partitioned DEFAULT")
+
+    op.execute("INSERT INTO transactions_partitioned SELECT * FROM transactions")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions_partitioned.id")
+    op.drop_table('transactions')
+    op.rename_table('transactions_partitioned', 'transactions')
+    _create_constraints_and_indexes(partitioned=True)
+
+
+def downgrade() -> None:
+    # Rows in partitions that were detached for archiving are not copied back
+    op.execute("CREATE TABLE transactions_plain (LIKE transactions INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO transactions_plain SELECT * FROM transactions")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions_plain.id")
+    op.drop_table('transactions')
+    op.rename_table('transactions_plain', 'transactions')
+    op.alter_column('transactions', 'created_at', existing_type=sa.DateTime(), nullable=True)
+    _create_constraints_and_indexes(partitioned=False)
+
+    op.drop_table('transaction_references')
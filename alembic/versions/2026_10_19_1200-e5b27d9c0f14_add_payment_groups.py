@@ -0,0 +1,66 @@
+"""Add payment groups
+
+Revision ID: e5b27d9c0f14
+Revises: c4a9e3d18b62
+Create Date: 2026-10-19 12:00:37.518204
+
+Groups the legs of a payment or subscription through transactions.group_id
+so that leg references can stay unique. Existing multi-leg payments are
+grouped by their base reference: legs that shared the debit leg's
+reference, or that carry it with a -STORE/-FEE/-PLATFORM suffix.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b27d9c0f14'
+down_revision: Union[str, None] = 'c4a9e3d18b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BASE_REFERENCE = "regexp_replace(transactions.reference, '-(STORE|FEE|PLATFORM)$', '')"
+
+
+def upgrade() -> None:
+    op.create_table('payment_groups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reference', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference')
+    )
+    op.create_index(op.f('ix_payment_groups_id'), 'payment_groups', ['id'], unique=False)
+    op.add_column('transactions', sa.Column('group_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('transactions_group_id_fkey', 'transactions', 'payment_groups', ['group_id'], ['id'])
+    op.create_index(op.f('ix_transactions_group_id'), 'transactions', ['group_id'], unique=False)
+
+    # Backfill groups for payments written before group_id existed
+    op.execute(f"""
+        INSERT INTO payment_groups (reference, type, created_at)
+        SELECT {BASE_REFERENCE},
+               CASE WHEN bool_or(type = 'subscription') THEN 'subscription' ELSE 'product_payment' END,
+               min(created_at)
+        FROM transactions
+        WHERE type IN ('product_payment', 'subscription', 'fee')
+        GROUP BY {BASE_REFERENCE}
+        HAVING count(*) > 1
+    """)
+    op.execute(f"""
+        UPDATE transactions
+        SET group_id = payment_groups.id
+        FROM payment_groups
+        WHERE payment_groups.reference = {BASE_REFERENCE}
+          AND transactions.type IN ('product_payment', 'subscription', 'fee')
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transactions_group_id'), table_name='transactions')
+    op.drop_constraint('transactions_group_id_fkey', 'transactions', type_='foreignkey')
+    op.drop_column('transactions', 'group_id')
+    op.drop_index(op.f('ix_payment_groups_id'), table_name='payment_groups')
+    op.drop_table('payment_groups')
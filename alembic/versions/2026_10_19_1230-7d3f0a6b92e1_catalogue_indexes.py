@@ -0,0 +1,53 @@
+"""Catalogue indexes
+
+Revision ID: 7d3f0a6b92e1
+Revises: e5b27d9c0f14
+Create Date: 2026-10-19 12:30:52.104683
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f0a6b92e1'
+down_revision: Union[str, None] = 'e5b27d9c0f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns). Each filter combination ends in the keyset sort
+# columns so a catalogue page is an index range scan with no sort step.
+INDEXES = [
+    ('ix_products_state_lga_prices_id', 'products', ['state', 'lga', 'prices', 'id']),
+    ('ix_products_condition_prices_id', 'products', ['condition', 'prices', 'id']),
+    ('ix_products_prices_id', 'products', ['prices', 'id']),
+    ('ix_products_user_id_prices_id', 'products', ['user_id', 'prices', 'id']),
+    ('ix_product_images_product_id_is_primary', 'product_images', ['product_id', 'is_primary']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True
+            )
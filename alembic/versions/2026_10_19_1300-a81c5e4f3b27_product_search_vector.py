@@ -0,0 +1,52 @@
+"""Product search vector
+
+Revision ID: a81c5e4f3b27
+Revises: 7d3f0a6b92e1
+Create Date: 2026-10-19 13:00:26.730915
+
+Adds products.search_vector, a stored generated tsvector over name and code
+(weight A) and description (weight B), so Postgres keeps it current on every
+insert and update without triggers. Adding the column rewrites products.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81c5e4f3b27'
+down_revision: Union[str, None] = '7d3f0a6b92e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(code, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_search_vector',
+            'products',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            if_not_exists=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_products_search_vector',
+            table_name='products',
+            if_exists=True,
+            postgresql_concurrently=True
+        )
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,33 @@
+"""Product and store versions
+
+Revision ID: f2d94b6c18a3
+Revises: a81c5e4f3b27
+Create Date: 2026-10-19 13:30:41.285519
+
+Adds version and updated_at to products and stores for ETag and
+Last-Modified validators. A constant server default keeps the ADD COLUMN a
+catalog-only change in Postgres 11+, so existing rows are not rewritten.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d94b6c18a3'
+down_revision: Union[str, None] = 'a81c5e4f3b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('products', 'stores'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('stores', 'products'):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
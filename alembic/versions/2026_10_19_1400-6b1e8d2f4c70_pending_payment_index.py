@@ -0,0 +1,35 @@
+"""Pending payment index
+
+Revision ID: 6b1e8d2f4c70
+Revises: f2d94b6c18a3
+Create Date: 2026-10-19 14:00:12.604918
+
+Partial index over the pending legs of grouped payments, which the pending
+payment reconciler scans. Pending rows are few, so the index stays small.
+CONCURRENTLY is not available on the partitioned transactions table.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1e8d2f4c70'
+down_revision: Union[str, None] = 'f2d94b6c18a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_transactions_pending_group_id',
+        'transactions',
+        ['group_id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending' AND group_id IS NOT NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_pending_group_id', table_name='transactions')
@@ -0,0 +1,74 @@
+"""Stripe transaction rollups
+
+Revision ID: 8f4c2a7d5e91
+Revises: 6b1e8d2f4c70
+Create Date: 2026-10-19 14:30:27.117403
+
+Spreads each (account, day, type) rollup over several rows keyed by a
+stripe number, so every checkout no longer upserts the platform account's
+single fee row. Existing rows become stripe 0; the constant server default
+keeps the ADD COLUMN a catalog-only change.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4c2a7d5e91'
+down_revision: Union[str, None] = '6b1e8d2f4c70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('transaction_rollups', sa.Column('stripe', sa.Integer(), server_default='0', nullable=False))
+    op.drop_constraint('uq_transaction_rollups_account_id_day_type', 'transaction_rollups', type_='unique')
+    op.create_unique_constraint(
+        'uq_transaction_rollups_account_id_day_type_stripe',
+        'transaction_rollups',
+        ['account_id', 'day', 'type', 'stripe']
+    )
+
+
+def downgrade() -> None:
+    # Fold the stripes back into stripe 0 before the narrower key returns
+    op.execute("""
+        UPDATE transaction_rollups AS target
+        SET count = totals.count,
+            total_amount = totals.total_amount,
+            total_fees = totals.total_fees
+        FROM (
+            SELECT account_id, day, type,
+                   SUM(count) AS count,
+                   SUM(total_amount) AS total_amount,
+                   SUM(total_fees) AS total_fees,
+                   MIN(stripe) AS stripe
+            FROM transaction_rollups
+            GROUP BY account_id, day, type
+        ) AS totals
+        WHERE target.account_id = totals.account_id
+          AND target.day = totals.day
+          AND target.type = totals.type
+          AND target.stripe = totals.stripe
+    """)
+    op.execute("""
+        DELETE FROM transaction_rollups AS target
+        USING (
+            SELECT account_id, day, type, MIN(stripe) AS stripe
+            FROM transaction_rollups
+            GROUP BY account_id, day, type
+        ) AS kept
+        WHERE target.account_id = kept.account_id
+          AND target.day = kept.day
+          AND target.type = kept.type
+          AND target.stripe <> kept.stripe
+    """)
+    op.drop_constraint('uq_transaction_rollups_account_id_day_type_stripe', 'transaction_rollups', type_='unique')
+    op.create_unique_constraint(
+        'uq_transaction_rollups_account_id_day_type',
+        'transaction_rollups',
+        ['account_id', 'day', 'type']
+    )
+    op.drop_column('transaction_rollups', 'stripe')
@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small thread-safe, process-local cache with per-entry expiry.
+    When max_size is reached the oldest entry is dropped first.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: Optional[int] = None):
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for ttl seconds (defaults to the cache TTL)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            if self.max_size and len(self._data) >= self.max_size:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (expires_at, value)
+
+    def modify(self, key: Hashable, fn: Callable[[Any], Any]) -> None:
+        """Replace a live entry's value with fn(value), keeping its expiry"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return
+            self._data[key] = (expires_at, fn(value))
+
+    def update(self, items: Dict[Hashable, Any]) -> None:
+        """Store many values at once"""
+        for key, value in items.items():
+            self.set(key, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key matches predicate"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -13,9 +13,72 @@ OTP_KEY = os.getenv("PYOTP_KEY")
 TOTP = pyotp.TOTP(OTP_KEY)
 
 BUDPAY_SECRET_KEY=os.getenv("BUDPAY_SECRET_KEY")
+BUDPAY_BASE_URL=os.getenv("BUDPAY_BASE_URL", "https://api.budpay.com/api/v2")
 API_BASE_URL=os.getenv("API_BASE_URL")
 SYSTEM_FEE_ACCOUNT_ID=os.getenv("SYSTEM_FEE_ACCOUNT_ID")
 
+# Budpay HTTP client (one pooled client per worker)
+BUDPAY_CONNECT_TIMEOUT = float(os.getenv("BUDPAY_CONNECT_TIMEOUT", "5"))
+BUDPAY_READ_TIMEOUT = float(os.getenv("BUDPAY_READ_TIMEOUT", "15"))
+BUDPAY_POOL_TIMEOUT = float(os.getenv("BUDPAY_POOL_TIMEOUT", "5"))
+BUDPAY_MAX_CONNECTIONS = int(os.getenv("BUDPAY_MAX_CONNECTIONS", "100"))
+BUDPAY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("BUDPAY_MAX_KEEPALIVE_CONNECTIONS", "20"))
+BUDPAY_KEEPALIVE_EXPIRY = float(os.getenv("BUDPAY_KEEPALIVE_EXPIRY", "30"))
+BUDPAY_HTTP2 = os.getenv("BUDPAY_HTTP2", "false").lower() == "true"
+
+# Budpay resilience: circuit breaker, retries and hedged reads
+BUDPAY_BREAKER_FAILURE_THRESHOLD = int(os.getenv("BUDPAY_BREAKER_FAILURE_THRESHOLD", "5"))
+BUDPAY_BREAKER_RESET_SECONDS = float(os.getenv("BUDPAY_BREAKER_RESET_SECONDS", "30"))
+BUDPAY_MAX_RETRIES = int(os.getenv("BUDPAY_MAX_RETRIES", "2"))
+BUDPAY_RETRY_BACKOFF_MS = int(os.getenv("BUDPAY_RETRY_BACKOFF_MS", "100"))
+BUDPAY_RETRY_BACKOFF_CAP_MS = int(os.getenv("BUDPAY_RETRY_BACKOFF_CAP_MS", "2000"))
+BUDPAY_RETRY_BUDGET_RATIO = float(os.getenv("BUDPAY_RETRY_BUDGET_RATIO", "0.1"))
+BUDPAY_HEDGE_DELAY_MS = int(os.getenv("BUDPAY_HEDGE_DELAY_MS", "0"))  # 0 disables hedging
+
+# Send multi-leg transfers through Budpay's bulk endpoint instead of concurrent single calls
+BUDPAY_BULK_TRANSFER_ENABLED = os.getenv("BUDPAY_BULK_TRANSFER_ENABLED", "false").lower() == "true"
+
+# Short-lived cache of Budpay virtual account balances
+BALANCE_CACHE_TTL_SECONDS = float(os.getenv("BALANCE_CACHE_TTL_SECONDS", "5"))
+BALANCE_CACHE_STRICT_THRESHOLD = os.getenv("BALANCE_CACHE_STRICT_THRESHOLD", "100000")
+
+# Webhook credit batching
+WEBHOOK_BATCH_MAX_SIZE = int(os.getenv("WEBHOOK_BATCH_MAX_SIZE", "200"))
+WEBHOOK_BATCH_MAX_WAIT_MS = int(os.getenv("WEBHOOK_BATCH_MAX_WAIT_MS", "50"))
+
+# Hot account striping
+PLATFORM_ACCOUNT_STRIPES = int(os.getenv("PLATFORM_ACCOUNT_STRIPES", "8"))
+STRIPE_SWEEP_INTERVAL_SECONDS = int(os.getenv("STRIPE_SWEEP_INTERVAL_SECONDS", "60"))
+# Rows each (account, day, type) rollup is spread over, so busy accounts do not contend on one
+TRANSACTION_ROLLUP_STRIPES = int(os.getenv("TRANSACTION_ROLLUP_STRIPES", "8"))
+# Virtual account number -> account id resolver cache
+VIRTUAL_ACCOUNT_CACHE_TTL_SECONDS = int(os.getenv("VIRTUAL_ACCOUNT_CACHE_TTL_SECONDS", "300"))
+VIRTUAL_ACCOUNT_CACHE_MAX_SIZE = int(os.getenv("VIRTUAL_ACCOUNT_CACHE_MAX_SIZE", "50000"))
+# Nightly balance reconciliation against Budpay
+RECONCILE_CHUNK_SIZE = int(os.getenv("RECONCILE_CHUNK_SIZE", "1000"))
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "50"))
+RECONCILE_TOLERANCE = os.getenv("RECONCILE_TOLERANCE", "0.00")
+# Passes over a chunk Budpay did not answer before the run stops unfinished
+RECONCILE_MAX_RETRIES = int(os.getenv("RECONCILE_MAX_RETRIES", "5"))
+# Payments whose transfers timed out: how old before reconciling, and how many per pass
+PENDING_PAYMENT_GRACE_SECONDS = int(os.getenv("PENDING_PAYMENT_GRACE_SECONDS", "120"))
+PENDING_PAYMENT_BATCH_SIZE = int(os.getenv("PENDING_PAYMENT_BATCH_SIZE", "200"))
+# Monthly transactions partitions: how far ahead to create, and how old before detaching
+# once archived (0 keeps all)
+TRANSACTION_PARTITION_MONTHS_AHEAD = int(os.getenv("TRANSACTION_PARTITION_MONTHS_AHEAD", "3"))
+TRANSACTION_PARTITION_RETENTION_MONTHS = int(os.getenv("TRANSACTION_PARTITION_RETENTION_MONTHS", "0"))
+# Cold storage for settled transactions older than the retention window
+TRANSACTION_ARCHIVE_DIR = os.getenv("TRANSACTION_ARCHIVE_DIR", "archive/transactions")
+TRANSACTION_ARCHIVE_RETENTION_MONTHS = int(os.getenv("TRANSACTION_ARCHIVE_RETENTION_MONTHS", "12"))
+TRANSACTION_ARCHIVE_BATCH_SIZE = int(os.getenv("TRANSACTION_ARCHIVE_BATCH_SIZE", "5000"))
+# Store analytics results, also dropped whenever the store's account completes a transaction
+STORE_ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv("STORE_ANALYTICS_CACHE_TTL_SECONDS", "900"))
+# Node id (0-1023) baked into generated references, unique per process; unset leases one from Postgres
+ID_GENERATOR_NODE_ID = os.getenv("ID_GENERATOR_NODE_ID")
+# Bulk product import: rows validated and inserted per chunk, and how many row errors to report
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "1000"))
+PRODUCT_IMPORT_MAX_ERRORS = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", "1000"))
+
 class Settings(BaseModel):
     # Frontend URL Settings
     def get_password_reset_link(self, token: str) -> str:
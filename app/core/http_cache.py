@@ -0,0 +1,71 @@
+# app/core/http_cache.py
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the version values that identify a representation"""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    # Naive datetimes in this app are UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match (weak comparison, as RFC 9110 requires for GET),
+    falling back to If-Modified-Since only when If-None-Match is absent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def set_cache_headers(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = "private, no-cache"
+) -> Response:
+    """Attach validators; no-cache makes clients revalidate each time, which is cheap"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if last_modified:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+    return response
+
+
+def not_modified(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = "private, no-cache"
+) -> Response:
+    return set_cache_headers(
+        Response(status_code=status.HTTP_304_NOT_MODIFIED),
+        etag,
+        last_modified,
+        cache_control
+    )
@@ -0,0 +1,157 @@
+import os
+import random
+import socket
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.core.config import ID_GENERATOR_NODE_ID
+from app.data.utils.database import engine
+
+# Snowflake-style layout of a 63-bit id:
+#   41 bits  milliseconds since EPOCH_MS (good for ~69 years)
+#   10 bits  node id (one per worker process)
+#   12 bits  per-millisecond sequence
+EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+# Each millisecond's sequence starts at a random point in the lower half, so
+# two generators that ever share a node id rarely produce the same id, and
+# at least half the sequence space is left for that millisecond
+SEQUENCE_START_RANGE = (MAX_SEQUENCE + 1) // 2
+
+# Namespace (first key) of the Postgres advisory locks that lease node ids
+NODE_LEASE_NAMESPACE = 0x1D6E
+
+# Crockford base32: no I, L, O or U, so ids are unambiguous when read aloud
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ENCODED_LENGTH = 13  # 63 bits in 5-bit digits, zero-padded so string order matches numeric order
+
+
+def encode_base32(value: int) -> str:
+    digits = []
+    for _ in range(ENCODED_LENGTH):
+        digits.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(digits))
+
+
+def decode_base32(encoded: str) -> int:
+    value = 0
+    for char in encoded.upper():
+        value = (value << 5) | CROCKFORD_ALPHABET.index(char)
+    return value
+
+
+def _default_node_id() -> int:
+    """Node id derived from host and pid; only a starting point, since it can collide"""
+    return zlib.crc32(f"{socket.gethostname()}:{os.getpid()}".encode()) & MAX_NODE_ID
+
+
+# Connections holding node id leases, by pid. A forked child keeps its
+# parent's entry untouched: closing it there would end the parent's lease.
+_lease_connections: Dict[int, Connection] = {}
+
+
+def _lease_node_id() -> Optional[int]:
+    """
+    Claim a node id no other live process holds, as a Postgres session
+    advisory lock on a dedicated connection. The lock is released when the
+    process (and so the connection) goes away. Returns None on databases
+    without advisory locks (SQLite in tests), where the derived id is used.
+    """
+    if engine.dialect.name != "postgresql":
+        return None
+
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    # Held for the life of the process, so keep it out of the request pool
+    connection.detach()
+    start = _default_node_id()
+    for offset in range(MAX_NODE_ID + 1):
+        node_id = (start + offset) & MAX_NODE_ID
+        leased = connection.scalar(
+            text("SELECT pg_try_advisory_lock(:namespace, :node_id)"),
+            {"namespace": NODE_LEASE_NAMESPACE, "node_id": node_id}
+        )
+        if leased:
+            _lease_connections[os.getpid()] = connection
+            return node_id
+
+    connection.close()
+    raise RuntimeError(f"All {MAX_NODE_ID + 1} ID generator node ids are leased")
+
+
+class IdGenerator:
+    """
+    Time-ordered unique ids without a database lookup.
+    Ids from one generator strictly increase; ids from different nodes
+    cannot collide as long as node ids are distinct, which node id leasing
+    guarantees.
+    """
+
+    def __init__(self, node_id: Optional[int] = None):
+        node_id = _default_node_id() if node_id is None else node_id
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id must be between 0 and {MAX_NODE_ID}")
+        self.node_id = node_id
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            # Never step backwards if the wall clock does
+            if now_ms <= self._last_ms:
+                now_ms = self._last_ms
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # Sequence exhausted for this millisecond; borrow the next one
+                    now_ms += 1
+                    self._sequence = random.randrange(SEQUENCE_START_RANGE)
+            else:
+                self._sequence = random.randrange(SEQUENCE_START_RANGE)
+            self._last_ms = now_ms
+
+            return (now_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+    def next_str(self) -> str:
+        return encode_base32(self.next_id())
+
+
+def id_timestamp(value: int) -> float:
+    """Unix time (seconds) at which an id was generated"""
+    return ((value >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS) / 1000
+
+
+_generator: Optional[IdGenerator] = None
+_generator_pid: Optional[int] = None
+_generator_lock = threading.Lock()
+
+
+def get_id_generator() -> IdGenerator:
+    """
+    Process-wide generator; recreated after a fork so workers get their own
+    node id. ID_GENERATOR_NODE_ID pins the node id and must then differ for
+    every process; otherwise one is leased.
+    """
+    global _generator, _generator_pid
+    if _generator is None or _generator_pid != os.getpid():
+        with _generator_lock:
+            if _generator is None or _generator_pid != os.getpid():
+                if ID_GENERATOR_NODE_ID:
+                    node_id = int(ID_GENERATOR_NODE_ID)
+                else:
+                    node_id = _lease_node_id()
+                _generator = IdGenerator(node_id)
+                _generator_pid = os.getpid()
+    return _generator
+
+
+def new_reference(prefix: str = "TXN") -> str:
+    """Unique, time-ordered reference such as TXN-01HV3K9QZ8X2M"""
+    return f"{prefix}-{get_id_generator().next_str()}"
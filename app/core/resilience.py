@@ -0,0 +1,144 @@
+import random
+import time
+from typing import Dict
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    CLOSED: calls flow; consecutive failures are counted.
+    OPEN: calls are rejected until reset_timeout has passed.
+    HALF_OPEN: a limited number of trial calls decide whether to close again.
+    A trial that never reports back frees its slot after reset_timeout.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._trial_started_at = 0.0
+
+        # Counters exposed as metrics
+        self.successes = 0
+        self.failures = 0
+        self.rejections = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now; counts a rejection if not"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            if self._half_open_calls and time.monotonic() - self._trial_started_at >= self.reset_timeout:
+                # Trials that never recorded an outcome must not hold the breaker half-open
+                self._half_open_calls = 0
+            if self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                self._trial_started_at = time.monotonic()
+                return True
+        self.rejections += 1
+        return False
+
+    def release(self) -> None:
+        """Give back the slot of an allowed call that ended without an outcome (e.g. cancelled)"""
+        if self._state == self.HALF_OPEN and self._half_open_calls:
+            self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        self.successes += 1
+        self._consecutive_failures = 0
+        self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic so retries cannot multiply
+    load on a struggling dependency. Every request deposits `ratio` tokens,
+    every retry spends one, and `min_per_second` tokens trickle in so low
+    traffic can still retry.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+
+        self.retries = 0
+        self.exhausted = 0
+
+    @property
+    def tokens(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last_refill) * self.min_per_second)
+        self._last_refill = now
+        return self._tokens
+
+    def record_request(self) -> None:
+        self._tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry token if available"""
+        if self.tokens >= 1:
+            self._tokens -= 1
+            self.retries += 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter, in seconds"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str, **options) -> CircuitBreaker:
+    """Get (or create) the process-wide breaker for name"""
+    breaker = _circuit_breakers.get(name)
+    if breaker is None:
+        breaker = _circuit_breakers[name] = CircuitBreaker(name, **options)
+    return breaker
+
+
+def circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """All breakers created so far, by name"""
+    return dict(_circuit_breakers)
@@ -0,0 +1,123 @@
+# app/core/search_index.py
+import math
+import re
+import weakref
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Field weights, mirroring setweight A/A/B on the Postgres search_vector
+FIELD_WEIGHTS = {"name": 1.0, "code": 1.0, "description": 0.4}
+
+SNIPPET_WORDS = 20
+
+
+def _stem(token: str) -> str:
+    """Crude plural folding so "phones" finds "phone", as the english config would"""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [_stem(token) for token in TOKEN_PATTERN.findall((text or "").lower())]
+
+
+def _highlight(text: str, terms: Set[str]) -> str:
+    """Window of up to SNIPPET_WORDS words around the first match, matches wrapped in <b></b>"""
+    words = text.split()
+    matches = [i for i, word in enumerate(words) if set(tokenize(word)) & terms]
+    start = max(0, matches[0] - SNIPPET_WORDS // 2) if matches else 0
+    window = words[start:start + SNIPPET_WORDS]
+    return " ".join(
+        f"<b>{word}</b>" if set(tokenize(word)) & terms else word
+        for word in window
+    )
+
+
+class InvertedIndex:
+    """
+    In-process full-text index over products, used where Postgres full-text
+    search is unavailable (SQLite in tests). Terms must all match; results
+    are scored by weighted term frequency times inverse document frequency.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documents: Dict[int, Dict[str, str]] = {}
+        self.built = False
+
+    def rebuild(self, documents: Iterable[Dict]) -> None:
+        with self._lock:
+            self._postings = {}
+            self._documents = {}
+            for document in documents:
+                self._add(document)
+            self.built = True
+
+    def add(self, document: Dict) -> None:
+        """Index or re-index one product ({"id", "name", "description", "code"})"""
+        with self._lock:
+            self._remove(document["id"])
+            self._add(document)
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            self._remove(product_id)
+
+    def _add(self, document: Dict) -> None:
+        fields = {field: document.get(field) or "" for field in FIELD_WEIGHTS}
+        self._documents[document["id"]] = fields
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields[field]):
+                postings = self._postings.setdefault(token, {})
+                postings[document["id"]] = postings.get(document["id"], 0.0) + weight
+
+    def _remove(self, product_id: int) -> None:
+        if self._documents.pop(product_id, None) is None:
+            return
+        for token in list(self._postings):
+            postings = self._postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def search(self, query: str) -> List[Tuple[int, float, str]]:
+        """All matching (product_id, rank, snippet), best first with ties broken by newest id"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            matched = set.intersection(*(set(posting) for posting in postings))
+            total = len(self._documents)
+
+            results = []
+            for product_id in matched:
+                rank = sum(
+                    posting[product_id] * math.log(1 + total / len(posting))
+                    for posting in postings
+                )
+                fields = self._documents[product_id]
+                snippet = _highlight(fields["description"] or fields["name"], terms)
+                results.append((product_id, round(rank, 6), snippet))
+
+        results.sort(key=lambda result: (result[1], result[0]), reverse=True)
+        return results
+
+
+# Per-process indexes for the SQLite fallback, one per engine so two databases
+# never share documents; dropped with the engine
+product_search_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_indexes_lock = Lock()
+
+
+def get_product_search_index(engine) -> InvertedIndex:
+    with _indexes_lock:
+        index = product_search_indexes.get(engine)
+        if index is None:
+            index = product_search_indexes[engine] = InvertedIndex()
+        return index
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Enum, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.data.utils.database import Base
@@ -15,6 +15,9 @@ class AccountType(str, enum.Enum):
 
 class Account(Base):
     __tablename__ = "accounts"
+    __table_args__ = (
+        Index("ix_accounts_user_id_type", "user_id", "type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -28,19 +31,45 @@ class Account(Base):
     locked = Column(Boolean, default=False)
     lock_reason = Column(String, nullable=True)
     locked_at = Column(DateTime, nullable=True)
+    stripe_count = Column(Integer, default=0)  # 0 means credits go straight to balance
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     virtual_accounts = relationship("VirtualBankAccount", back_populates="account")
     transactions = relationship("Transaction", back_populates="account")
+    stripes = relationship("AccountStripe", back_populates="account")
 
     @property
     def active_virtual_account(self):
         """Get the active virtual account for this account"""
         return next((va for va in self.virtual_accounts if va.is_active), None)
 
+class AccountStripe(Base):
+    """Credit-only sub-balance of a hot account, folded back periodically"""
+    __tablename__ = "account_stripes"
+    __table_args__ = (
+        UniqueConstraint("account_id", "stripe", name="uq_account_stripes_account_id_stripe"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    stripe = Column(Integer, nullable=False)
+    balance = Column(Numeric(10, 2), default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    account = relationship("Account", back_populates="stripes")
+
 class VirtualBankAccount(Base):
     __tablename__ = "virtual_bank_accounts"
+    __table_args__ = (
+        # Covers webhook resolution (number -> account id) as an index-only scan
+        Index(
+            "ix_virtual_bank_accounts_active_number",
+            "account_number",
+            "account_id",
+            postgresql_where=text("is_active")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,12 +1,17 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Numeric
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, ForeignKey, Index, Numeric
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.data.utils.database import Base
 
 
 class ProductImage(Base):
     __tablename__ = 'product_images'
+    __table_args__ = (
+        # Primary image lookup for a page of catalogue products
+        Index('ix_product_images_product_id_is_primary', 'product_id', 'is_primary'),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey('products.id'))
+    product_id = Column(Integer, ForeignKey('products.id'), index=True)
     product = relationship('Product')
     url = Column(String)
     is_primary = Column(Boolean, default=False)
@@ -14,14 +19,24 @@ class ProductImage(Base):
 
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Catalogue filters followed by the (prices, id) / id keyset sort
+        Index('ix_products_state_lga_prices_id', 'state', 'lga', 'prices', 'id'),
+        Index('ix_products_condition_prices_id', 'condition', 'prices', 'id'),
+        Index('ix_products_prices_id', 'prices', 'id'),
+        Index('ix_products_user_id_prices_id', 'user_id', 'prices', 'id'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     description = Column(String)
     code = Column(String)
     condition = Column(String)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     user = relationship('User')
     images = relationship('ProductImage')
     prices = Column(Numeric)
     state = Column(String)
     lga = Column(String)
+    # Bumped on every change to the product or its images; drives ETags
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
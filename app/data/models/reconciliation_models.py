@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import enum
+
+from app.data.utils.database import Base
+
+class ReconciliationStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ReconciliationRun(Base):
+    """One pass of the ledger vs Budpay balance check, with its resume checkpoint"""
+    __tablename__ = "reconciliation_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default=ReconciliationStatus.RUNNING)
+    last_virtual_account_id = Column(Integer, nullable=False, default=0)
+    checked_count = Column(Integer, nullable=False, default=0)
+    mismatch_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    mismatches = relationship("BalanceMismatch", back_populates="run")
+
+class BalanceMismatch(Base):
+    """Account whose ledger balance disagrees with Budpay (or could not be checked)"""
+    __tablename__ = "balance_mismatches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("reconciliation_runs.id"), nullable=False, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    virtual_account_id = Column(Integer, ForeignKey("virtual_bank_accounts.id"), nullable=False)
+    account_number = Column(String, nullable=False)
+    ledger_balance = Column(Numeric(12, 2), nullable=False)
+    provider_balance = Column(Numeric(12, 2), nullable=True)  # NULL when the lookup failed
+    difference = Column(Numeric(12, 2), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    run = relationship("ReconciliationRun", back_populates="mismatches")
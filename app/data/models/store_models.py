@@ -1,5 +1,6 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, ForeignKey
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.data.utils.database import Base
 
 
@@ -14,15 +15,21 @@ class Subscription(Base):
 class Store(Base):
     __tablename__ = 'stores'
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     name = Column(String)
     image = Column(String)
     user = relationship('User')
     description = Column(String)
     subscription = relationship('StoreSubscription', uselist=False, back_populates='store')
+    # Bumped on every change to the store or its subscription; drives ETags
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class StoreSubscription(Base):
     __tablename__ = 'store_subscriptions'
+    __table_args__ = (
+        Index('ix_store_subscriptions_store_id_is_active', 'store_id', 'is_active'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     store_id = Column(Integer, ForeignKey('stores.id'), unique=True, nullable=False)
     subscription_id = Column(Integer)
@@ -1,5 +1,5 @@
 # app/data/models/transaction_models.py
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -20,7 +20,24 @@ class TransactionStatus(str, enum.Enum):
     FAILED = "failed"
 
 class Transaction(Base):
+    """
+    Range-partitioned by month on created_at in Postgres (see the partitioning
+    migration); there the primary key is (id, created_at) and global reference
+    uniqueness lives in transaction_references.
+    """
     __tablename__ = "transactions"
+    __table_args__ = (
+        # History pages (newest first) and filtered history per account
+        Index("ix_transactions_account_id_created_at", "account_id", "created_at"),
+        Index("ix_transactions_account_id_type_status", "account_id", "type", "status"),
+        # Payments awaiting reconciliation; few rows, so a small partial index
+        Index(
+            "ix_transactions_pending_group_id",
+            "group_id",
+            postgresql_where=text("status = 'pending' AND group_id IS NOT NULL")
+        ),
+        UniqueConstraint("reference", "created_at", name="uq_transactions_reference_created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(String, nullable=False)
@@ -28,12 +45,56 @@ class Transaction(Base):
     fee_amount = Column(Numeric(10, 2), default=0)
     description = Column(String, nullable=True)
     status = Column(String, nullable=False, default=TransactionStatus.PENDING)
-    reference = Column(String, unique=True, nullable=False)
+    reference = Column(String, nullable=False)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     virtual_account_id = Column(Integer, ForeignKey("virtual_bank_accounts.id"), nullable=True)
+    group_id = Column(Integer, ForeignKey("payment_groups.id"), nullable=True, index=True)
     completed_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     account = relationship("Account", back_populates="transactions")
     virtual_account = relationship("VirtualBankAccount")
+    group = relationship("PaymentGroup", back_populates="transactions")
+
+class PaymentGroup(Base):
+    """The legs of one payment or subscription, keyed by the payment's base reference"""
+    __tablename__ = "payment_groups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    reference = Column(String, unique=True, nullable=False)
+    type = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    transactions = relationship("Transaction", back_populates="group")
+
+class TransactionReference(Base):
+    """Every reference ever used; keeps references unique across partitions and archives"""
+    __tablename__ = "transaction_references"
+
+    reference = Column(String, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+class TransactionRollup(Base):
+    """
+    Per-day totals of completed transactions, maintained as they complete.
+    Each (account, day, type) total is spread over up to
+    TRANSACTION_ROLLUP_STRIPES rows; readers sum them.
+    """
+    __tablename__ = "transaction_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "account_id", "day", "type", "stripe",
+            name="uq_transaction_rollups_account_id_day_type_stripe"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    type = Column(String, nullable=False)
+    stripe = Column(Integer, nullable=False, default=0, server_default='0')
+    count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    total_fees = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -4,7 +4,7 @@ from app.data.utils.database import Base
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String)
+    username = Column(String, index=True)
     email = Column(String, unique=True)
     phone = Column(String, unique=True)
     first_name = Column(String)
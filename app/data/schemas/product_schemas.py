@@ -10,6 +10,17 @@ class ProductCondition(str, Enum):
     REFURBISHED = "refurbished"
 
 
+class ProductImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ProductSort(str, Enum):
+    NEWEST = "newest"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+
+
 class ProductImageBase(BaseModel):
     url: HttpUrl
     is_primary: bool = False
@@ -102,4 +113,48 @@ class ProductListResponse(BaseModel):
     data: List[ProductRead]
     total: int
     page: int
-    size: int
\ No newline at end of file
+    size: int
+
+
+class CatalogueProductRead(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    condition: ProductCondition
+    prices: Decimal
+    state: str
+    lga: str
+    user_id: int
+    primary_image: Optional[ProductImageRead] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductCatalogueResponse(BaseModel):
+    data: List[CatalogueProductRead]
+    next_cursor: Optional[str] = None
+    size: int
+
+
+class ProductSearchResult(CatalogueProductRead):
+    rank: float = 0.0
+    snippet: Optional[str] = None
+
+
+class ProductSearchResponse(BaseModel):
+    data: List[ProductSearchResult]
+    next_cursor: Optional[str] = None
+    size: int
+
+
+class ProductImportError(BaseModel):
+    row: int = Field(..., description="1-based data row (CSV rows after the header, NDJSON lines)")
+    errors: List[str]
+
+
+class ProductImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
+    errors_truncated: bool = False
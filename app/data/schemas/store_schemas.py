@@ -1,5 +1,6 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, Optional, List
 from pydantic import BaseModel
 from app.core.constants import DurationType, SubscriptionType
 
@@ -50,4 +51,30 @@ class StoreRead(StoreBase):
     subscription: Optional[StoreSubscriptionRead] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AnalyticsInterval(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class StoreAnalyticsBucket(BaseModel):
+    period_start: date
+    orders: int
+    gross_revenue: float
+    net_revenue: float
+    fees: float
+    average_order_value: float
+
+class StoreAnalyticsRead(BaseModel):
+    store_id: int
+    start_date: date
+    end_date: date
+    interval: AnalyticsInterval
+    total_orders: int
+    gross_revenue: float
+    net_revenue: float
+    total_fees: float
+    average_order_value: float
+    order_value_percentiles: Dict[str, float]
+    buckets: List[StoreAnalyticsBucket]
@@ -3,8 +3,13 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
+from enum import Enum
 from .account_schemas import AccountRead
 
+class StatementFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
 class TransactionBase(BaseModel):
     type: str
     amount: Decimal
@@ -25,6 +30,7 @@ class TransactionRead(TransactionBase):
     reference: str
     account_id: int
     virtual_account_id: Optional[int]
+    group_id: Optional[int] = None
     completed_at: Optional[datetime]
     created_at: datetime
     updated_at: datetime
@@ -36,7 +42,7 @@ class TransactionRead(TransactionBase):
 class TransactionListResponse(BaseModel):
     message: str
     data: List[TransactionRead]
-    total: int
+    total: Optional[int] = None
     page: int
     size: int
 
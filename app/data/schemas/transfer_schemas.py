@@ -0,0 +1,33 @@
+# app/data/schemas/transfer_schemas.py
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+from decimal import Decimal
+from enum import Enum
+
+class TransferLeg(BaseModel):
+    from_account: str
+    to_account: str
+    amount: Decimal = Field(..., gt=0)
+    description: Optional[str] = None
+    reference: Optional[str] = None
+
+    def reversed(self) -> "TransferLeg":
+        """Leg that moves the same amount back"""
+        return TransferLeg(
+            from_account=self.to_account,
+            to_account=self.from_account,
+            amount=self.amount,
+            description=f"Reversal: {self.description or ''}".strip(),
+            reference=f"{self.reference}-REV" if self.reference else None
+        )
+
+class TransferLegStatus(str, Enum):
+    SUCCESS = "success"
+    FAILED = "failed"
+    PENDING = "pending"  # outcome unknown, e.g. the request timed out after sending
+
+class TransferLegResult(BaseModel):
+    leg: TransferLeg
+    status: TransferLegStatus
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
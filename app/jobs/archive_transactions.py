@@ -0,0 +1,85 @@
+# app/jobs/archive_transactions.py
+"""
+Move settled transactions older than the retention window to cold storage.
+
+    python -m app.jobs.archive_transactions                       # archive rows older than 12 months
+    python -m app.jobs.archive_transactions --retention-months 6
+    python -m app.jobs.archive_transactions --archive-dir /mnt/archive/transactions
+
+Completed and failed transactions created before the start of the month
+TRANSACTION_ARCHIVE_RETENTION_MONTHS ago are written, in (created_at, id)
+order, to gzipped NDJSON files under the archive directory and recorded in
+its manifest.json. Each batch is deleted from the hot table only after its
+file and manifest entry are safely on disk; batches whose delete did not
+finish (e.g. the job was killed) are completed first on the next run.
+
+Rollups and the reference registry are left alone, so summaries and
+duplicate detection still cover archived history.
+"""
+import argparse
+from datetime import date, datetime
+from app.core.config import (
+    TRANSACTION_ARCHIVE_BATCH_SIZE,
+    TRANSACTION_ARCHIVE_DIR,
+    TRANSACTION_ARCHIVE_RETENTION_MONTHS
+)
+from app.data.utils.database import SessionLocal
+from app.repository.archive_repo import TransactionArchive
+from app.repository.partition_repo import add_months, month_start
+from app.repository.transaction_repo import TransactionRepository
+
+
+def _key(bound: dict):
+    return datetime.fromisoformat(bound["created_at"]), bound["id"]
+
+
+def archive(retention_months: int, batch_size: int, archive_dir: str) -> None:
+    before = datetime.combine(add_months(month_start(date.today()), -retention_months), datetime.min.time())
+    transaction_archive = TransactionArchive(archive_dir)
+
+    session = SessionLocal()
+    try:
+        transaction_repo = TransactionRepository(session)
+
+        # Step 1: Finish deletes left pending by an interrupted run
+        for entry in transaction_archive.pending_entries():
+            deleted = transaction_repo.delete_archived(before, _key(entry["first"]), _key(entry["last"]))
+            session.commit()
+            transaction_archive.mark_deleted(entry["file"])
+            print(f"Completed pending delete for {entry['file']} ({deleted} rows)")
+
+        # Step 2: Archive and delete batch by batch
+        archived = 0
+        after = None
+        while True:
+            rows = transaction_repo.get_archivable_batch(before, after=after, limit=batch_size)
+            if not rows:
+                break
+
+            entry = transaction_archive.write_batch(rows)
+            first = (rows[0]["created_at"], rows[0]["id"])
+            after = (rows[-1]["created_at"], rows[-1]["id"])
+            transaction_repo.delete_archived(before, first, after)
+            session.commit()
+            transaction_archive.mark_deleted(entry["file"])
+
+            archived += len(rows)
+            print(f"Archived {len(rows)} transactions to {entry['file']}")
+
+        print(f"Archived {archived} transactions created before {before:%Y-%m-%d}")
+    finally:
+        session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive settled transactions to cold storage")
+    parser.add_argument("--retention-months", type=int, default=TRANSACTION_ARCHIVE_RETENTION_MONTHS)
+    parser.add_argument("--batch-size", type=int, default=TRANSACTION_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--archive-dir", default=TRANSACTION_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    archive(args.retention_months, args.batch_size, args.archive_dir)
+
+
+if __name__ == "__main__":
+    main()
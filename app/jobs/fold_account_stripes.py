@@ -0,0 +1,72 @@
+# app/jobs/fold_account_stripes.py
+"""
+Periodic sweep that folds stripe balances back into their parent accounts.
+
+    python -m app.jobs.fold_account_stripes            # run forever
+    python -m app.jobs.fold_account_stripes --once     # single pass (cron)
+    python -m app.jobs.fold_account_stripes --stripe-account 42 --stripes 4
+
+On every pass the platform account is (re)striped to PLATFORM_ACCOUNT_STRIPES.
+"""
+import argparse
+import time
+from app.core.config import PLATFORM_ACCOUNT_STRIPES, STRIPE_SWEEP_INTERVAL_SECONDS
+from app.data.models.account_models import AccountType
+from app.data.utils.database import SessionLocal
+from app.repository.account_repo import AccountRepository
+
+
+def sweep() -> None:
+    """Fold every striped account once"""
+    session = SessionLocal()
+    try:
+        account_repo = AccountRepository(session)
+
+        platform_account = account_repo.get_by_type(AccountType.PLATFORM)
+        if platform_account and platform_account.stripe_count != PLATFORM_ACCOUNT_STRIPES:
+            account_repo.enable_stripes(platform_account, PLATFORM_ACCOUNT_STRIPES)
+
+        for account in account_repo.get_striped_accounts():
+            folded = account_repo.fold_stripes(account)
+            session.commit()
+            if folded:
+                print(f"Folded {folded} into account {account.id}")
+    finally:
+        session.close()
+
+
+def stripe_account(account_id: int, stripe_count: int) -> None:
+    """Enable (or change) striping on a single account, e.g. a large store"""
+    session = SessionLocal()
+    try:
+        account_repo = AccountRepository(session)
+        account = account_repo.get_by_id(account_id)
+        if not account:
+            raise SystemExit(f"Account {account_id} not found")
+        account_repo.enable_stripes(account, stripe_count)
+        print(f"Account {account_id} now uses {stripe_count} stripes")
+    finally:
+        session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fold striped account balances")
+    parser.add_argument("--once", action="store_true", help="Run a single sweep and exit")
+    parser.add_argument("--interval", type=int, default=STRIPE_SWEEP_INTERVAL_SECONDS)
+    parser.add_argument("--stripe-account", type=int, help="Account ID to (re)stripe")
+    parser.add_argument("--stripes", type=int, default=PLATFORM_ACCOUNT_STRIPES)
+    args = parser.parse_args()
+
+    if args.stripe_account:
+        stripe_account(args.stripe_account, args.stripes)
+        return
+
+    while True:
+        sweep()
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
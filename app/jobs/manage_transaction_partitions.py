@@ -0,0 +1,73 @@
+# app/jobs/manage_transaction_partitions.py
+"""
+Keep the monthly partitions of the transactions table in shape.
+
+    python -m app.jobs.manage_transaction_partitions                       # create upcoming partitions
+    python -m app.jobs.manage_transaction_partitions --months-ahead 6
+    python -m app.jobs.manage_transaction_partitions --retention-months 24 # also detach old ones
+    python -m app.jobs.manage_transaction_partitions --list
+
+Run daily from cron. Partitions are created TRANSACTION_PARTITION_MONTHS_AHEAD
+months ahead so inserts never land in the default partition. With a retention
+set, partitions that ended more than that many months ago are detached once
+archive_transactions has moved all their rows to the archive; a partition
+that still holds rows is kept attached and reported, so no row leaves
+history. Detached partitions are empty tables and can be dropped.
+"""
+import argparse
+from datetime import date
+from app.core.config import TRANSACTION_PARTITION_MONTHS_AHEAD, TRANSACTION_PARTITION_RETENTION_MONTHS
+from app.data.utils.database import SessionLocal
+from app.repository.partition_repo import TransactionPartitionRepository, add_months, month_start
+
+
+def manage(months_ahead: int, retention_months: int) -> None:
+    session = SessionLocal()
+    try:
+        partition_repo = TransactionPartitionRepository(session)
+
+        for name in partition_repo.ensure_partitions(months_ahead):
+            print(f"Created partition {name}")
+
+        if retention_months > 0:
+            cutoff = add_months(month_start(date.today()), -retention_months)
+            detached, kept = partition_repo.detach_partitions_before(cutoff)
+            for name in detached:
+                print(f"Detached partition {name}")
+            for name in kept:
+                print(f"Kept partition {name}: it still holds rows that are not archived")
+    finally:
+        session.close()
+
+
+def list_partitions() -> None:
+    session = SessionLocal()
+    try:
+        for partition in TransactionPartitionRepository(session).list_partitions():
+            bounds = f"{partition['start']} .. {partition['end']}" if partition["start"] else "default"
+            print(f"{partition['name']}: {bounds}")
+    finally:
+        session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create and detach monthly transactions partitions")
+    parser.add_argument("--months-ahead", type=int, default=TRANSACTION_PARTITION_MONTHS_AHEAD)
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=TRANSACTION_PARTITION_RETENTION_MONTHS,
+        help="Detach partitions older than this many months once archived (0 keeps all)"
+    )
+    parser.add_argument("--list", action="store_true", help="List attached partitions and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        list_partitions()
+        return
+
+    manage(args.months_ahead, args.retention_months)
+
+
+if __name__ == "__main__":
+    main()
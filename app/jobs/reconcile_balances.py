@@ -0,0 +1,181 @@
+# app/jobs/reconcile_balances.py
+"""
+Compare every active account's ledger balance with Budpay's view.
+
+    python -m app.jobs.reconcile_balances                  # resume or start a run
+    python -m app.jobs.reconcile_balances --restart        # abandon any unfinished run
+    python -m app.jobs.reconcile_balances --concurrency 100
+
+Virtual accounts are walked in keyset-paginated chunks; each chunk's balance
+lookups run concurrently (bounded by a semaphore) over one pooled HTTP client.
+Mismatches and lookups Budpay rejected go to balance_mismatches and the run's
+checkpoint is advanced after every chunk, so an interrupted run resumes where
+it stopped.
+
+A lookup that could not reach Budpay (circuit breaker open, connection
+failure) is not a finding. The checkpoint only advances past the accounts
+before the first such lookup, and the rest of the chunk is retried after
+--retry-delay seconds. After --max-retries passes without progress the run
+stops unfinished, and the next invocation resumes it.
+"""
+import argparse
+import asyncio
+from decimal import Decimal
+from typing import Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from app.core.config import (
+    BUDPAY_BREAKER_RESET_SECONDS,
+    RECONCILE_CHUNK_SIZE,
+    RECONCILE_CONCURRENCY,
+    RECONCILE_MAX_RETRIES,
+    RECONCILE_TOLERANCE
+)
+from app.data.models.reconciliation_models import ReconciliationStatus
+from app.data.utils.database import SessionLocal
+from app.repository.reconciliation_repo import ReconciliationRepository
+from app.service.budpay_service import BudpayService
+
+# Result of a lookup that never got an answer from Budpay; retried, not recorded
+UNCHECKED = object()
+
+
+async def _check_account(
+    budpay_service: BudpayService,
+    semaphore: asyncio.Semaphore,
+    row,
+    tolerance: Decimal
+) -> Optional[Dict]:
+    """Return a mismatch row for this account, None if it agrees, or UNCHECKED"""
+    ledger_balance = Decimal(str(row.ledger_balance or 0))
+    mismatch = {
+        "account_id": row.account_id,
+        "virtual_account_id": row.id,
+        "account_number": row.account_number,
+        "ledger_balance": ledger_balance
+    }
+
+    async with semaphore:
+        try:
+            data = await budpay_service.get_virtual_account_balance(row.account_number, strict=True)
+            provider_balance = Decimal(str(data["balance"]))
+        except HTTPException as e:
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                return UNCHECKED
+            return {**mismatch, "provider_balance": None, "difference": None, "error": str(e.detail)}
+        except Exception:
+            return UNCHECKED
+
+    difference = provider_balance - ledger_balance
+    if abs(difference) <= tolerance:
+        return None
+    return {**mismatch, "provider_balance": provider_balance, "difference": difference, "error": None}
+
+
+async def reconcile(
+    chunk_size: int = RECONCILE_CHUNK_SIZE,
+    concurrency: int = RECONCILE_CONCURRENCY,
+    tolerance: Decimal = Decimal(RECONCILE_TOLERANCE),
+    restart: bool = False,
+    retry_delay: float = BUDPAY_BREAKER_RESET_SECONDS,
+    max_retries: int = RECONCILE_MAX_RETRIES
+) -> bool:
+    """Run (or resume) a reconciliation; False if it stopped unfinished"""
+    session = SessionLocal()
+    try:
+        reconciliation_repo = ReconciliationRepository(session)
+
+        run = reconciliation_repo.get_resumable_run()
+        if run and restart:
+            reconciliation_repo.finish_run(run, ReconciliationStatus.FAILED)
+            run = None
+        if not run:
+            run = reconciliation_repo.start_run()
+        print(f"Reconciliation run {run.id} starting after virtual account {run.last_virtual_account_id}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        timeout = httpx.Timeout(10.0, connect=5.0)
+
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            budpay_service = BudpayService(client=client)
+
+            retries = 0
+            while True:
+                chunk = reconciliation_repo.get_virtual_account_chunk(
+                    after_id=run.last_virtual_account_id,
+                    limit=chunk_size
+                )
+                if not chunk:
+                    break
+
+                results = await asyncio.gather(*[
+                    _check_account(budpay_service, semaphore, row, tolerance)
+                    for row in chunk
+                ])
+
+                # Step 1: Only the accounts before the first unanswered lookup count as checked
+                checked = next(
+                    (i for i, result in enumerate(results) if result is UNCHECKED),
+                    len(results)
+                )
+                if checked:
+                    mismatches = [result for result in results[:checked] if result]
+                    errors = sum(1 for result in mismatches if result["error"])
+                    reconciliation_repo.checkpoint(
+                        run,
+                        last_virtual_account_id=chunk[checked - 1].id,
+                        checked=checked,
+                        mismatches=mismatches,
+                        errors=errors
+                    )
+                    print(
+                        f"Checked {run.checked_count} accounts "
+                        f"({run.mismatch_count} mismatches, {run.error_count} errors)"
+                    )
+                    retries = 0
+                if checked == len(results):
+                    continue
+
+                # Step 2: Budpay did not answer; retry the rest of the chunk after a pause
+                if not checked:
+                    retries += 1
+                if retries > max_retries:
+                    print(
+                        f"Reconciliation run {run.id} stopped after virtual account "
+                        f"{run.last_virtual_account_id}: payment service unavailable"
+                    )
+                    return False
+                await asyncio.sleep(retry_delay)
+
+        reconciliation_repo.finish_run(run, ReconciliationStatus.COMPLETED)
+        print(f"Reconciliation run {run.id} completed")
+        return True
+    finally:
+        session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconcile ledger balances against Budpay")
+    parser.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=RECONCILE_CONCURRENCY)
+    parser.add_argument("--tolerance", type=Decimal, default=Decimal(RECONCILE_TOLERANCE))
+    parser.add_argument("--restart", action="store_true", help="Abandon any unfinished run")
+    parser.add_argument("--retry-delay", type=float, default=BUDPAY_BREAKER_RESET_SECONDS)
+    parser.add_argument("--max-retries", type=int, default=RECONCILE_MAX_RETRIES)
+    args = parser.parse_args()
+
+    finished = asyncio.run(reconcile(
+        chunk_size=args.chunk_size,
+        concurrency=args.concurrency,
+        tolerance=args.tolerance,
+        restart=args.restart,
+        retry_delay=args.retry_delay,
+        max_retries=args.max_retries
+    ))
+    if not finished:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# app/jobs/reconcile_pending_payments.py
+"""
+Settle payments left PENDING because a transfer's outcome was unknown.
+
+    python -m app.jobs.reconcile_pending_payments            # run forever
+    python -m app.jobs.reconcile_pending_payments --once     # single pass (cron)
+
+A checkout or subscription payment whose transfer timed out after sending
+keeps its legs PENDING instead of guessing. Once a payment is older than the
+grace period, each transfer leg's status is queried. A product payment
+completes if every leg went through. Otherwise the legs that did are
+reversed and it is marked FAILED. Subscription payments are always
+reversed and failed, because the store change they paid for was not
+applied. Payments Budpay cannot yet answer for are retried on the next pass.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from app.core.config import PENDING_PAYMENT_BATCH_SIZE, PENDING_PAYMENT_GRACE_SECONDS
+from app.data.models.transaction_models import TransactionType
+from app.data.utils.database import SessionLocal
+from app.service.budpay_service import close_budpay_client
+from app.service.transaction_service import TransactionService
+
+
+async def reconcile(grace_seconds: int, batch_size: int) -> None:
+    """Reconcile every pending product and subscription payment older than the grace period once"""
+    created_before = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    settled = {}
+
+    session = SessionLocal()
+    try:
+        transaction_service = TransactionService(session)
+        for payment_type in (TransactionType.PRODUCT_PAYMENT, TransactionType.SUBSCRIPTION):
+            after_id = 0
+            while True:
+                group_ids = transaction_service.transaction_repo.get_pending_payment_groups(
+                    payment_type, created_before, after_id, batch_size
+                )
+                if not group_ids:
+                    break
+
+                for group_id in group_ids:
+                    try:
+                        outcome = await transaction_service.reconcile_pending_payment(group_id)
+                    except Exception as e:
+                        session.rollback()
+                        print(f"Payment group {group_id}: {e}")
+                        continue
+                    settled[outcome] = settled.get(outcome, 0) + 1
+                after_id = group_ids[-1]
+                session.expunge_all()
+    finally:
+        session.close()
+
+    summary = ", ".join(
+        f"{count} {outcome.value if outcome else 'still pending'}"
+        for outcome, count in settled.items()
+    )
+    print(f"Reconciled pending payments: {summary or 'none'}")
+
+
+async def run(once: bool, interval: int, grace_seconds: int, batch_size: int) -> None:
+    try:
+        while True:
+            await reconcile(grace_seconds, batch_size)
+            if once:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await close_budpay_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Settle payments with unconfirmed transfers")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--interval", type=int, default=60)
+    parser.add_argument("--grace-seconds", type=int, default=PENDING_PAYMENT_GRACE_SECONDS)
+    parser.add_argument("--batch-size", type=int, default=PENDING_PAYMENT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.once, args.interval, args.grace_seconds, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
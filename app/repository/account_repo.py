@@ -1,12 +1,26 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func, update
 from fastapi import HTTPException, status
+import random
+import zlib
 
-from app.data.models.account_models import Account, VirtualBankAccount, AccountType
+from app.core.cache import TTLCache
+from app.core.config import VIRTUAL_ACCOUNT_CACHE_MAX_SIZE, VIRTUAL_ACCOUNT_CACHE_TTL_SECONDS
+from app.data.models.account_models import Account, AccountStripe, VirtualBankAccount, AccountType
+
+# Process-local map of active virtual account number -> account id.
+# Filled on lookup and on create in this process, bounded so accounts that
+# stop receiving credits are evicted. Nothing in the app deactivates virtual
+# accounts, so the short TTL only bounds staleness from changes made directly
+# in the database.
+virtual_account_cache = TTLCache(
+    ttl_seconds=VIRTUAL_ACCOUNT_CACHE_TTL_SECONDS,
+    max_size=VIRTUAL_ACCOUNT_CACHE_MAX_SIZE
+)
 
 class AccountRepository:
     def __init__(self, session: Session):
@@ -47,6 +61,7 @@ class AccountRepository:
                 
             # Commit the transaction
             self.session.commit()
+            virtual_account_cache.set(virtual_account.account_number, account.id)
             return account, virtual_account
             
         except SQLAlchemyError as e:
@@ -68,21 +83,141 @@ class AccountRepository:
             )
         ).first()
 
-    def get_by_virtual_account(self, account_number: str) -> Optional[Account]:
-        """Get main account by virtual account number"""
-        virtual_account = self.session.query(VirtualBankAccount).filter(
+    def get_by_id(self, account_id: int) -> Optional[Account]:
+        """Get account by ID"""
+        return self.session.get(Account, account_id)
+
+    def get_by_type(self, account_type: str) -> Optional[Account]:
+        """Get the first account of a given type (e.g. the platform account)"""
+        return self.session.query(Account).filter(
+            Account.type == account_type
+        ).order_by(Account.id.asc()).first()
+
+    def get_virtual_account(self, account_id: int) -> Optional[VirtualBankAccount]:
+        """Get the active virtual account for an account"""
+        return self.session.query(VirtualBankAccount).filter(
             and_(
-                VirtualBankAccount.account_number == account_number,
+                VirtualBankAccount.account_id == account_id,
                 VirtualBankAccount.is_active == True
             )
         ).first()
-        
-        if virtual_account:
-            return self.session.query(Account).get(virtual_account.account_id)
-        return None
 
-    def credit_account(self, account: Account, amount: Decimal) -> Account:
-        """Add money to account balance"""
+    def get_by_virtual_account(self, account_number: str) -> Optional[Account]:
+        """Get main account by virtual account number"""
+        account_id = virtual_account_cache.get(account_number)
+        if account_id is not None:
+            return self.session.get(Account, account_id)
+
+        account = self.session.query(Account)\
+            .join(VirtualBankAccount, VirtualBankAccount.account_id == Account.id)\
+            .filter(
+                and_(
+                    VirtualBankAccount.account_number == account_number,
+                    VirtualBankAccount.is_active == True
+                )
+            ).first()
+
+        if account:
+            virtual_account_cache.set(account_number, account.id)
+        return account
+
+    def get_by_virtual_accounts(self, account_numbers: List[str]) -> Dict[str, Account]:
+        """
+        Get main accounts for many active virtual account numbers.
+        Numbers already in the resolver cache skip the virtual account lookup.
+        """
+        if not account_numbers:
+            return {}
+
+        resolved = {number: virtual_account_cache.get(number) for number in account_numbers}
+        misses = [number for number, account_id in resolved.items() if account_id is None]
+
+        if misses:
+            rows = self.session.query(
+                VirtualBankAccount.account_number,
+                VirtualBankAccount.account_id
+            ).filter(
+                and_(
+                    VirtualBankAccount.account_number.in_(misses),
+                    VirtualBankAccount.is_active == True
+                )
+            ).all()
+            for account_number, account_id in rows:
+                resolved[account_number] = account_id
+                virtual_account_cache.set(account_number, account_id)
+
+        account_ids = {account_id for account_id in resolved.values() if account_id is not None}
+        if not account_ids:
+            return {}
+
+        accounts = {
+            account.id: account
+            for account in self.session.query(Account).filter(Account.id.in_(account_ids)).all()
+        }
+        return {
+            number: accounts[account_id]
+            for number, account_id in resolved.items()
+            if account_id in accounts
+        }
+
+    def apply_balance_deltas(self, deltas: Dict[int, Decimal]) -> None:
+        """
+        Apply summed balance changes to many accounts with one UPDATE.
+        Does not commit; the caller owns the transaction.
+        """
+        if not deltas:
+            return
+
+        self.session.execute(
+            update(Account)
+            .where(Account.id.in_(list(deltas)))
+            .values(
+                balance=Account.balance + case(deltas, value=Account.id),
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def apply_payment_balances(self, legs: List[Tuple[Account, Decimal, Optional[str]]]) -> None:
+        """
+        Apply the balance side of a multi-leg payment: (account, signed amount,
+        stripe_key) per leg. Plain accounts change in one UPDATE; striped accounts
+        are credited on their stripe as in credit_account. Does not commit.
+        """
+        deltas: Dict[int, Decimal] = {}
+        for account, amount, stripe_key in legs:
+            if amount < 0:
+                if account.stripe_count and account.balance < -amount:
+                    self.fold_stripes(account)
+                if not self.can_debit(account, -amount):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Account cannot be debited"
+                    )
+            elif not self.can_credit(account):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Account cannot be credited"
+                )
+
+            if amount > 0 and account.stripe_count:
+                self._credit_stripe(account, amount, stripe_key)
+            else:
+                deltas[account.id] = deltas.get(account.id, Decimal("0")) + amount
+
+        self.apply_balance_deltas(deltas)
+
+    def credit_account(
+        self,
+        account: Account,
+        amount: Decimal,
+        stripe_key: Optional[str] = None
+    ) -> Account:
+        """
+        Add money to account balance.
+        Striped accounts are credited on one of their stripes, chosen by
+        hashing stripe_key, so concurrent credits do not contend on one row.
+        """
         try:
             if not self.can_credit(account):
                 raise HTTPException(
@@ -91,9 +226,12 @@ class AccountRepository:
                 )
                 
             with self.session.begin_nested():
-                account.balance += amount
-                account.updated_at = datetime.utcnow()
-                self.session.add(account)
+                if account.stripe_count:
+                    self._credit_stripe(account, amount, stripe_key)
+                else:
+                    account.balance += amount
+                    account.updated_at = datetime.utcnow()
+                    self.session.add(account)
                 
             self.session.commit()
             return account
@@ -108,6 +246,10 @@ class AccountRepository:
     def debit_account(self, account: Account, amount: Decimal) -> Account:
         """Remove money from account balance"""
         try:
+            # Debits always come off the main row; pull in stripe credits first if needed
+            if account.stripe_count and account.balance < amount:
+                self.fold_stripes(account)
+
             if not self.can_debit(account, amount):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -129,6 +271,99 @@ class AccountRepository:
                 detail=f"Database error: {str(e)}"
             )
 
+    def _credit_stripe(self, account: Account, amount: Decimal, stripe_key: Optional[str]) -> None:
+        """Add amount to the stripe selected by stripe_key"""
+        if stripe_key:
+            stripe = zlib.crc32(stripe_key.encode()) % account.stripe_count
+        else:
+            stripe = random.randrange(account.stripe_count)
+
+        result = self.session.execute(
+            update(AccountStripe)
+            .where(
+                and_(
+                    AccountStripe.account_id == account.id,
+                    AccountStripe.stripe == stripe
+                )
+            )
+            .values(
+                balance=AccountStripe.balance + amount,
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            self.session.add(AccountStripe(account_id=account.id, stripe=stripe, balance=amount))
+
+    def enable_stripes(self, account: Account, stripe_count: int) -> Account:
+        """Split an account's credits across stripe_count stripes"""
+        try:
+            # Shrinking must not strand money on stripes that stop receiving credits
+            if account.stripe_count:
+                self.fold_stripes(account)
+
+            existing = {
+                stripe for (stripe,) in self.session.query(AccountStripe.stripe).filter(
+                    AccountStripe.account_id == account.id
+                ).all()
+            }
+            for stripe in range(stripe_count):
+                if stripe not in existing:
+                    self.session.add(AccountStripe(account_id=account.id, stripe=stripe, balance=0))
+
+            account.stripe_count = stripe_count
+            self.session.add(account)
+            self.session.commit()
+            return account
+
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Database error: {str(e)}"
+            )
+
+    def fold_stripes(self, account: Account) -> Decimal:
+        """
+        Move all stripe balances into the main balance; returns the amount folded.
+        Locks the account row, then its stripes, so the fold cannot race a debit
+        or a concurrent fold. Does not commit; the caller owns the transaction.
+        """
+        self.session.query(Account).filter(
+            Account.id == account.id
+        ).with_for_update().populate_existing().one()
+
+        stripes = self.session.query(AccountStripe).filter(
+            AccountStripe.account_id == account.id
+        ).with_for_update().all()
+
+        folded = sum((stripe.balance for stripe in stripes), Decimal("0"))
+        if folded:
+            now = datetime.utcnow()
+            for stripe in stripes:
+                stripe.balance = 0
+                stripe.updated_at = now
+            account.balance += folded
+            account.updated_at = now
+            self.session.add(account)
+            self.session.flush()
+
+        return folded
+
+    def get_balance(self, account: Account) -> Decimal:
+        """Get the account balance including credits still sitting on stripes"""
+        if not account.stripe_count:
+            return account.balance
+
+        striped = self.session.query(
+            func.coalesce(func.sum(AccountStripe.balance), 0)
+        ).filter(AccountStripe.account_id == account.id).scalar()
+        return account.balance + Decimal(str(striped))
+
+    def get_striped_accounts(self) -> List[Account]:
+        """Get all accounts that currently use stripes"""
+        return self.session.query(Account).filter(Account.stripe_count > 0).all()
+
     def can_debit(self, account: Account, amount: Decimal) -> bool:
         """Check if account can be debited"""
         return (
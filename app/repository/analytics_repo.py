@@ -0,0 +1,71 @@
+# app/repository/analytics_repo.py
+from typing import Optional, Tuple
+from datetime import date, datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import STORE_ANALYTICS_CACHE_TTL_SECONDS
+from app.data.models.transaction_models import (
+    Transaction,
+    TransactionRollup,
+    TransactionStatus,
+    TransactionType
+)
+
+# Computed analytics keyed by (account_id, start, end, interval, sales version);
+# a committed sale changes the version, so every process misses its stale entry
+store_analytics_cache = TTLCache(ttl_seconds=STORE_ANALYTICS_CACHE_TTL_SECONDS, max_size=10000)
+
+
+class AnalyticsRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_sales_version(
+        self,
+        account_id: int,
+        start: date,
+        end: date
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        (completed count, last update) of the account's product payment
+        rollups for days in [start, end]. Rollups change in the same
+        transaction as the sale completes, so the pair only moves once it commits.
+        """
+        count, updated_at = self.session.execute(
+            select(func.coalesce(func.sum(TransactionRollup.count), 0), func.max(TransactionRollup.updated_at)).where(
+                TransactionRollup.account_id == account_id,
+                TransactionRollup.type == TransactionType.PRODUCT_PAYMENT,
+                TransactionRollup.day >= start,
+                TransactionRollup.day <= end
+            )
+        ).one()
+        return int(count), updated_at
+
+    def get_sales_columns(
+        self,
+        account_id: int,
+        start: datetime,
+        end: datetime
+    ) -> Tuple[list, list, list]:
+        """
+        Completed sales credited to a store account in [start, end), returned
+        column-wise as (created_at, amount, fee_amount) in one round trip.
+        The store's credit leg of a product payment carries the fee; the
+        buyer's debit leg does not, which is how sales are told apart.
+        """
+        rows = self.session.execute(
+            select(Transaction.created_at, Transaction.amount, Transaction.fee_amount).where(
+                Transaction.account_id == account_id,
+                Transaction.type == TransactionType.PRODUCT_PAYMENT,
+                Transaction.status == TransactionStatus.COMPLETED,
+                Transaction.fee_amount > 0,
+                Transaction.created_at >= start,
+                Transaction.created_at < end
+            )
+        ).all()
+
+        if not rows:
+            return [], [], []
+        created_at, amounts, fees = zip(*rows)
+        return list(created_at), list(amounts), list(fees)
@@ -0,0 +1,195 @@
+# app/repository/archive_repo.py
+import gzip
+import hashlib
+import heapq
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+from app.core.config import TRANSACTION_ARCHIVE_DIR
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _entry_key(bound: Dict) -> Tuple[datetime, int]:
+    """(created_at, id) of a manifest entry's first or last row"""
+    return datetime.fromisoformat(bound["created_at"]), bound["id"]
+
+
+def _decode(row: Dict) -> Dict:
+    """Turn an archived line back into typed transaction fields"""
+    for key in ("created_at", "updated_at", "completed_at"):
+        if row.get(key):
+            row[key] = datetime.fromisoformat(row[key])
+    for key in ("amount", "fee_amount"):
+        if row.get(key) is not None:
+            row[key] = Decimal(row[key])
+    return row
+
+
+class TransactionArchive:
+    """
+    Cold storage for settled transactions: gzipped NDJSON files on local disk
+    plus a manifest.json recording each file's key range, checksum and
+    per-account row counts, so reads only open files that hold the account.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or TRANSACTION_ARCHIVE_DIR
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict:
+        if not os.path.exists(self.manifest_path):
+            return {"version": 1, "files": []}
+        with open(self.manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    def _save_manifest(self, manifest: Dict) -> None:
+        """Write the manifest atomically so a crash never leaves it half written"""
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+    def write_batch(self, rows: List[Dict]) -> Dict:
+        """Write rows (ordered by created_at, id) to a new file and record it as pending deletion"""
+        manifest = self.load_manifest()
+        first, last = rows[0], rows[-1]
+        name = f"{first['created_at']:%Y-%m}/part-{len(manifest['files']) + 1:06d}.ndjson.gz"
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        accounts: Dict[str, int] = {}
+        digest = hashlib.sha256()
+        with gzip.open(path, "wb") as archive_file:
+            for row in rows:
+                line = (json.dumps({key: _encode(value) for key, value in row.items()}) + "\n").encode()
+                digest.update(line)
+                archive_file.write(line)
+                accounts[str(row["account_id"])] = accounts.get(str(row["account_id"]), 0) + 1
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+
+        entry = {
+            "file": name,
+            "rows": len(rows),
+            "sha256": digest.hexdigest(),
+            "first": {"created_at": first["created_at"].isoformat(), "id": first["id"]},
+            "last": {"created_at": last["created_at"].isoformat(), "id": last["id"]},
+            "accounts": accounts,
+            "archived_at": datetime.utcnow().isoformat(),
+            "deleted": False
+        }
+        manifest["files"].append(entry)
+        self._save_manifest(manifest)
+        return entry
+
+    def mark_deleted(self, name: str) -> None:
+        """Record that a file's rows have been removed from the hot table"""
+        manifest = self.load_manifest()
+        for entry in manifest["files"]:
+            if entry["file"] == name:
+                entry["deleted"] = True
+        self._save_manifest(manifest)
+
+    def pending_entries(self) -> List[Dict]:
+        """Files written whose rows may still be in the hot table"""
+        return [entry for entry in self.load_manifest()["files"] if not entry["deleted"]]
+
+    def _account_entries(self, account_id: int) -> List[Dict]:
+        """Files whose rows are gone from the hot table and that hold the account"""
+        key = str(account_id)
+        return [
+            entry for entry in self.load_manifest()["files"]
+            if entry["deleted"] and key in entry["accounts"]
+        ]
+
+    def _iter_entry_rows(
+        self,
+        entry: Dict,
+        account_id: int,
+        type: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Iterator[Dict]:
+        with gzip.open(os.path.join(self.root, entry["file"]), "rt") as archive_file:
+            for line in archive_file:
+                row = json.loads(line)
+                if row["account_id"] != account_id:
+                    continue
+                if type and row["type"] != type:
+                    continue
+                if status and row["status"] != status:
+                    continue
+                yield _decode(row)
+
+    def count_account_rows(
+        self,
+        account_id: int,
+        type: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> int:
+        """Archived rows for one account; read from the manifest unless filtered"""
+        entries = self._account_entries(account_id)
+        if not type and not status:
+            return sum(entry["accounts"][str(account_id)] for entry in entries)
+        return sum(
+            1
+            for entry in entries
+            for _ in self._iter_entry_rows(entry, account_id, type=type, status=status)
+        )
+
+    def iter_account_rows(
+        self,
+        account_id: int,
+        type: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Archived transactions for one account, oldest first. Only files whose
+        rows are gone from the hot table are read, so nothing is returned twice.
+        """
+        for entry in self._account_entries(account_id):
+            yield from self._iter_entry_rows(entry, account_id, type=type, status=status)
+
+    def newest_account_rows(
+        self,
+        account_id: int,
+        limit: int,
+        type: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        The `limit` newest archived transactions for one account, newest first.
+        Files are visited newest key range first, and reading stops once no
+        remaining file can hold a row newer than the ones already kept.
+        """
+        entries = sorted(
+            self._account_entries(account_id),
+            key=lambda entry: _entry_key(entry["last"]),
+            reverse=True
+        )
+
+        newest: List[Tuple[Tuple[datetime, int], Dict]] = []  # min-heap on (created_at, id)
+        for entry in entries:
+            if len(newest) >= limit and _entry_key(entry["last"]) < newest[0][0]:
+                break
+            for row in self._iter_entry_rows(entry, account_id, type=type, status=status):
+                key = (row["created_at"], row["id"])
+                if len(newest) < limit:
+                    heapq.heappush(newest, (key, row))
+                elif key > newest[0][0]:
+                    heapq.heapreplace(newest, (key, row))
+
+        return [row for _, row in sorted(newest, key=lambda item: item[0], reverse=True)]
@@ -0,0 +1,94 @@
+# app/repository/partition_repo.py
+import re
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARENT_TABLE = "transactions"
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class TransactionPartitionRepository:
+    """Monthly range partitions of the transactions table (Postgres only)"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def list_partitions(self) -> List[Dict]:
+        """Attached partitions with their [start, end) bounds; the default partition has none"""
+        rows = self.session.execute(text("""
+            SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            ORDER BY c.relname
+        """), {"parent": PARENT_TABLE}).all()
+
+        partitions = []
+        for row in rows:
+            match = _BOUND_PATTERN.search(row.bound)
+            partitions.append({
+                "name": row.name,
+                "start": datetime.fromisoformat(match.group(1)).date() if match else None,
+                "end": datetime.fromisoformat(match.group(2)).date() if match else None
+            })
+        return partitions
+
+    def partition_name(self, month: date) -> str:
+        return f"{PARENT_TABLE}_{month:%Y_%m}"
+
+    def ensure_partitions(self, months_ahead: int, today: Optional[date] = None) -> List[str]:
+        """Create any missing monthly partitions from this month to months_ahead out"""
+        existing = {partition["start"] for partition in self.list_partitions()}
+        current = month_start(today or date.today())
+
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = self.partition_name(month)
+            # Fails if the default partition already holds rows for this month;
+            # those rows must be moved out before the partition can be added.
+            self.session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            ))
+            created.append(name)
+
+        self.session.commit()
+        return created
+
+    def detach_partitions_before(self, cutoff: date) -> Tuple[List[str], List[str]]:
+        """
+        Detach every monthly partition that ends on or before cutoff and is
+        empty, returning (detached, kept). Rows only leave transactions
+        through the archiver, which writes them to the archive first; a
+        partition still holding rows would take them out of history, so it
+        stays attached until they are archived.
+        """
+        detached, kept = [], []
+        for partition in self.list_partitions():
+            if not partition["end"] or partition["end"] > cutoff:
+                continue
+            name = partition["name"]
+            # Block writes to the partition between the check and the detach
+            self.session.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+            if self.session.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+                kept.append(name)
+                continue
+            self.session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            detached.append(name)
+
+        self.session.commit()
+        return detached, kept
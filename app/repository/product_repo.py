@@ -1,25 +1,228 @@
 # repository.py
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from decimal import Decimal
+from sqlalchemy import case, func, insert, literal_column, tuple_, update
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from app.core.search_index import InvertedIndex, get_product_search_index
 from app.data.models.product_models import Product, ProductImage
+from app.data.models.store_models import Store
+from app.data.schemas.product_schemas import ProductCreate, ProductSort
 from app.repository.base_repo import BaseRepository
 from app.data.schemas.product_schemas import ProductBase
 import uuid
 
+# Columns ProductRead serialises; product reads load nothing else
+PRODUCT_READ_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.code, Product.condition,
+    Product.prices, Product.state, Product.lga, Product.user_id
+)
+PRODUCT_IMAGE_READ_COLUMNS = (
+    ProductImage.id, ProductImage.product_id, ProductImage.url,
+    ProductImage.is_primary, ProductImage.order
+)
+
+# ts_headline options for search snippets
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=20, MinWords=8, MaxFragments=1"
+
 class ProductRepository(BaseRepository[Product, ProductBase]):
     def __init__(self, session: Session):
         super().__init__(model=Product, session=session)
 
+    def _read_options(self) -> Tuple:
+        """Project ProductRead's columns and load every image in one extra query"""
+        return (
+            load_only(*PRODUCT_READ_COLUMNS),
+            selectinload(self.model.images).load_only(*PRODUCT_IMAGE_READ_COLUMNS)
+        )
+
     def get_user_products(self, user_id: id) -> List[Product]:
+        """User's products with images: two queries however many products there are"""
         return self.session.query(self.model)\
+            .options(*self._read_options())\
             .filter(self.model.user_id == user_id)\
+            .order_by(self.model.id)\
             .all()
 
+    def get_product_for_read(self, product_id: id) -> Product:
+        """One product with its images in a single joined query, for create/update responses"""
+        return self.session.query(self.model)\
+            .options(
+                load_only(*PRODUCT_READ_COLUMNS),
+                joinedload(self.model.images).load_only(*PRODUCT_IMAGE_READ_COLUMNS)
+            )\
+            .filter(self.model.id == product_id)\
+            .one()
+
+    def get_user_products_version(self, user_id: id) -> Tuple:
+        """
+        (count, sum of versions, max id) over the user's products: changes
+        whenever a product is created, updated or deleted, without loading
+        any product rows.
+        """
+        return tuple(self.session.query(
+            func.count(self.model.id),
+            func.coalesce(func.sum(self.model.version), 0),
+            func.max(self.model.id)
+        ).filter(self.model.user_id == user_id).one())
+
     def get_product_by_id_and_user(self, product_id: id, user_id: id) -> Optional[Product]:
         return self.session.query(self.model)\
             .filter(self.model.id == product_id, self.model.user_id == user_id)\
             .first()
 
+    def get_catalogue_page(
+        self,
+        sort: ProductSort = ProductSort.NEWEST,
+        after: Optional[Tuple] = None,
+        limit: int = 20,
+        state: Optional[str] = None,
+        lga: Optional[str] = None,
+        condition: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        store_id: Optional[int] = None
+    ) -> List[Product]:
+        """
+        One page of the public catalogue. `after` is the sort key of the last
+        row already seen: (id,) for newest, (prices, id) for price sorts.
+        """
+        query = self.session.query(self.model)
+
+        if state:
+            query = query.filter(self.model.state == state)
+        if lga:
+            query = query.filter(self.model.lga == lga)
+        if condition:
+            query = query.filter(self.model.condition == condition)
+        if min_price is not None:
+            query = query.filter(self.model.prices >= min_price)
+        if max_price is not None:
+            query = query.filter(self.model.prices <= max_price)
+        if store_id is not None:
+            # Products belong to the store's owner
+            query = query.filter(
+                self.model.user_id == self.session.query(Store.user_id)
+                .filter(Store.id == store_id)
+                .scalar_subquery()
+            )
+
+        # Keyset pagination: seek past the last row instead of OFFSET
+        if sort == ProductSort.NEWEST:
+            if after:
+                query = query.filter(self.model.id < after[0])
+            query = query.order_by(self.model.id.desc())
+        elif sort == ProductSort.PRICE_ASC:
+            if after:
+                query = query.filter(tuple_(self.model.prices, self.model.id) > tuple_(*after))
+            query = query.order_by(self.model.prices.asc(), self.model.id.asc())
+        else:
+            if after:
+                query = query.filter(tuple_(self.model.prices, self.model.id) < tuple_(*after))
+            query = query.order_by(self.model.prices.desc(), self.model.id.desc())
+
+        return query.limit(limit).all()
+
+    def get_primary_images(self, product_ids: List[int]) -> Dict[int, ProductImage]:
+        """Primary image per product for a whole page in one query"""
+        if not product_ids:
+            return {}
+
+        images = self.session.query(ProductImage).filter(
+            ProductImage.product_id.in_(product_ids),
+            ProductImage.is_primary.is_(True)
+        ).all()
+        return {image.product_id: image for image in images}
+
+    def _uses_postgres_search(self) -> bool:
+        return self.session.get_bind().dialect.name == 'postgresql'
+
+    def search_products(
+        self,
+        query: str,
+        after: Optional[Tuple[float, int]] = None,
+        limit: int = 20
+    ) -> List[Tuple[Product, float, str]]:
+        """
+        Ranked full-text matches as (product, rank, snippet), best first.
+        `after` is the (rank, id) of the last result already seen.
+        """
+        if not self._uses_postgres_search():
+            return self._search_products_in_process(query, after, limit)
+
+        # search_vector is a generated column kept current by Postgres
+        ts_query = func.websearch_to_tsquery('english', query)
+        search_vector = literal_column('products.search_vector')
+        rank = func.ts_rank_cd(search_vector, ts_query)
+        snippet = func.ts_headline(
+            'english',
+            func.coalesce(func.nullif(self.model.description, ''), self.model.name),
+            ts_query,
+            HEADLINE_OPTIONS
+        )
+
+        results = self.session.query(self.model, rank.label('rank'), snippet.label('snippet'))\
+            .filter(search_vector.op('@@')(ts_query))
+        if after:
+            results = results.filter(tuple_(rank, self.model.id) < tuple_(*after))
+        rows = results.order_by(rank.desc(), self.model.id.desc()).limit(limit).all()
+        return [(row[0], float(row.rank), row.snippet) for row in rows]
+
+    def _search_products_in_process(
+        self,
+        query: str,
+        after: Optional[Tuple[float, int]],
+        limit: int
+    ) -> List[Tuple[Product, float, str]]:
+        """SQLite fallback backed by the in-process inverted index"""
+        search_index = self._search_index()
+        if not search_index.built:
+            rows = self.session.query(
+                self.model.id, self.model.name, self.model.description, self.model.code
+            ).all()
+            search_index.rebuild(row._asdict() for row in rows)
+
+        matches = search_index.search(query)
+        if after:
+            matches = [match for match in matches if (match[1], match[0]) < tuple(after)]
+        matches = matches[:limit]
+
+        products = {
+            product.id: product
+            for product in self.session.query(self.model).filter(
+                self.model.id.in_([product_id for product_id, _, _ in matches])
+            ).all()
+        }
+        return [
+            (products[product_id], rank, snippet)
+            for product_id, rank, snippet in matches
+            if product_id in products
+        ]
+
+    def _search_index(self) -> InvertedIndex:
+        return get_product_search_index(self.session.get_bind())
+
+    def index_product(self, product: Product) -> None:
+        """Keep the in-process search index current; call only once the product is committed"""
+        self.index_documents([{
+            'id': product.id,
+            'name': product.name,
+            'description': product.description,
+            'code': product.code
+        }])
+
+    def index_documents(self, documents: List[Dict]) -> None:
+        """Index committed products ({"id", "name", "description", "code"}); Postgres maintains its own"""
+        if self._uses_postgres_search():
+            return
+        search_index = self._search_index()
+        if search_index.built:
+            for document in documents:
+                search_index.add(document)
+
+    def unindex_product(self, product_id: int) -> None:
+        if not self._uses_postgres_search():
+            self._search_index().remove(product_id)
+
     def create_product_with_images(self, product: Product, images: List[ProductImage]) -> Product:
         """Create product with its images"""
         try:
@@ -33,18 +236,92 @@ class ProductRepository(BaseRepository[Product, ProductBase]):
             self.session.rollback()
             raise e
 
+    def bulk_create_products(self, user_id: int, products: List[ProductCreate]) -> List[int]:
+        """
+        Insert validated products and their images with batched multi-row
+        INSERTs (products RETURNING id, then all images); does not commit,
+        so the caller indexes the products once the rows are committed.
+        """
+        if not products:
+            return []
+
+        rows = []
+        for product in products:
+            row = product.model_dump(exclude={'images'})
+            row['condition'] = product.condition.value
+            row['user_id'] = user_id
+            rows.append(row)
+        # Core inserts: these rows never become ORM objects, so skip the unit of work
+        products_table = self.model.__table__
+        product_ids = list(self.session.scalars(
+            insert(products_table).returning(products_table.c.id, sort_by_parameter_order=True),
+            rows
+        ))
+
+        self.session.execute(insert(ProductImage.__table__), [
+            {
+                'product_id': product_id,
+                'url': str(image.url),
+                'is_primary': image.is_primary,
+                'order': str(image.order)
+            }
+            for product_id, product in zip(product_ids, products)
+            for image in product.images
+        ])
+        return product_ids
+
     def update_product_images(self, product_id: id, new_images: List[ProductImage]) -> None:
-        """Update product images"""
-        try:
-            self.session.begin_nested()
-            # Delete existing images
+        """
+        Bring a product's images in line with new_images, matched by URL:
+        insert new URLs, delete missing ones and fix order/is_primary on the
+        rest with one UPDATE. Unchanged images are not touched. Does not
+        commit, so the caller can bump the product's version in the same
+        transaction.
+        """
+        existing = {
+            image.url: image
+            for image in self.session.query(
+                ProductImage.id, ProductImage.url, ProductImage.is_primary, ProductImage.order
+            ).filter(ProductImage.product_id == product_id).all()
+        }
+        incoming = {str(image.url): image for image in new_images}
+
+        # Delete images whose URL is gone; 'fetch' also drops them from the identity map
+        removed = [image.id for url, image in existing.items() if url not in incoming]
+        if removed:
             self.session.query(ProductImage)\
-                .filter(ProductImage.product_id == product_id)\
-                .delete()
-            # Add new images
-            for image in new_images:
+                .filter(ProductImage.id.in_(removed))\
+                .delete(synchronize_session='fetch')
+
+        # Insert images with new URLs
+        for url, image in incoming.items():
+            if url not in existing:
+                image.url = url
+                image.product_id = product_id
                 self.session.add(image)
-            self.session.commit()
-        except Exception as e:
-            self.session.rollback()
-            raise e
\ No newline at end of file
+
+        # One UPDATE for every kept image whose order or primary flag changed
+        changed = {
+            existing[url].id: image
+            for url, image in incoming.items()
+            if url in existing and (
+                str(existing[url].order) != str(image.order)
+                or bool(existing[url].is_primary) != bool(image.is_primary)
+            )
+        }
+        if changed:
+            self.session.execute(
+                update(ProductImage)
+                .where(ProductImage.id.in_(list(changed)))
+                .values(
+                    order=case(
+                        {image_id: str(image.order) for image_id, image in changed.items()},
+                        value=ProductImage.id
+                    ),
+                    is_primary=case(
+                        {image_id: bool(image.is_primary) for image_id, image in changed.items()},
+                        value=ProductImage.id
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
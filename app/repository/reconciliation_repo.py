@@ -0,0 +1,92 @@
+# app/repository/reconciliation_repo.py
+from typing import Dict, List, Optional
+from datetime import datetime
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import Session
+from app.data.models.account_models import Account, AccountStripe, VirtualBankAccount
+from app.data.models.reconciliation_models import (
+    BalanceMismatch,
+    ReconciliationRun,
+    ReconciliationStatus
+)
+
+class ReconciliationRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_resumable_run(self) -> Optional[ReconciliationRun]:
+        """Get the most recent run that did not finish"""
+        return self.session.query(ReconciliationRun).filter(
+            ReconciliationRun.status == ReconciliationStatus.RUNNING
+        ).order_by(ReconciliationRun.id.desc()).first()
+
+    def start_run(self) -> ReconciliationRun:
+        """Start a new run from the first virtual account"""
+        run = ReconciliationRun(
+            status=ReconciliationStatus.RUNNING,
+            last_virtual_account_id=0,
+            checked_count=0,
+            mismatch_count=0,
+            error_count=0
+        )
+        self.session.add(run)
+        self.session.commit()
+        return run
+
+    def get_virtual_account_chunk(self, after_id: int, limit: int) -> List:
+        """
+        Next chunk of active virtual accounts by keyset (id > after_id), with
+        the ledger balance including any unfolded stripes.
+        """
+        striped = select(
+            func.coalesce(func.sum(AccountStripe.balance), 0)
+        ).where(
+            AccountStripe.account_id == Account.id
+        ).scalar_subquery()
+
+        return self.session.query(
+            VirtualBankAccount.id,
+            VirtualBankAccount.account_number,
+            Account.id.label("account_id"),
+            (Account.balance + striped).label("ledger_balance")
+        ).join(
+            Account, Account.id == VirtualBankAccount.account_id
+        ).filter(
+            and_(
+                VirtualBankAccount.is_active == True,
+                VirtualBankAccount.id > after_id
+            )
+        ).order_by(VirtualBankAccount.id.asc()).limit(limit).all()
+
+    def checkpoint(
+        self,
+        run: ReconciliationRun,
+        last_virtual_account_id: int,
+        checked: int,
+        mismatches: List[Dict],
+        errors: int
+    ) -> None:
+        """Write a chunk's findings and advance the checkpoint in one commit"""
+        try:
+            if mismatches:
+                for row in mismatches:
+                    row['run_id'] = run.id
+                    row['created_at'] = datetime.utcnow()
+                self.session.execute(insert(BalanceMismatch), mismatches)
+
+            run.last_virtual_account_id = last_virtual_account_id
+            run.checked_count += checked
+            run.mismatch_count += len(mismatches) - errors
+            run.error_count += errors
+            self.session.add(run)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+    def finish_run(self, run: ReconciliationRun, status: ReconciliationStatus) -> None:
+        """Mark a run as completed or failed"""
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        self.session.add(run)
+        self.session.commit()
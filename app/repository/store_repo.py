@@ -1,4 +1,5 @@
-from typing import Optional
+from typing import Optional, Tuple
+from datetime import datetime
 from sqlalchemy.orm import Session
 from app.data.models.store_models import Store, StoreSubscription
 from app.repository.base_repo import BaseRepository
@@ -16,6 +17,13 @@ class StoreRepository(BaseRepository[Store, StoreBase]):
             .filter(self.model.user_id == user_id)\
             .first()
 
+    def get_user_store_version(self, user_id: str) -> Optional[Tuple[int, int, Optional[datetime]]]:
+        """(id, version, updated_at) of the user's store, without loading the store"""
+        row = self.session.query(self.model.id, self.model.version, self.model.updated_at)\
+            .filter(self.model.user_id == user_id)\
+            .first()
+        return tuple(row) if row else None
+
     def has_active_store(self, user_id: str) -> bool:
         """Check if user has an active store"""
         return self.session.query(self.model)\
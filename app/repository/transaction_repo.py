@@ -1,10 +1,25 @@
 # app/repository/transaction_repo.py
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import random
+from app.core.config import TRANSACTION_ROLLUP_STRIPES
+from app.core.id_generator import new_reference
 from app.data.models.account_models import Account
-from app.data.models.transaction_models import Transaction, TransactionStatus, TransactionType
+from app.data.models.transaction_models import (
+    PaymentGroup,
+    Transaction,
+    TransactionReference,
+    TransactionRollup,
+    TransactionStatus,
+    TransactionType
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
+
+# Statuses that will not change again; only these are archived
+SETTLED_STATUSES = (TransactionStatus.COMPLETED, TransactionStatus.FAILED)
 
 class TransactionRepository:
     def __init__(self, session: Session):
@@ -22,16 +37,142 @@ class TransactionRepository:
             data['created_at'] = now
             data['updated_at'] = now
             
-            # Create transaction
+            # Claim the reference, then create the transaction
+            self.session.add(TransactionReference(
+                reference=data['reference'],
+                created_at=now
+            ))
             transaction = Transaction(**data)
             self.session.add(transaction)
             self.session.flush()
+
+            if transaction.status == TransactionStatus.COMPLETED:
+                self._record_rollups([data])
             return transaction
         
         except Exception as e:
             self.session.rollback()
             raise e
 
+    def bulk_create_transactions(self, rows: List[Dict]) -> None:
+        """Insert many transactions with a single multi-row INSERT"""
+        if not rows:
+            return
+
+        now = datetime.utcnow()
+        for row in rows:
+            if 'reference' not in row:
+                row['reference'] = self._generate_reference()
+            row.setdefault('fee_amount', 0)
+            row.setdefault('created_at', now)
+            row.setdefault('updated_at', now)
+
+        # Claiming references first makes a duplicate fail before any row is written
+        self.session.execute(insert(TransactionReference).values([
+            {'reference': row['reference'], 'created_at': row['created_at']}
+            for row in rows
+        ]))
+        self.session.execute(insert(Transaction).values(rows))
+        self._record_rollups(
+            row for row in rows if row.get('status') == TransactionStatus.COMPLETED
+        )
+
+    def create_payment_legs(
+        self,
+        reference: str,
+        type: TransactionType,
+        legs: List[Dict]
+    ) -> List[Transaction]:
+        """
+        Insert every leg of a payment under one payment group, using one
+        multi-row INSERT ... RETURNING for the legs. The legs' references are
+        claimed first in one statement; does not commit.
+        """
+        now = datetime.utcnow()
+        group_id = self.session.scalar(
+            insert(PaymentGroup)
+            .values(reference=reference, type=type, created_at=now)
+            .returning(PaymentGroup.id)
+        )
+        for leg in legs:
+            if 'reference' not in leg:
+                leg['reference'] = self._generate_reference()
+            leg.setdefault('fee_amount', 0)
+            leg['group_id'] = group_id
+            leg['created_at'] = now
+            leg['updated_at'] = now
+
+        self.session.execute(insert(TransactionReference).values([
+            {'reference': leg['reference'], 'created_at': now}
+            for leg in legs
+        ]))
+        transactions = list(self.session.scalars(
+            insert(Transaction).returning(Transaction, sort_by_parameter_order=True),
+            legs
+        ))
+        self._record_rollups(
+            leg for leg in legs if leg.get('status') == TransactionStatus.COMPLETED
+        )
+        return transactions
+
+    def create_payment(
+        self,
+        type: TransactionType,
+        legs: List[Dict],
+        suffixes: List[str]
+    ) -> Tuple[str, List[Transaction]]:
+        """
+        Generate a payment reference, give each leg that reference plus its
+        suffix, and insert the legs with create_payment_legs. A reference that
+        collides is retried once with a fresh one. Does not commit.
+        """
+        for attempt in range(2):
+            reference = self._generate_reference()
+            for leg, suffix in zip(legs, suffixes):
+                leg['reference'] = f"{reference}{suffix}"
+            try:
+                with self.session.begin_nested():
+                    return reference, self.create_payment_legs(reference, type, legs)
+            except IntegrityError:
+                if attempt:
+                    raise
+
+    def update_statuses(
+        self,
+        transactions: List[Transaction],
+        status: TransactionStatus
+    ) -> List[Transaction]:
+        """Set the status of several transactions with one UPDATE; does not commit"""
+        if not transactions:
+            return transactions
+
+        now = datetime.utcnow()
+        values = {'status': status, 'updated_at': now}
+        if status == TransactionStatus.COMPLETED:
+            values['completed_at'] = now
+            self._record_rollups(
+                {
+                    'account_id': txn.account_id,
+                    'created_at': txn.created_at,
+                    'type': txn.type,
+                    'amount': txn.amount,
+                    'fee_amount': txn.fee_amount
+                }
+                for txn in transactions
+                if txn.status != TransactionStatus.COMPLETED
+            )
+
+        # created_at lets Postgres prune to the legs' partition
+        self.session.execute(
+            update(Transaction)
+            .where(
+                Transaction.id.in_([txn.id for txn in transactions]),
+                Transaction.created_at.in_({txn.created_at for txn in transactions})
+            )
+            .values(**values)
+        )
+        return transactions
+
     def update_status(
         self, 
         transaction: Transaction,
@@ -40,6 +181,10 @@ class TransactionRepository:
     ) -> Transaction:
         """Update transaction status"""
         try:
+            newly_completed = (
+                status == TransactionStatus.COMPLETED
+                and transaction.status != TransactionStatus.COMPLETED
+            )
             transaction.status = status
             transaction.updated_at = datetime.utcnow()
             
@@ -47,6 +192,14 @@ class TransactionRepository:
                 transaction.completed_at = datetime.utcnow()
             
             self.session.add(transaction)
+            if newly_completed:
+                self._record_rollups([{
+                    'account_id': transaction.account_id,
+                    'created_at': transaction.created_at,
+                    'type': transaction.type,
+                    'amount': transaction.amount,
+                    'fee_amount': transaction.fee_amount
+                }])
             if commit:
                 self.session.commit()
             return transaction
@@ -66,39 +219,93 @@ class TransactionRepository:
             Transaction.reference == reference
         ).first()
 
-    def get_account_transactions(
+    def get_existing_references(self, references: List[str]) -> Set[str]:
+        """Return the subset of references that already have a transaction"""
+        if not references:
+            return set()
+
+        # The registry is one small index, unlike the partitioned transactions table
+        rows = self.session.query(TransactionReference.reference).filter(
+            TransactionReference.reference.in_(references)
+        ).all()
+        return {row.reference for row in rows}
+
+    def _paginate(self, query, skip: int, limit: int, include_total: bool) -> Dict:
+        """
+        Fetch one page ordered newest first. With include_total the total
+        comes back on every row via count(*) OVER (), in the same round trip.
+        """
+        query = query.order_by(
+            Transaction.created_at.desc(),
+            Transaction.id.desc()
+        )
+
+        total = None
+        if include_total:
+            rows = query.add_columns(
+                func.count().over().label("total")
+            ).offset(skip).limit(limit).all()
+            transactions = [row[0] for row in rows]
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Page past the end: no row to carry the window total
+                total = query.order_by(None).count()
+            else:
+                total = 0
+        else:
+            transactions = query.offset(skip).limit(limit).all()
+
+        return {
+            "data": transactions,
+            "total": total,
+            "page": (skip // limit) + 1,
+            "size": limit
+        }
+
+    def _filtered_query(
         self,
-        account_id: int,
-        skip: int = 0,
-        limit: int = 50,
+        user_id: Optional[int] = None,
+        account_id: Optional[int] = None,
         type: Optional[TransactionType] = None,
         status: Optional[TransactionStatus] = None
-    ) -> Tuple[List[Transaction], int]:
-        """Get transactions for an account with filters"""
-        # Build base query
-        query = self.session.query(Transaction).filter(
-            Transaction.account_id == account_id
-        )
+    ):
+        query = self.session.query(Transaction)
 
-        # Apply filters if provided
+        # Join accounts so ownership is checked in the same query
         filters = []
+        if user_id is not None:
+            query = query.join(Account, Account.id == Transaction.account_id)
+            filters.append(Account.user_id == user_id)
+        if account_id is not None:
+            filters.append(Transaction.account_id == account_id)
         if type:
             filters.append(Transaction.type == type)
         if status:
             filters.append(Transaction.status == status)
-        
+
         if filters:
             query = query.filter(and_(*filters))
+        return query
 
-        # Get total count
-        total = query.count()
-
-        # Get paginated results
-        transactions = query.order_by(
-            Transaction.created_at.desc()
-        ).offset(skip).limit(limit).all()
-
-        return transactions, total
+    def get_account_transactions(
+        self,
+        account_id: int,
+        user_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 50,
+        type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        include_total: bool = True
+    ) -> Dict:
+        """Get transactions for an account with filters, optionally scoped to its owner"""
+        query = self._filtered_query(
+            user_id=user_id,
+            account_id=account_id,
+            type=type,
+            status=status
+        )
+        return self._paginate(query, skip, limit, include_total)
 
     def get_user_transactions(
         self,
@@ -106,66 +313,141 @@ class TransactionRepository:
         skip: int = 0,
         limit: int = 50,
         type: Optional[TransactionType] = None,
-        status: Optional[TransactionStatus] = None
+        status: Optional[TransactionStatus] = None,
+        include_total: bool = True
     ) -> Dict:
-        """Get all transactions linked to user's accounts"""
-        # Get all user's account IDs
-        account_ids = self.session.query(Account.id).filter(
+        """Get all transactions linked to user's accounts in a single query"""
+        query = self._filtered_query(user_id=user_id, type=type, status=status)
+        return self._paginate(query, skip, limit, include_total)
+
+    def get_archivable_batch(
+        self,
+        before: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 5000
+    ) -> List[Dict]:
+        """Next batch of settled transactions created before `before`, keyset-ordered by (created_at, id)"""
+        query = select(*Transaction.__table__.columns).where(
+            Transaction.status.in_(SETTLED_STATUSES),
+            Transaction.created_at < before
+        )
+        if after:
+            query = query.where(tuple_(Transaction.created_at, Transaction.id) > tuple_(*after))
+        query = query.order_by(Transaction.created_at.asc(), Transaction.id.asc()).limit(limit)
+        return [dict(row) for row in self.session.execute(query).mappings()]
+
+    def delete_archived(
+        self,
+        before: datetime,
+        first: Tuple[datetime, int],
+        last: Tuple[datetime, int]
+    ) -> int:
+        """Delete the settled rows of one archived batch; does not commit"""
+        result = self.session.execute(
+            delete(Transaction).where(
+                Transaction.status.in_(SETTLED_STATUSES),
+                Transaction.created_at < before,
+                Transaction.created_at >= first[0],
+                Transaction.created_at <= last[0],
+                tuple_(Transaction.created_at, Transaction.id) >= tuple_(*first),
+                tuple_(Transaction.created_at, Transaction.id) <= tuple_(*last)
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def stream_user_transactions(
+        self,
+        user_id: int,
+        type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Tuple]:
+        """
+        Stream every matching transaction row for a user's accounts, oldest first.
+        Uses a server-side cursor so only batch_size rows are held at a time.
+        """
+        query = self.session.query(
+            Transaction.id,
+            Transaction.reference,
+            Transaction.type,
+            Transaction.status,
+            Transaction.amount,
+            Transaction.fee_amount,
+            Transaction.description,
+            Transaction.account_id,
+            Transaction.created_at,
+            Transaction.completed_at
+        ).join(
+            Account, Account.id == Transaction.account_id
+        ).filter(
             Account.user_id == user_id
-        ).all()
-        account_ids = [acc.id for acc in account_ids]
-        
-        # Build base query
-        query = self.session.query(Transaction).filter(
-            Transaction.account_id.in_(account_ids)
         )
-        
-        # Apply filters if provided
-        filters = []
+
         if type:
-            filters.append(Transaction.type == type)
+            query = query.filter(Transaction.type == type)
         if status:
-            filters.append(Transaction.status == status)
-        
-        if filters:
-            query = query.filter(and_(*filters))
-            
-        # Get total count
-        total = query.count()
-        
-        # Get paginated results with ordering
-        transactions = query.order_by(
-            Transaction.created_at.desc()
-        ).offset(skip).limit(limit).all()
-        
-        return {
-            "data": transactions,
-            "total": total,
-            "page": (skip // limit) + 1,
-            "size": limit
-        }
+            query = query.filter(Transaction.status == status)
+        if start_date:
+            query = query.filter(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.filter(Transaction.created_at <= end_date)
+
+        return iter(
+            query.order_by(Transaction.created_at.asc(), Transaction.id.asc())
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
 
     def _generate_reference(self) -> str:
-        """Generate unique transaction reference"""
-        import uuid
-        from datetime import datetime
-        
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        random_str = uuid.uuid4().hex[:8].upper()
-        reference = f"TXN-{timestamp}-{random_str}"
-        
-        # Ensure uniqueness
-        while self.get_by_reference(reference):
-            random_str = uuid.uuid4().hex[:8].upper()
-            reference = f"TXN-{timestamp}-{random_str}"
-        
-        return reference
+        """
+        Generate a unique, time-ordered transaction reference.
+        No lookup is needed; the unique constraint on reference is the backstop.
+        """
+        return new_reference("TXN")
 
     def get_related_transactions(self, reference: str) -> List[Transaction]:
-        """Get all transactions with the same reference (e.g., all parts of a payment)"""
+        """Get all legs of a payment from its group reference, in one indexed query"""
+        group_id = select(PaymentGroup.id).where(
+            PaymentGroup.reference == reference
+        ).scalar_subquery()
         return self.session.query(Transaction).filter(
-            Transaction.reference == reference
-        ).order_by(Transaction.created_at.asc()).all()
+            or_(
+                Transaction.group_id == group_id,
+                Transaction.reference == reference
+            )
+        ).order_by(Transaction.created_at.asc(), Transaction.id.asc()).all()
+
+    def get_group_legs(self, group_id: int) -> List[Transaction]:
+        """Legs of one payment group in the order they were written"""
+        return self.session.query(Transaction).filter(
+            Transaction.group_id == group_id
+        ).order_by(Transaction.id.asc()).all()
+
+    def get_pending_payment_groups(
+        self,
+        type: TransactionType,
+        created_before: datetime,
+        after_id: int,
+        limit: int
+    ) -> List[int]:
+        """Ids above after_id of payment groups of this type whose legs are still PENDING"""
+        return list(self.session.scalars(
+            select(Transaction.group_id)
+            .join(PaymentGroup, PaymentGroup.id == Transaction.group_id)
+            .where(
+                and_(
+                    Transaction.status == TransactionStatus.PENDING,
+                    Transaction.created_at < created_before,
+                    Transaction.group_id > after_id,
+                    PaymentGroup.type == type
+                )
+            )
+            .distinct()
+            .order_by(Transaction.group_id.asc())
+            .limit(limit)
+        ))
 
     def get_transactions_by_type_and_status(
         self,
@@ -191,16 +473,88 @@ class TransactionRepository:
 
         return query.order_by(Transaction.created_at.desc()).all()
 
-    def get_transaction_summary(
+    def _record_rollups(self, transactions: Iterable[Dict]) -> None:
+        """
+        Add completed transactions to their (account, day, type) rollup rows,
+        on one randomly chosen stripe so concurrent payments to a busy account
+        (the platform's fees) rarely wait on the same row. Runs as one upsert
+        in the caller's transaction, rows in key order; does not commit.
+        """
+        totals: Dict[Tuple[int, date, str], List] = {}
+        for txn in transactions:
+            type_ = getattr(txn['type'], 'value', txn['type'])
+            created_at = txn.get('created_at') or datetime.utcnow()
+            key = (txn['account_id'], created_at.date(), type_)
+            entry = totals.setdefault(key, [0, Decimal('0'), Decimal('0')])
+            entry[0] += 1
+            entry[1] += Decimal(str(txn['amount']))
+            entry[2] += Decimal(str(txn.get('fee_amount') or 0))
+
+        if not totals:
+            return
+
+        now = datetime.utcnow()
+        stripe = random.randrange(TRANSACTION_ROLLUP_STRIPES)
+        rows = [
+            {
+                'account_id': account_id,
+                'day': day,
+                'type': type_,
+                'stripe': stripe,
+                'count': count,
+                'total_amount': total_amount,
+                'total_fees': total_fees,
+                'updated_at': now
+            }
+            for (account_id, day, type_), (count, total_amount, total_fees) in sorted(totals.items())
+        ]
+
+        dialect = self.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            self._record_rollups_portable(rows)
+            return
+
+        statement = upsert(TransactionRollup).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=['account_id', 'day', 'type', 'stripe'],
+            set_={
+                'count': TransactionRollup.count + statement.excluded.count,
+                'total_amount': TransactionRollup.total_amount + statement.excluded.total_amount,
+                'total_fees': TransactionRollup.total_fees + statement.excluded.total_fees,
+                'updated_at': statement.excluded.updated_at
+            }
+        )
+        self.session.execute(statement)
+
+    def _record_rollups_portable(self, rows: List[Dict]) -> None:
+        """Row-by-row rollup update for databases without ON CONFLICT"""
+        for row in rows:
+            rollup = self.session.query(TransactionRollup).filter(
+                TransactionRollup.account_id == row['account_id'],
+                TransactionRollup.day == row['day'],
+                TransactionRollup.type == row['type'],
+                TransactionRollup.stripe == row['stripe']
+            ).with_for_update().first()
+            if rollup:
+                rollup.count += row['count']
+                rollup.total_amount += row['total_amount']
+                rollup.total_fees += row['total_fees']
+            else:
+                self.session.add(TransactionRollup(**row))
+        self.session.flush()
+
+    def _raw_summary(
         self,
         account_id: int,
-        start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> Dict:
-        """Get transaction summary for an account"""
-        from sqlalchemy import func
-        
-        # Base query
+        start: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Tuple]:
+        """Per-type totals straight from transactions (start inclusive, before exclusive, until inclusive)"""
         query = self.session.query(
             Transaction.type,
             func.count(Transaction.id).label('count'),
@@ -210,23 +564,74 @@ class TransactionRepository:
             Transaction.account_id == account_id,
             Transaction.status == TransactionStatus.COMPLETED
         )
+        if start:
+            query = query.filter(Transaction.created_at >= start)
+        if before:
+            query = query.filter(Transaction.created_at < before)
+        if until:
+            query = query.filter(Transaction.created_at <= until)
+        return query.group_by(Transaction.type).all()
 
-        # Apply date filters if provided
+    def get_transaction_summary(
+        self,
+        account_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Get transaction summary for an account.
+        Whole days in the range are read from rollups; only the partial
+        days at either edge of the range touch raw transactions.
+        """
+        # Step 1: Work out which whole days lie inside the range
+        first_day = None
         if start_date:
-            query = query.filter(Transaction.created_at >= start_date)
-        if end_date:
-            query = query.filter(Transaction.created_at <= end_date)
+            first_day = start_date.date()
+            if start_date != datetime.combine(first_day, time.min):
+                first_day += timedelta(days=1)
+        # end_date is inclusive, so its own day is only whole at the next midnight
+        last_day = end_date.date() - timedelta(days=1) if end_date else None
+
+        if first_day and last_day and first_day > last_day:
+            results = self._raw_summary(account_id, start=start_date, until=end_date)
+        else:
+            # Step 2: Whole days from rollups
+            query = self.session.query(
+                TransactionRollup.type,
+                func.sum(TransactionRollup.count),
+                func.sum(TransactionRollup.total_amount),
+                func.sum(TransactionRollup.total_fees)
+            ).filter(TransactionRollup.account_id == account_id)
+            if first_day:
+                query = query.filter(TransactionRollup.day >= first_day)
+            if last_day:
+                query = query.filter(TransactionRollup.day <= last_day)
+            results = query.group_by(TransactionRollup.type).all()
 
-        # Group by transaction type
-        results = query.group_by(Transaction.type).all()
+            # Step 3: Partial edge days from raw rows
+            if start_date and start_date < datetime.combine(first_day, time.min):
+                results += self._raw_summary(
+                    account_id,
+                    start=start_date,
+                    before=datetime.combine(first_day, time.min)
+                )
+            if end_date:
+                results += self._raw_summary(
+                    account_id,
+                    start=datetime.combine(last_day + timedelta(days=1), time.min),
+                    until=end_date
+                )
 
         # Format results
         summary = {}
         for type_, count, total_amount, total_fees in results:
-            summary[type_] = {
-                'count': count,
-                'total_amount': float(total_amount or 0),
-                'total_fees': float(total_fees or 0)
-            }
+            entry = summary.setdefault(type_, {
+                'count': 0,
+                'total_amount': 0.0,
+                'total_fees': 0.0
+            })
+            entry['count'] += int(count or 0)
+            entry['total_amount'] += float(total_amount or 0)
+            entry['total_fees'] += float(total_fees or 0)
 
-        return summary
\ No newline at end of file
+        return summary
@@ -59,7 +59,7 @@ class AccountRouter:
             current_user: ProtectedUser = Depends(get_current_user)
         ):
             """Get the current user's account details"""
-            return AccountService(session=db).get_user_account(current_user.id)
+            return AccountService(session=db).get_account_details(current_user.id)
 
         @self.router.get(
             "/me/virtual",
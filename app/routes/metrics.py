@@ -0,0 +1,62 @@
+# app/routes/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.resilience import CircuitBreaker, circuit_breakers
+from app.service.budpay_service import hedge_stats, retry_budget
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+CIRCUIT_STATE_VALUES = {
+    CircuitBreaker.CLOSED: 0,
+    CircuitBreaker.HALF_OPEN: 1,
+    CircuitBreaker.OPEN: 2
+}
+
+@router.get(
+    "/budpay",
+    response_class=PlainTextResponse,
+    summary="Budpay Client Metrics",
+    description="Circuit breaker, retry budget and hedging metrics in Prometheus text format"
+)
+async def budpay_metrics():
+    lines = [
+        "# HELP budpay_circuit_state Circuit state (0=closed, 1=half_open, 2=open)",
+        "# TYPE budpay_circuit_state gauge"
+    ]
+    breakers = circuit_breakers()
+    for name, breaker in breakers.items():
+        lines.append(f'budpay_circuit_state{{endpoint="{name}"}} {CIRCUIT_STATE_VALUES[breaker.state]}')
+
+    counters = [
+        ("budpay_circuit_successes_total", "Calls that succeeded", "successes"),
+        ("budpay_circuit_failures_total", "Calls that failed or returned 429/5xx", "failures"),
+        ("budpay_circuit_rejections_total", "Calls rejected while the circuit was open", "rejections"),
+        ("budpay_circuit_opened_total", "Times the circuit opened", "times_opened")
+    ]
+    for metric, help_text, attribute in counters:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, breaker in breakers.items():
+            lines.append(f'{metric}{{endpoint="{name}"}} {getattr(breaker, attribute)}')
+
+    lines += [
+        "# HELP budpay_retry_budget_tokens Retries currently available",
+        "# TYPE budpay_retry_budget_tokens gauge",
+        f"budpay_retry_budget_tokens {retry_budget.tokens:.2f}",
+        "# HELP budpay_retries_total Retries sent",
+        "# TYPE budpay_retries_total counter",
+        f"budpay_retries_total {retry_budget.retries}",
+        "# HELP budpay_retry_budget_exhausted_total Retries skipped because the budget was empty",
+        "# TYPE budpay_retry_budget_exhausted_total counter",
+        f"budpay_retry_budget_exhausted_total {retry_budget.exhausted}",
+        "# HELP budpay_hedged_requests_total Balance reads that sent a hedge request",
+        "# TYPE budpay_hedged_requests_total counter",
+        f"budpay_hedged_requests_total {hedge_stats['hedged']}",
+        "# HELP budpay_hedge_wins_total Hedge requests that answered first",
+        "# TYPE budpay_hedge_wins_total counter",
+        f"budpay_hedge_wins_total {hedge_stats['hedge_wins']}"
+    ]
+    return "\n".join(lines) + "\n"
+
+# Initialize router
+metrics_router = router
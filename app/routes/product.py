@@ -1,10 +1,18 @@
 # router.py
-from fastapi import Depends, status
-from typing import List
+from fastapi import Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from decimal import Decimal
 from app.data.schemas.auth_schemas import ProtectedUser
 from app.data.schemas.product_schemas import (
+    ProductCatalogueResponse,
+    ProductCondition,
     ProductCreate,
+    ProductImportFormat,
+    ProductImportResult,
     ProductRead,
+    ProductSearchResponse,
+    ProductSort,
     ProductUpdate
 )
 from app.data.utils.database import get_db
@@ -12,6 +20,7 @@ from app.routes.base import BaseRouter
 from app.service.product_service import ProductService
 from sqlalchemy.orm import Session
 from app.core.auth_dependency import get_current_user
+from app.core.http_cache import is_not_modified, not_modified, set_cache_headers
 
 class ProductRouter(BaseRouter):
     def __init__(self):
@@ -21,7 +30,12 @@ class ProductRouter(BaseRouter):
             tags=["products"],
             protected=True
         )
+
+    def _register_routes(self):
+        # Product routes first, so GET / lists the user's products rather than
+        # being matched by the generic get_item route
         self._register_product_routes()
+        super()._register_routes()
 
     def _register_product_routes(self):
         @self.router.post(
@@ -41,6 +55,40 @@ class ProductRouter(BaseRouter):
                 product_data=product
             )
 
+        @self.router.post(
+            "/import",
+            response_model=ProductImportResult,
+            summary="Import Products",
+            description="Bulk-create products from a CSV or NDJSON file; invalid rows are skipped and reported"
+        )
+        async def import_products(
+            file: UploadFile = File(...),
+            format: Optional[ProductImportFormat] = Query(
+                None, description="Defaults to the file extension (.csv, .ndjson or .jsonl)"
+            ),
+            db: Session = Depends(get_db),
+            current_user: ProtectedUser = Depends(get_current_user),
+        ):
+            if format is None:
+                extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+                if extension == "csv":
+                    format = ProductImportFormat.CSV
+                elif extension in ("ndjson", "jsonl"):
+                    format = ProductImportFormat.NDJSON
+                else:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Unknown file type; pass format=csv or format=ndjson"
+                    )
+
+            # Parsing and inserting are blocking, so keep them off the event loop
+            return await run_in_threadpool(
+                self.service_class(session=db).import_products,
+                user_id=current_user.id,
+                stream=file.file,
+                format=format
+            )
+
         @self.router.get(
             "/",
             response_model=List[ProductRead],
@@ -48,13 +96,71 @@ class ProductRouter(BaseRouter):
             description="Get all products for the authenticated user"
         )
         async def get_user_products(
+            request: Request,
+            response: Response,
             db: Session = Depends(get_db),
             current_user: ProtectedUser = Depends(get_current_user),
         ):
-            return self.service_class(session=db).get_user_products(
+            service = self.service_class(session=db)
+
+            # Answer revalidations from one aggregate query, before loading any products
+            etag = service.get_user_products_etag(current_user.id)
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+            set_cache_headers(response, etag)
+
+            return service.get_user_products(
                 user_id=current_user.id
             )
             
+        @self.router.get(
+            "/catalogue",
+            response_model=ProductCatalogueResponse,
+            summary="Browse Catalogue",
+            description="Public product listing with filters, sorting and cursor pagination"
+        )
+        async def get_catalogue(
+            state: Optional[str] = None,
+            lga: Optional[str] = None,
+            condition: Optional[ProductCondition] = None,
+            min_price: Optional[Decimal] = Query(None, ge=0),
+            max_price: Optional[Decimal] = Query(None, ge=0),
+            store_id: Optional[int] = None,
+            sort: ProductSort = ProductSort.NEWEST,
+            cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+            size: int = Query(20, ge=1, le=100),
+            db: Session = Depends(get_db),
+        ):
+            return self.service_class(session=db).get_catalogue(
+                sort=sort,
+                cursor=cursor,
+                size=size,
+                state=state,
+                lga=lga,
+                condition=condition,
+                min_price=min_price,
+                max_price=max_price,
+                store_id=store_id
+            )
+            
+        @self.router.get(
+            "/search",
+            response_model=ProductSearchResponse,
+            summary="Search Products",
+            description="Public full-text search over product name, code and description, best matches first"
+        )
+        async def search_products(
+            q: str = Query(..., min_length=1, max_length=200),
+            cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+            size: int = Query(20, ge=1, le=100),
+            db: Session = Depends(get_db),
+        ):
+            return self.service_class(session=db).search_products(
+                query=q,
+                cursor=cursor,
+                size=size
+            )
+            
         @self.router.put(
             "/{product_id}",
             response_model=ProductRead,
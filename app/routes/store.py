@@ -1,21 +1,28 @@
 # app/routes/store_routes.py
-from fastapi import Depends, HTTPException, status, Body
-from typing import List, Dict
+from fastapi import Depends, HTTPException, Request, Response, status, Body
+from typing import List, Dict, Optional
+from datetime import date
 from sqlalchemy.orm import Session
 from app.data.schemas.auth_schemas import ProtectedUser
 from app.data.schemas.store_schemas import (
+    AnalyticsInterval,
+    StoreAnalyticsRead,
     StoreCreate,
     StoreRead,
     StoreUpdate,
     SubscriptionRead
 )
 from app.core.constants import SUBSCRIPTION_PLANS, DurationType
+from app.core.http_cache import is_not_modified, make_etag, not_modified, set_cache_headers
 from app.data.utils.database import get_db
 from app.service.store_service import StoreService
 from app.core.auth_dependency import get_current_user
 from app.routes.base import BaseRouter
 from app.data.models.store_models import Store
 
+# Plans only change with a deploy, so their ETag is fixed per process
+SUBSCRIPTIONS_ETAG = make_etag("subscriptions", sorted(SUBSCRIPTION_PLANS.items()))
+
 
 class StoreRouter(BaseRouter[Store, StoreCreate, StoreUpdate, StoreService]):
     def __init__(self):
@@ -34,7 +41,10 @@ class StoreRouter(BaseRouter[Store, StoreCreate, StoreUpdate, StoreService]):
             summary="Get Available Subscriptions",
             description="Get available store subscription plans"
         )
-        async def get_subscriptions():
+        async def get_subscriptions(request: Request, response: Response):
+            if is_not_modified(request, SUBSCRIPTIONS_ETAG):
+                return not_modified(SUBSCRIPTIONS_ETAG, cache_control="public, no-cache")
+            set_cache_headers(response, SUBSCRIPTIONS_ETAG, cache_control="public, no-cache")
             return [
                 SubscriptionRead(**plan)
                 for plan in SUBSCRIPTION_PLANS.values()
@@ -102,11 +112,49 @@ class StoreRouter(BaseRouter[Store, StoreCreate, StoreUpdate, StoreService]):
             description="Get authenticated user's store"
         )
         async def get_user_store(
+            request: Request,
+            response: Response,
+            db: Session = Depends(get_db),
+            current_user: ProtectedUser = Depends(get_current_user)
+        ):
+            try:
+                service = self.service_class(session=db)
+
+                # Answer revalidations from the version columns alone
+                etag, last_modified = service.get_user_store_etag(current_user.id)
+                if is_not_modified(request, etag, last_modified):
+                    return not_modified(etag, last_modified)
+                set_cache_headers(response, etag, last_modified)
+
+                return service.get_user_store(current_user.id)
+            except HTTPException as e:
+                raise e
+            except Exception as error:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=str(error)
+                )
+
+        @self.router.get(
+            "/my-store/analytics",
+            response_model=StoreAnalyticsRead,
+            summary="Get Store Analytics",
+            description="Revenue, fees, order counts and order size percentiles for the authenticated user's store"
+        )
+        async def get_store_analytics(
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            interval: AnalyticsInterval = AnalyticsInterval.DAY,
             db: Session = Depends(get_db),
             current_user: ProtectedUser = Depends(get_current_user)
         ):
             try:
-                return self.service_class(session=db).get_user_store(current_user.id)
+                return self.service_class(session=db).get_store_analytics(
+                    user_id=current_user.id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    interval=interval
+                )
             except HTTPException as e:
                 raise e
             except Exception as error:
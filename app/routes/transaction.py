@@ -1,7 +1,9 @@
 # app/routes/transaction_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
+from datetime import datetime
 from decimal import Decimal
 from app.core.auth_dependency import get_current_user
 from app.data.schemas.auth_schemas import ProtectedUser
@@ -10,7 +12,8 @@ from app.service.transaction_service import TransactionService
 from app.data.schemas.transaction_schemas import (
     TransactionRead,
     TransactionListResponse,
-    TransactionResponse
+    TransactionResponse,
+    StatementFormat
 )
 from app.data.models.transaction_models import TransactionType, TransactionStatus
 
@@ -27,6 +30,7 @@ async def list_transactions(
     limit: int = Query(50, ge=1, le=100),
     transaction_type: Optional[TransactionType] = None,
     status: Optional[TransactionStatus] = None,
+    include_total: bool = Query(True, description="Also count every matching transaction"),
     db: Session = Depends(get_db),
     current_user: ProtectedUser = Depends(get_current_user)
 ):
@@ -37,7 +41,8 @@ async def list_transactions(
             skip=skip,
             limit=limit,
             type=transaction_type,
-            status=status
+            status=status,
+            include_total=include_total
         )
         return TransactionListResponse(
             message="Transactions retrieved successfully",
@@ -52,6 +57,37 @@ async def list_transactions(
             detail=str(error)
         )
 
+@router.get(
+    "/export",
+    summary="Export Statement",
+    description="Stream every matching transaction for authenticated user as CSV or NDJSON"
+)
+async def export_transactions(
+    format: StatementFormat = StatementFormat.CSV,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    transaction_type: Optional[TransactionType] = None,
+    status: Optional[TransactionStatus] = None,
+    db: Session = Depends(get_db),
+    current_user: ProtectedUser = Depends(get_current_user)
+):
+    transaction_service = TransactionService(session=db)
+    rows = transaction_service.export_statement(
+        user_id=current_user.id,
+        format=format,
+        type=transaction_type,
+        status=status,
+        start_date=start_date,
+        end_date=end_date
+    )
+    media_type = "text/csv" if format == StatementFormat.CSV else "application/x-ndjson"
+    filename = f"statement.{format.value}"
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get(
     "/{transaction_id}",
     response_model=TransactionRead,
@@ -87,6 +123,8 @@ async def get_account_transactions(
     limit: int = Query(50, ge=1, le=100),
     transaction_type: Optional[TransactionType] = None,
     status: Optional[TransactionStatus] = None,
+    include_total: bool = Query(True, description="Also count every matching transaction"),
+    include_archived: bool = Query(False, description="Also include transactions moved to cold storage"),
     db: Session = Depends(get_db),
     current_user: ProtectedUser = Depends(get_current_user)
 ):
@@ -98,7 +136,9 @@ async def get_account_transactions(
             skip=skip,
             limit=limit,
             type=transaction_type,
-            status=status
+            status=status,
+            include_total=include_total,
+            include_archived=include_archived
         )
         return TransactionListResponse(
             message="Transactions retrieved successfully",
@@ -135,7 +175,10 @@ async def pay_for_product(
             amount=amount
         )
         return TransactionResponse(
-            message="Product payment processed successfully",
+            message=(
+                "Product payment processed successfully"
+                if result["status"] == "success" else result["message"]
+            ),
             data=result["data"]
         )
     except Exception as error:
@@ -164,7 +207,10 @@ async def pay_store_subscription(
             amount=amount
         )
         return TransactionResponse(
-            message="Subscription payment processed successfully",
+            message=(
+                "Subscription payment processed successfully"
+                if result["status"] == "success" else result["message"]
+            ),
             data=result["data"]
         )
     except Exception as error:
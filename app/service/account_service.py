@@ -6,9 +6,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.repository.account_repo import AccountRepository
 from app.repository.transaction_repo import TransactionRepository
-from app.service.budpay_service import BudpayService
-from app.data.models.transaction_models import TransactionType, TransactionStatus
+from app.service.budpay_service import BudpayService, invalidate_cached_balance
+from app.service.webhook_batcher import credit_batcher
 from app.data.models.account_models import Account, VirtualBankAccount, AccountType
+from app.data.schemas.account_schemas import AccountRead
 
 
 class AccountService:
@@ -124,6 +125,13 @@ class AccountService:
                 detail=str(e)
             )
 
+    def get_account_details(self, user_id: int) -> AccountRead:
+        """Get a user's account with credits still on stripes counted in the balance"""
+        account = self.get_user_account(user_id)
+        details = AccountRead.model_validate(account)
+        details.balance = self.account_repo.get_balance(account)
+        return details
+
     def get_virtual_account(self, user_id: int) -> VirtualBankAccount:
         """Get a user's virtual account details"""
         try:
@@ -194,47 +202,17 @@ class AccountService:
             # Validate webhook data
             account_number, amount, reference = self._validate_webhook_data(body)
 
-            # Get associated account
-            account = self.account_repo.get_by_virtual_account(account_number)
-            if not account:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Account not found"
-                )
-
-            # Check for duplicate transaction
-            existing_txn = self.transaction_repo.get_by_reference(reference)
-            if existing_txn:
-                return {
-                    "status": "success",
-                    "message": "Transaction already processed",
-                    "data": existing_txn
-                }
-
-            # Process transaction
-            with self.session.begin_nested():
-                # Create transaction record
-                transaction = self.transaction_repo.create_transaction({
-                    "type": TransactionType.CREDIT,
-                    "amount": amount,
-                    "description": "Virtual Account Credit",
-                    "status": TransactionStatus.COMPLETED,
-                    "reference": reference,
-                    "account_id": account.id,
-                    "completed_at": datetime.utcnow()
-                })
-
-                # Update account balance
-                self.account_repo.credit_account(account, amount)
-
-            # Commit transaction
-            self.session.commit()
+            # Money arrived at the provider; the cached balance is now stale
+            invalidate_cached_balance(account_number)
 
-            return {
-                "status": "success",
-                "message": "Payment processed successfully",
-                "data": transaction
-            }
+            # Queue the credit; it is applied with the rest of its batch
+            # (one INSERT and one balance UPDATE per batch) and we only
+            # acknowledge once that batch is committed.
+            return await credit_batcher.submit(
+                account_number=account_number,
+                amount=amount,
+                reference=reference
+            )
 
         except HTTPException as e:
             raise e
@@ -1,18 +1,209 @@
 # app/service/budpay_service.py
-from typing import Dict
+from typing import Dict, List, Optional
+import asyncio
 import httpx
 from fastapi import HTTPException, status
-from app.core.config import BUDPAY_SECRET_KEY
+from app.core.config import (
+    BUDPAY_SECRET_KEY,
+    BUDPAY_BASE_URL,
+    BUDPAY_CONNECT_TIMEOUT,
+    BUDPAY_READ_TIMEOUT,
+    BUDPAY_POOL_TIMEOUT,
+    BUDPAY_MAX_CONNECTIONS,
+    BUDPAY_MAX_KEEPALIVE_CONNECTIONS,
+    BUDPAY_KEEPALIVE_EXPIRY,
+    BUDPAY_HTTP2,
+    BUDPAY_BREAKER_FAILURE_THRESHOLD,
+    BUDPAY_BREAKER_RESET_SECONDS,
+    BUDPAY_MAX_RETRIES,
+    BUDPAY_RETRY_BACKOFF_MS,
+    BUDPAY_RETRY_BACKOFF_CAP_MS,
+    BUDPAY_RETRY_BUDGET_RATIO,
+    BUDPAY_HEDGE_DELAY_MS,
+    BALANCE_CACHE_TTL_SECONDS,
+    BUDPAY_BULK_TRANSFER_ENABLED
+)
+from app.core.cache import TTLCache
+from app.core.resilience import RetryBudget, backoff_delay, get_circuit_breaker
+from app.data.schemas.transfer_schemas import TransferLeg, TransferLegResult, TransferLegStatus
 from decimal import Decimal
 
+# Errors after which a transfer may or may not have been applied by Budpay
+UNCONFIRMED_TRANSFER_ERRORS = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.RemoteProtocolError)
+
+# Pooled keep-alive client shared by every BudpayService in this worker.
+# Opened and closed by the application lifespan; created lazily elsewhere.
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    http2 = BUDPAY_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            # httpx needs the optional h2 package for HTTP/2
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            BUDPAY_READ_TIMEOUT,
+            connect=BUDPAY_CONNECT_TIMEOUT,
+            pool=BUDPAY_POOL_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=BUDPAY_MAX_CONNECTIONS,
+            max_keepalive_connections=BUDPAY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=BUDPAY_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def get_budpay_client() -> httpx.AsyncClient:
+    """Get the worker's shared Budpay client, opening it if needed"""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = _create_client()
+    return _shared_client
+
+
+# Retries across all Budpay endpoints share one budget per worker
+retry_budget = RetryBudget(ratio=BUDPAY_RETRY_BUDGET_RATIO)
+hedge_stats = {"hedged": 0, "hedge_wins": 0}
+
+
+# Provider balances by virtual account number. Kept briefly, adjusted by our
+# own transfers and dropped when a webhook reports money arriving.
+provider_balance_cache = TTLCache(ttl_seconds=BALANCE_CACHE_TTL_SECONDS)
+
+
+def adjust_cached_balance(account_number: str, delta: Decimal) -> None:
+    """Apply a transfer we made to the cached provider balance, if cached"""
+    provider_balance_cache.modify(
+        account_number,
+        lambda data: {**data, "balance": str(Decimal(str(data["balance"])) + delta)}
+    )
+
+
+def invalidate_cached_balance(account_number: str) -> None:
+    """Forget the cached provider balance for an account"""
+    provider_balance_cache.invalidate(account_number)
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+async def close_budpay_client() -> None:
+    """Close the worker's shared Budpay client and its pooled connections"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
+
 class BudpayService:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_key = BUDPAY_SECRET_KEY
-        self.base_url = "https://api.budpay.com/api/v2"
+        self.base_url = BUDPAY_BASE_URL.rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.client = client or get_budpay_client()
+
+    async def _request(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        idempotent: bool = False,
+        hedge: bool = False,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request through the endpoint's circuit breaker.
+        Idempotent calls are retried with jittered backoff while the retry
+        budget allows; hedge=True races a second copy of a slow read.
+        """
+        breaker = get_circuit_breaker(
+            f"budpay.{endpoint}",
+            failure_threshold=BUDPAY_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BUDPAY_BREAKER_RESET_SECONDS
+        )
+        if not breaker.allow_request():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Payment service temporarily unavailable"
+            )
+
+        retry_budget.record_request()
+        attempts = 1 + (BUDPAY_MAX_RETRIES if idempotent else 0)
+
+        # False while an allowed call has not recorded its outcome; a call that
+        # is cancelled or raises unexpectedly hands its breaker slot back
+        settled = False
+        try:
+            for attempt in range(attempts):
+                error: Optional[httpx.RequestError] = None
+                response: Optional[httpx.Response] = None
+                try:
+                    if hedge and BUDPAY_HEDGE_DELAY_MS > 0:
+                        response = await self._hedged_request(method, url, **kwargs)
+                    else:
+                        response = await self.client.request(method, url, **kwargs)
+                except httpx.RequestError as e:
+                    error = e
+
+                if response is not None and not _is_retryable_status(response.status_code):
+                    breaker.record_success()
+                    settled = True
+                    return response
+
+                breaker.record_failure()
+                settled = True
+
+                is_last = attempt + 1 >= attempts
+                if is_last or not retry_budget.try_spend() or not breaker.allow_request():
+                    if error is not None:
+                        raise error
+                    return response
+                settled = False
+
+                await asyncio.sleep(backoff_delay(
+                    attempt,
+                    base=BUDPAY_RETRY_BACKOFF_MS / 1000,
+                    cap=BUDPAY_RETRY_BACKOFF_CAP_MS / 1000
+                ))
+        finally:
+            if not settled:
+                breaker.release()
+
+    async def _hedged_request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a second copy if the first has not answered within the hedge delay"""
+        first = asyncio.create_task(self.client.request(method, url, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=BUDPAY_HEDGE_DELAY_MS / 1000)
+        if done:
+            return first.result()
+
+        hedge_stats["hedged"] += 1
+        second = asyncio.create_task(self.client.request(method, url, **kwargs))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            hedge_stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def create_virtual_account(
         self,
@@ -30,23 +221,24 @@ class BudpayService:
                 "phone": phone
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/virtual-account/create",
-                    json=payload,
-                    headers=self.headers
+            response = await self._request(
+                "create_virtual_account",
+                "POST",
+                f"{self.base_url}/virtual-account/create",
+                json=payload,
+                headers=self.headers
+            )
+            
+            response_data = response.json()
+            
+            if response.status_code != 200 or not response_data.get("status"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=response_data.get("message", "Virtual account creation failed")
                 )
                 
-                response_data = response.json()
-                
-                if response.status_code != 200 or not response_data.get("status"):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=response_data.get("message", "Virtual account creation failed")
-                    )
-                    
-                return response_data["data"]
-                
+            return response_data["data"]
+            
         except httpx.RequestError as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -56,22 +248,29 @@ class BudpayService:
     async def verify_payment(self, reference: str) -> Dict:
         """Verify payment status"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/transaction/verify/{reference}",
-                    headers=self.headers
+            response = await self._request(
+                "verify_payment",
+                "GET",
+                f"{self.base_url}/transaction/verify/{reference}",
+                idempotent=True,
+                headers=self.headers
+            )
+            
+            response_data = response.json()
+            
+            if response.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=response_data.get("message", "Transaction not found")
+                )
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=response_data.get("message", "Payment verification failed")
                 )
                 
-                response_data = response.json()
-                
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=response_data.get("message", "Payment verification failed")
-                    )
-                    
-                return response_data["data"]
-                
+            return response_data["data"]
+            
         except httpx.RequestError as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -91,27 +290,193 @@ class BudpayService:
         
         return hmac.compare_digest(signature, expected_signature)
 
-    async def get_virtual_account_balance(self, account_number: str) -> Dict:
-        """Get virtual account balance"""
+    async def get_virtual_account_balance(self, account_number: str, strict: bool = False) -> Dict:
+        """
+        Get virtual account balance.
+        Served from the short-lived cache unless strict is set.
+        """
+        if not strict:
+            cached = provider_balance_cache.get(account_number)
+            if cached is not None:
+                return cached
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/virtual-account/balance/{account_number}",
-                    headers=self.headers
+            response = await self._request(
+                "virtual_account_balance",
+                "GET",
+                f"{self.base_url}/virtual-account/balance/{account_number}",
+                idempotent=True,
+                hedge=True,
+                headers=self.headers
+            )
+            
+            response_data = response.json()
+            
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=response_data.get("message", "Balance check failed")
                 )
-                
-                response_data = response.json()
-                
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=response_data.get("message", "Balance check failed")
-                    )
-                    
-                return response_data["data"]
-                
+
+            provider_balance_cache.set(account_number, response_data["data"])
+            return response_data["data"]
+            
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not connect to payment service"
+            )
+
+    async def transfer_to_virtual_account(
+        self,
+        from_account: str,
+        to_account: str,
+        amount: Decimal,
+        description: Optional[str] = None,
+        reference: Optional[str] = None
+    ) -> Dict:
+        """Transfer funds between two virtual accounts"""
+        try:
+            payload = {
+                "from_account": from_account,
+                "to_account": to_account,
+                "amount": str(amount),
+                "narration": description,
+                "reference": reference
+            }
+
+            response = await self._request(
+                "transfer",
+                "POST",
+                f"{self.base_url}/virtual-account/transfer",
+                json=payload,
+                headers=self.headers
+            )
+
+            response_data = response.json()
+
+            if response.status_code != 200 or not response_data.get("status"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=response_data.get("message", "Transfer failed")
+                )
+
+            return response_data["data"]
+
+        except UNCONFIRMED_TRANSFER_ERRORS:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Payment service did not confirm the transfer"
+            )
         except httpx.RequestError as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Could not connect to payment service"
             )
+
+    async def transfer_batch(self, legs: List[TransferLeg]) -> List[TransferLegResult]:
+        """
+        Execute several transfer legs at once and report each leg's outcome.
+        Uses the bulk endpoint when enabled, otherwise runs the legs concurrently.
+        Never raises for a failed leg; callers compensate from the results.
+        Legs whose outcome is unknown (timed out after sending) come back PENDING.
+        """
+        if BUDPAY_BULK_TRANSFER_ENABLED and len(legs) > 1:
+            return await self._bulk_transfer(legs)
+
+        outcomes = await asyncio.gather(
+            *[
+                self.transfer_to_virtual_account(
+                    from_account=leg.from_account,
+                    to_account=leg.to_account,
+                    amount=leg.amount,
+                    description=leg.description,
+                    reference=leg.reference
+                )
+                for leg in legs
+            ],
+            return_exceptions=True
+        )
+        return [
+            self._leg_result(leg, outcome)
+            for leg, outcome in zip(legs, outcomes)
+        ]
+
+    async def _bulk_transfer(self, legs: List[TransferLeg]) -> List[TransferLegResult]:
+        """Send all legs in one bulk transfer request"""
+        try:
+            payload = {
+                "transfers": [
+                    {
+                        "from_account": leg.from_account,
+                        "to_account": leg.to_account,
+                        "amount": str(leg.amount),
+                        "narration": leg.description,
+                        "reference": leg.reference
+                    }
+                    for leg in legs
+                ]
+            }
+
+            response = await self._request(
+                "bulk_transfer",
+                "POST",
+                f"{self.base_url}/virtual-account/bulk-transfer",
+                json=payload,
+                headers=self.headers
+            )
+            response_data = response.json()
+        except UNCONFIRMED_TRANSFER_ERRORS:
+            error = HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Payment service did not confirm the transfer"
+            )
+            return [self._leg_result(leg, error) for leg in legs]
+        except httpx.RequestError:
+            error = HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not connect to payment service"
+            )
+            return [self._leg_result(leg, error) for leg in legs]
+        except HTTPException as e:
+            return [self._leg_result(leg, e) for leg in legs]
+
+        if response.status_code != 200 or not response_data.get("status"):
+            error = HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=response_data.get("message", "Transfer failed")
+            )
+            return [self._leg_result(leg, error) for leg in legs]
+
+        # Items come back in request order, each with its own status
+        results = []
+        for leg, item in zip(legs, response_data.get("data", [])):
+            if item.get("status") in (True, "success", "successful"):
+                results.append(self._leg_result(leg, item))
+            else:
+                results.append(TransferLegResult(
+                    leg=leg,
+                    status=TransferLegStatus.FAILED,
+                    data=item,
+                    error=item.get("message", "Transfer failed")
+                ))
+        for leg in legs[len(results):]:
+            results.append(TransferLegResult(
+                leg=leg,
+                status=TransferLegStatus.FAILED,
+                error="No result returned for transfer"
+            ))
+        return results
+
+    @staticmethod
+    def _leg_result(leg: TransferLeg, outcome) -> TransferLegResult:
+        if isinstance(outcome, HTTPException) and outcome.status_code == status.HTTP_504_GATEWAY_TIMEOUT:
+            # Sent but unanswered; only a status query can tell whether it went through
+            return TransferLegResult(leg=leg, status=TransferLegStatus.PENDING, error=outcome.detail)
+        if isinstance(outcome, BaseException):
+            return TransferLegResult(
+                leg=leg,
+                status=TransferLegStatus.FAILED,
+                error=getattr(outcome, "detail", None) or str(outcome)
+            )
+        return TransferLegResult(leg=leg, status=TransferLegStatus.SUCCESS, data=outcome)
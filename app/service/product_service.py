@@ -1,13 +1,113 @@
 # service.py
-from typing import List
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from decimal import Decimal, InvalidOperation
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from app.data.models.product_models import Product, ProductImage
+from app.core.config import PRODUCT_IMPORT_CHUNK_SIZE, PRODUCT_IMPORT_MAX_ERRORS
+from app.core.http_cache import make_etag
 from app.repository.product_repo import ProductRepository
 from app.service.base_service import BaseService
-from app.data.schemas.product_schemas import ProductCreate, ProductUpdate
+from app.data.schemas.product_schemas import (
+    CatalogueProductRead,
+    ProductCondition,
+    ProductCreate,
+    ProductImageRead,
+    ProductImportFormat,
+    ProductSearchResult,
+    ProductSort,
+    ProductUpdate
+)
+import base64
+import binascii
+import csv
+import io
+import json
 import uuid
 
+
+def _encode_cursor(kind: str, key: List) -> str:
+    """Opaque cursor holding the sort key of the last item on a page"""
+    payload = json.dumps({"kind": kind, "key": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, kind: str, types: Tuple) -> Tuple:
+    """Sort key from a cursor, converted with `types`; 400 if it is malformed or for another listing"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["kind"] != kind or len(payload["key"]) != len(types):
+            raise ValueError("cursor was issued for a different listing")
+        return tuple(cast(value) for cast, value in zip(types, payload["key"]))
+    except (ValueError, KeyError, TypeError, InvalidOperation, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _catalogue_cursor_types(sort: ProductSort) -> Tuple:
+    return (int,) if sort == ProductSort.NEWEST else (Decimal, int)
+
+
+def _iter_import_rows(stream: BinaryIO, format: ProductImportFormat) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (row number, raw product dict) from an upload one row at a time.
+    CSV columns match ProductCreate, with `images` as "|"-separated URLs
+    (the first is primary);
+    NDJSON lines are ProductCreate objects whose images may also be plain URLs.
+    A row that cannot be parsed is yielded as its error message instead.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == ProductImportFormat.CSV:
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            urls = [url.strip() for url in (row.pop("images", None) or "").split("|") if url.strip()]
+            data = {key: value or None for key, value in row.items() if key}
+            data["images"] = [
+                {"url": url, "order": order, "is_primary": order == 0}
+                for order, url in enumerate(urls)
+            ]
+            yield row_number, data
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, f"Invalid JSON: {e}"
+            continue
+        if isinstance(data, dict) and isinstance(data.get("images"), list):
+            data["images"] = [
+                {"url": image, "order": order} if isinstance(image, str) else image
+                for order, image in enumerate(data["images"])
+            ]
+        yield row_number, data
+
+
+def _validate_import_row(data) -> Tuple[Optional[ProductCreate], List[str]]:
+    """Validate one import row as create_product would"""
+    if isinstance(data, str):
+        return None, [data]
+    try:
+        product = ProductCreate.model_validate(data)
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in e.errors()
+        ]
+
+    primary_images = [image for image in product.images if image.is_primary]
+    if not primary_images:
+        product.images[0].is_primary = True
+    elif len(primary_images) > 1:
+        return None, ["images: Only one primary image allowed"]
+    return product, []
+
+
 class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
     def __init__(self, session: Session):
         super().__init__(repository=ProductRepository(session=session))
@@ -21,14 +121,14 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
             **product_data.model_dump(exclude={'images'})
         )
 
-        # Create product images
+        # Create product images; the relationship fills product_id on flush
         images = [
             ProductImage(
-                product_id=product.id,
                 **image.model_dump()
             )
             for image in product_data.images
         ]
+        product.images = images
 
         # Ensure one primary image
         primary_images = [img for img in images if img.is_primary]
@@ -40,12 +140,166 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
                 detail="Only one primary image allowed"
             )
 
-        return self._repository.create_product_with_images(product, images)
+        product = self._repository.create_product_with_images(product, images)
+        # The commit expired the product; reload it with its images for the response
+        product = self._repository.get_product_for_read(product.id)
+        self._repository.index_product(product)
+        return product
+
+    def import_products(self, user_id: int, stream: BinaryIO, format: ProductImportFormat) -> Dict:
+        """
+        Import products from a CSV or NDJSON upload. The file is parsed,
+        validated and inserted PRODUCT_IMPORT_CHUNK_SIZE rows at a time, each
+        chunk committed on its own; invalid rows are skipped and reported.
+        """
+        imported = 0
+        failed = 0
+        errors = []
+        chunk: List[ProductCreate] = []
+
+        def flush() -> int:
+            product_ids = self._repository.bulk_create_products(user_id, chunk)
+            self.session.commit()
+            # Only committed rows go into the search index
+            self._repository.index_documents([
+                {'id': product_id, 'name': product.name, 'description': product.description, 'code': product.code}
+                for product_id, product in zip(product_ids, chunk)
+            ])
+            chunk.clear()
+            return len(product_ids)
+
+        try:
+            for row_number, data in _iter_import_rows(stream, format):
+                product, row_errors = _validate_import_row(data)
+                if row_errors:
+                    failed += 1
+                    if len(errors) < PRODUCT_IMPORT_MAX_ERRORS:
+                        errors.append({"row": row_number, "errors": row_errors})
+                    continue
+
+                chunk.append(product)
+                if len(chunk) >= PRODUCT_IMPORT_CHUNK_SIZE:
+                    imported += flush()
+            imported += flush()
+        except (UnicodeDecodeError, csv.Error) as e:
+            self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not read upload after {imported} imported rows: {e}"
+            )
+
+        return {
+            "imported": imported,
+            "failed": failed,
+            "errors": errors,
+            "errors_truncated": failed > len(errors)
+        }
+
+    def get_user_products_etag(self, user_id: int) -> str:
+        """
+        ETag for the user's product list, from one aggregate query. No
+        Last-Modified: deleting a product leaves max(updated_at) unchanged,
+        so If-Modified-Since would answer 304 for a stale list.
+        """
+        count, versions, last_id = self._repository.get_user_products_version(user_id)
+        return make_etag("products", user_id, count, versions, last_id)
 
     def get_user_products(self, user_id: int) -> List[Product]:
         """Get all products for a user"""
         return self._repository.get_user_products(user_id)
 
+    def get_catalogue(
+        self,
+        sort: ProductSort = ProductSort.NEWEST,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        state: Optional[str] = None,
+        lga: Optional[str] = None,
+        condition: Optional[ProductCondition] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        store_id: Optional[int] = None
+    ) -> Dict:
+        """Browse all products; two queries per page regardless of catalogue size"""
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="min_price must not exceed max_price"
+            )
+
+        # Step 1: Fetch one row past the page to know whether another page exists
+        products = self._repository.get_catalogue_page(
+            sort=sort,
+            after=_decode_cursor(cursor, sort.value, _catalogue_cursor_types(sort)) if cursor else None,
+            limit=size + 1,
+            state=state,
+            lga=lga,
+            condition=condition.value if condition else None,
+            min_price=min_price,
+            max_price=max_price,
+            store_id=store_id
+        )
+        has_more = len(products) > size
+        products = products[:size]
+
+        # Step 2: Primary images for the whole page in one query
+        images = self._repository.get_primary_images([product.id for product in products])
+
+        data = []
+        for product in products:
+            item = CatalogueProductRead.model_validate(product)
+            image = images.get(product.id)
+            item.primary_image = ProductImageRead.model_validate(image) if image else None
+            data.append(item)
+
+        return {
+            "data": data,
+            "next_cursor": _encode_cursor(
+                sort.value,
+                [products[-1].id] if sort == ProductSort.NEWEST
+                else [str(products[-1].prices), products[-1].id]
+            ) if has_more else None,
+            "size": size
+        }
+
+    def search_products(
+        self,
+        query: str,
+        cursor: Optional[str] = None,
+        size: int = 20
+    ) -> Dict:
+        """Ranked full-text search over product name, code and description"""
+        query = query.strip()
+        kind = f"search:{query}"
+
+        # Step 1: One ranked page, plus one row to know whether another exists
+        results = self._repository.search_products(
+            query,
+            after=_decode_cursor(cursor, kind, (float, int)) if cursor else None,
+            limit=size + 1
+        )
+        has_more = len(results) > size
+        results = results[:size]
+
+        # Step 2: Primary images for the whole page in one query
+        images = self._repository.get_primary_images([product.id for product, _, _ in results])
+
+        data = []
+        for product, rank, snippet in results:
+            item = ProductSearchResult.model_validate(product)
+            image = images.get(product.id)
+            item.primary_image = ProductImageRead.model_validate(image) if image else None
+            item.rank = rank
+            item.snippet = snippet
+            data.append(item)
+
+        last_product, last_rank, _ = results[-1] if results else (None, None, None)
+        return {
+            "data": data,
+            "next_cursor": _encode_cursor(kind, [last_rank, last_product.id]) if has_more else None,
+            "size": size
+        }
+
     def update_product(self, user_id: int, product_id: int, product_data: ProductUpdate) -> Product:
         """Update product information and images"""
         product = self._repository.get_product_by_id_and_user(product_id, user_id)
@@ -57,13 +311,14 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
 
         update_data = product_data.model_dump(exclude_unset=True)
         
-        # Handle images update if provided
-        if 'images' in update_data:
+        # Handle images update if provided (model_dump already turned them into dicts)
+        images_data = update_data.pop('images', None)
+        if images_data:
             images = [
                 ProductImage(
-                    **image.model_dump()
+                    **image
                 )
-                for image in update_data.pop('images')
+                for image in images_data
             ]
             
             # Validate primary image
@@ -76,14 +331,27 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
                     detail="Only one primary image allowed"
                 )
                 
-            self._repository.update_product_images(product_id, images)
 
-        # Update product fields
-        for field, value in update_data.items():
-            setattr(product, field, value)
-        
-        self.session.add(product)
-        self.session.commit()
+        # Images, fields and the version bump commit together, so the ETag
+        # never moves without the change or the change without the ETag
+        try:
+            if images_data:
+                self._repository.update_product_images(product_id, images)
+                # The loaded collection may still hold deleted images; reload it on next access
+                self.session.expire(product, ['images'])
+
+            for field, value in update_data.items():
+                setattr(product, field, value)
+            product.version = Product.version + 1
+
+            self.session.add(product)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+        product = self._repository.get_product_for_read(product_id)
+        self._repository.index_product(product)
         return product
 
     def delete_product(self, user_id: int, product_id: int) -> None:
@@ -95,4 +363,5 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
                 detail="Product not found"
             )
         
-        self._repository.delete(product)
\ No newline at end of file
+        self._repository.delete(product)
+        self._repository.unindex_product(product_id)
\ No newline at end of file
@@ -1,17 +1,39 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
-from typing import Dict
+from typing import Dict, Optional, Tuple
+import numpy as np
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from app.data.models.store_models import Store, StoreSubscription
 from app.repository.account_repo import AccountRepository
 from app.repository.store_repo import StoreRepository
 from app.service.base_service import BaseService
-from app.data.schemas.store_schemas import StoreCreate, StoreUpdate
+from app.data.schemas.store_schemas import (
+    AnalyticsInterval,
+    StoreAnalyticsBucket,
+    StoreAnalyticsRead,
+    StoreCreate,
+    StoreUpdate
+)
+from app.repository.analytics_repo import AnalyticsRepository, store_analytics_cache
 from app.repository.user_repo import UserRepository
 from app.core.constants import SUBSCRIPTION_PLANS, DurationType
+from app.core.http_cache import make_etag
 from app.service.transaction_service import TransactionService
 
+ORDER_VALUE_PERCENTILES = [50, 75, 90, 95, 99]
+
+
+def _period_starts(days: np.ndarray, interval: AnalyticsInterval) -> np.ndarray:
+    """Map datetime64[D] values to the first day of their day/week/month bucket"""
+    if interval == AnalyticsInterval.MONTH:
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if interval == AnalyticsInterval.WEEK:
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        weekday = (days.astype("int64") + 3) % 7
+        return days - weekday.astype("timedelta64[D]")
+    return days
+
 
 class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
     def __init__(self, session: Session):
@@ -108,6 +130,10 @@ class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
                 self.session.add(subscription)
                 self.session.commit()
 
+                return store
+            elif payment_result["status"] == "pending":
+                # The payment commit kept the store with its subscription
+                # inactive; an unconfirmed payment is refunded, never applied
                 return store
             else:
                 self.session.rollback()
@@ -186,8 +212,10 @@ class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
                 current_subscription.start_date = start_date
                 current_subscription.end_date = end_date
                 current_subscription.is_active = True
+                store.version = Store.version + 1
 
                 self.session.add(current_subscription)
+                self.session.add(store)
                 self.session.commit()
 
                 return {
@@ -196,6 +224,14 @@ class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
                     "subscription": current_subscription,
                     "payment": payment_result
                 }
+            elif payment_result["status"] == "pending":
+                # Not renewed: an unconfirmed payment is refunded once reconciled
+                return {
+                    "message": "Subscription payment could not be confirmed; it will be refunded if it went through",
+                    "store": store,
+                    "subscription": self._repository.get_store_subscription(store_id),
+                    "payment": payment_result
+                }
             else:
                 self.session.rollback()
                 raise HTTPException(
@@ -210,6 +246,17 @@ class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
                 detail=str(e)
             )
 
+    def get_user_store_etag(self, user_id: str) -> Tuple[str, Optional[datetime]]:
+        """ETag and Last-Modified for the user's store, from its version columns only"""
+        version = self._repository.get_user_store_version(user_id)
+        if not version:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Store not found"
+            )
+        store_id, store_version, last_modified = version
+        return make_etag("store", store_id, store_version), last_modified
+
     def get_user_store(self, user_id: str) -> Store:
         """Get user's store"""
         store = self._repository.get_user_store(user_id)
@@ -247,6 +294,7 @@ class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
         # Update store
         for field, value in update_data.items():
             setattr(store, field, value)
+        store.version = Store.version + 1
         
         self.session.add(store)
         self.session.commit()
@@ -261,4 +309,96 @@ class StoreService(BaseService[Store, StoreCreate, StoreUpdate]):
                 detail="Store not found"
             )
         
-        self._repository.delete(store)
\ No newline at end of file
+        self._repository.delete(store)
+
+    def get_store_analytics(
+        self,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        interval: AnalyticsInterval = AnalyticsInterval.DAY
+    ) -> StoreAnalyticsRead:
+        """Sales aggregates for the user's store between start_date and end_date (inclusive)"""
+        store = self.get_user_store(user_id)
+        account = self.account_repo.get_user_account(user_id)
+        if not account:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Store account not found"
+            )
+
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(days=29)
+        if start_date > end_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_date must not be after end_date"
+            )
+
+        # Step 1: Serve from cache while no sale in the range has committed since
+        analytics_repo = AnalyticsRepository(self.session)
+        version = analytics_repo.get_sales_version(account.id, start_date, end_date)
+        cache_key = (account.id, start_date, end_date, interval, version)
+        cached = store_analytics_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Step 2: One columnar fetch of the range
+        created_at, amounts, fees = analytics_repo.get_sales_columns(
+            account.id,
+            datetime.combine(start_date, time.min),
+            datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+        net = np.array(amounts, dtype=np.float64)
+        fee = np.array(fees, dtype=np.float64)
+        gross = net + fee
+
+        # Step 3: Bucket every sale, keeping empty buckets so charts have no gaps
+        periods = np.arange(
+            _period_starts(np.array([start_date], dtype="datetime64[D]"), interval)[0],
+            np.datetime64(end_date) + 1,
+            dtype="datetime64[D]"
+        )
+        periods = np.unique(_period_starts(periods, interval))
+        index = np.searchsorted(periods, _period_starts(np.array(created_at, dtype="datetime64[D]"), interval))
+
+        orders = np.bincount(index, minlength=len(periods))
+        gross_sums = np.bincount(index, weights=gross, minlength=len(periods))
+        net_sums = np.bincount(index, weights=net, minlength=len(periods))
+        fee_sums = np.bincount(index, weights=fee, minlength=len(periods))
+        averages = np.divide(gross_sums, orders, out=np.zeros(len(periods)), where=orders > 0)
+
+        # Step 4: Totals and order size percentiles
+        percentiles = (
+            np.percentile(gross, ORDER_VALUE_PERCENTILES) if gross.size
+            else np.zeros(len(ORDER_VALUE_PERCENTILES))
+        )
+
+        analytics = StoreAnalyticsRead(
+            store_id=store.id,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            total_orders=int(gross.size),
+            gross_revenue=round(float(gross.sum()), 2),
+            net_revenue=round(float(net.sum()), 2),
+            total_fees=round(float(fee.sum()), 2),
+            average_order_value=round(float(gross.mean()), 2) if gross.size else 0.0,
+            order_value_percentiles={
+                f"p{rank}": round(float(value), 2)
+                for rank, value in zip(ORDER_VALUE_PERCENTILES, percentiles)
+            },
+            buckets=[
+                StoreAnalyticsBucket(
+                    period_start=period.astype(date),
+                    orders=int(orders[i]),
+                    gross_revenue=round(float(gross_sums[i]), 2),
+                    net_revenue=round(float(net_sums[i]), 2),
+                    fees=round(float(fee_sums[i]), 2),
+                    average_order_value=round(float(averages[i]), 2)
+                )
+                for i, period in enumerate(periods)
+            ]
+        )
+        store_analytics_cache.set(cache_key, analytics)
+        return analytics
@@ -1,13 +1,37 @@
 # app/service/transaction_service.py
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from decimal import Decimal
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from app.repository.account_repo import AccountRepository
+from app.repository.archive_repo import TransactionArchive
 from app.repository.transaction_repo import TransactionRepository
-from app.service.budpay_service import BudpayService
-from app.data.models.transaction_models import TransactionType, TransactionStatus
+from app.service.budpay_service import BudpayService, adjust_cached_balance
+from app.core.config import BALANCE_CACHE_STRICT_THRESHOLD
+from app.data.models.account_models import VirtualBankAccount
+from app.data.models.transaction_models import Transaction, TransactionType, TransactionStatus
+from app.data.schemas.transaction_schemas import StatementFormat
+from app.data.schemas.transfer_schemas import TransferLeg, TransferLegResult, TransferLegStatus
+from app.data.utils.database import SessionLocal
 from datetime import datetime
+import asyncio
+import csv
+import io
+import json
+
+STATEMENT_COLUMNS = [
+    "id", "reference", "type", "status", "amount", "fee_amount",
+    "description", "account_id", "created_at", "completed_at"
+]
+
+
+def _statement_value(value):
+    """Render datetimes as ISO 8601 and decimals as exact strings"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
 
 class TransactionService:
     def __init__(self, session: Session):
@@ -16,6 +40,187 @@ class TransactionService:
         self.account_repo = AccountRepository(session)
         self.budpay_service = BudpayService()
 
+    async def _get_provider_balance(self, account_number: str, amount: Decimal) -> Decimal:
+        """Provider balance for a payment check; large amounts always bypass the cache"""
+        balance = await self.budpay_service.get_virtual_account_balance(
+            account_number,
+            strict=amount >= Decimal(BALANCE_CACHE_STRICT_THRESHOLD)
+        )
+        return Decimal(str(balance["balance"]))
+
+    async def _settle_transfer_legs(self, results: List[TransferLegResult]) -> bool:
+        """
+        Reverse the legs that went through if any leg failed, then raise.
+        Returns False, reversing nothing, when any leg's outcome is unknown;
+        reconcile_pending_payment settles those once Budpay can tell.
+        """
+        if any(result.status == TransferLegStatus.PENDING for result in results):
+            return False
+
+        failed = [result for result in results if result.status == TransferLegStatus.FAILED]
+        if not failed:
+            return True
+
+        succeeded = [result.leg for result in results if result.status == TransferLegStatus.SUCCESS]
+        message = f"Transfer failed: {failed[0].error}"
+        if succeeded:
+            reversals = await self.budpay_service.transfer_batch(
+                [leg.reversed() for leg in succeeded]
+            )
+            unreversed = [
+                result.leg.reference for result in reversals
+                if result.status != TransferLegStatus.SUCCESS
+            ]
+            if unreversed:
+                message += f"; reversal failed for {', '.join(unreversed)}"
+        raise Exception(message)
+
+    @staticmethod
+    def _payment_transfers(
+        buyer_virtual: VirtualBankAccount,
+        store_virtual: VirtualBankAccount,
+        app_virtual: VirtualBankAccount,
+        credit_txn: Transaction,
+        fee_txn: Transaction,
+        product_id: Optional[int] = None
+    ) -> List[TransferLeg]:
+        """Transfer legs of a product payment, leaving out legs with nothing to move"""
+        product = f" for product {product_id}" if product_id is not None else ""
+        return [
+            TransferLeg(
+                from_account=buyer_virtual.account_number,
+                to_account=to_account,
+                amount=txn.amount,
+                description=description,
+                reference=txn.reference
+            )
+            for to_account, txn, description in (
+                (store_virtual.account_number, credit_txn, f"Payment{product}"),
+                (app_virtual.account_number, fee_txn, f"Platform fee{product}")
+            )
+            if txn.amount > 0
+        ]
+
+    @staticmethod
+    def _subscription_transfer(
+        user_virtual: VirtualBankAccount,
+        app_virtual: VirtualBankAccount,
+        credit_txn: Transaction,
+        store_id: Optional[int] = None
+    ) -> TransferLeg:
+        """Transfer leg of a subscription payment, carrying the credit leg's reference"""
+        store = f" for store {store_id}" if store_id is not None else ""
+        return TransferLeg(
+            from_account=user_virtual.account_number,
+            to_account=app_virtual.account_number,
+            amount=credit_txn.amount,
+            description=f"Subscription payment{store}",
+            reference=credit_txn.reference
+        )
+
+    async def _transfer_outcome(self, reference: str) -> Optional[bool]:
+        """Whether Budpay applied a transfer: True, False (failed or never arrived) or None if unknown"""
+        try:
+            data = await self.budpay_service.verify_payment(reference)
+        except HTTPException as e:
+            return False if e.status_code == status.HTTP_404_NOT_FOUND else None
+
+        if data.get("status") in (True, "success", "successful"):
+            return True
+        if data.get("status") in (False, "failed", "reversed"):
+            return False
+        return None
+
+    async def reconcile_pending_payment(self, group_id: int) -> Optional[TransactionStatus]:
+        """
+        Settle a payment left PENDING because a transfer's outcome was unknown.
+        Each transfer leg's status is queried. A product payment completes if
+        every leg went through. Otherwise the legs that went through are
+        reversed and the payment fails. A subscription payment always fails
+        (refunded if it went through): the store change it paid for was never
+        applied. Returns the new status, or None while Budpay cannot yet tell
+        (or a reversal did not go through).
+        """
+        legs = self.transaction_repo.get_group_legs(group_id)
+        if any(leg.status != TransactionStatus.PENDING for leg in legs):
+            return None
+        subscription = len(legs) == 2 and legs[0].type == TransactionType.SUBSCRIPTION
+        if not subscription and len(legs) != 3:
+            return None
+
+        accounts = [self.account_repo.get_by_id(leg.account_id) for leg in legs]
+        virtuals = [self.account_repo.get_virtual_account(leg.account_id) for leg in legs]
+        if not all(accounts + virtuals):
+            return None
+
+        # Step 1: Ask Budpay what happened to each transfer
+        if subscription:
+            transfers = [self._subscription_transfer(virtuals[0], virtuals[1], legs[1])]
+        else:
+            transfers = self._payment_transfers(*virtuals, legs[1], legs[2])
+        outcomes = await asyncio.gather(*[
+            self._transfer_outcome(transfer.reference) for transfer in transfers
+        ])
+        if None in outcomes:
+            return None
+
+        # Step 2: Everything went through; complete the payment as checkout would have
+        if all(outcomes) and not subscription:
+            debit_txn, credit_txn, fee_txn = legs
+            buyer_account, store_account, app_account = accounts
+            buyer_virtual, store_virtual, app_virtual = virtuals
+            adjust_cached_balance(buyer_virtual.account_number, -debit_txn.amount)
+            adjust_cached_balance(store_virtual.account_number, credit_txn.amount)
+            adjust_cached_balance(app_virtual.account_number, fee_txn.amount)
+            self.account_repo.apply_payment_balances([
+                (buyer_account, -debit_txn.amount, None),
+                (store_account, credit_txn.amount, credit_txn.reference),
+                (app_account, fee_txn.amount, fee_txn.reference)
+            ])
+            self.transaction_repo.update_statuses(legs, TransactionStatus.COMPLETED)
+            self.session.commit()
+            return TransactionStatus.COMPLETED
+
+        # Step 3: Reverse what went through (once, even across runs), then fail
+        reversals = [
+            transfer.reversed()
+            for transfer, went_through in zip(transfers, outcomes)
+            if went_through
+        ]
+        reversed_already = await asyncio.gather(*[
+            self._transfer_outcome(reversal.reference) for reversal in reversals
+        ])
+        outstanding = [
+            reversal for reversal, done in zip(reversals, reversed_already) if not done
+        ]
+        if outstanding:
+            results = await self.budpay_service.transfer_batch(outstanding)
+            if any(result.status != TransferLegStatus.SUCCESS for result in results):
+                return None
+
+        self.transaction_repo.update_statuses(legs, TransactionStatus.FAILED)
+        self.session.commit()
+        return TransactionStatus.FAILED
+
+    def _record_failed_payment(
+        self,
+        reference: str,
+        type: TransactionType,
+        leg_rows: List[Dict]
+    ) -> None:
+        """
+        Record a rolled back payment's legs as FAILED. This is best effort:
+        if it fails too, it is rolled back so the caller can still raise the
+        payment's own error.
+        """
+        for row in leg_rows:
+            row["status"] = TransactionStatus.FAILED
+        try:
+            self.transaction_repo.create_payment_legs(reference, type, leg_rows)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+
     async def process_product_payment(
         self,
         buyer_account_id: int,
@@ -45,96 +250,90 @@ class TransactionService:
             store_amount = amount - fee
             
             # Verify buyer has sufficient balance
-            buyer_balance = await self.budpay_service.get_virtual_account_balance(
-                buyer_virtual.account_number
+            buyer_balance = await self._get_provider_balance(
+                buyer_virtual.account_number, amount
             )
-            if Decimal(str(buyer_balance["balance"])) < amount:
+            if buyer_balance < amount:
                 raise ValueError("Insufficient funds")
             
-            # Create transactions in PENDING state
-            debit_txn = self.transaction_repo.create_transaction({
-                "type": TransactionType.PRODUCT_PAYMENT,
+            # Create all three legs in PENDING state with one INSERT
+            leg_rows = [
+                {
+                    "type": TransactionType.PRODUCT_PAYMENT,
+                    "amount": amount,
+                    "description": f"Payment for product {product_id}",
+                    "status": TransactionStatus.PENDING,
+                    "account_id": buyer_account_id
+                },
+                {
+                    "type": TransactionType.PRODUCT_PAYMENT,
+                    "amount": store_amount,
+                    "fee_amount": fee,
+                    "description": f"Payment received for product {product_id}",
+                    "status": TransactionStatus.PENDING,
+                    "account_id": store_account_id
+                },
+                {
+                    "type": TransactionType.FEE,
+                    "amount": fee,
+                    "description": f"Fee for product {product_id}",
+                    "status": TransactionStatus.PENDING,
+                    "account_id": app_account.id
+                }
+            ]
+            reference, legs = self.transaction_repo.create_payment(
+                TransactionType.PRODUCT_PAYMENT, leg_rows, ["", "-STORE", "-FEE"]
+            )
+            debit_txn, credit_txn, fee_txn = legs
+            payment = {
+                "buyer_transaction": debit_txn,
+                "store_transaction": credit_txn,
+                "fee_transaction": fee_txn,
                 "amount": amount,
-                "description": f"Payment for product {product_id}",
-                "status": TransactionStatus.PENDING,
-                "account_id": buyer_account_id
-            })
-            
-            credit_txn = self.transaction_repo.create_transaction({
-                "type": TransactionType.PRODUCT_PAYMENT,
-                "amount": store_amount,
-                "fee_amount": fee,
-                "description": f"Payment received for product {product_id}",
-                "status": TransactionStatus.PENDING,
-                "account_id": store_account_id,
-                "reference": debit_txn.reference
-            })
-            
-            fee_txn = self.transaction_repo.create_transaction({
-                "type": TransactionType.FEE,
-                "amount": fee,
-                "description": f"Fee for product {product_id}",
-                "status": TransactionStatus.PENDING,
-                "account_id": app_account.id,
-                "reference": debit_txn.reference
-            })
+                "store_amount": store_amount,
+                "fee": fee
+            }
             
             try:
-                # Transfer amount to store's virtual account
-                await self.budpay_service.transfer_to_virtual_account(
-                    from_account=buyer_virtual.account_number,
-                    to_account=store_virtual.account_number,
-                    amount=store_amount,
-                    description=f"Payment for product {product_id}"
-                )
-                
-                # Transfer fee to platform's virtual account
-                await self.budpay_service.transfer_to_virtual_account(
-                    from_account=buyer_virtual.account_number,
-                    to_account=app_virtual.account_number,
-                    amount=fee,
-                    description=f"Platform fee for product {product_id}"
-                )
-                
-                # Update account balances
-                self.account_repo.debit_account(buyer_account, amount)
-                self.account_repo.credit_account(store_account, store_amount)
-                self.account_repo.credit_account(app_account, fee)
-                
-                # Update transaction statuses
-                for txn in [debit_txn, credit_txn, fee_txn]:
-                    self.transaction_repo.update_status(
-                        txn, 
-                        TransactionStatus.COMPLETED,
-                        commit=False
+                # Run the store and fee legs concurrently; a fee that rounds
+                # to zero has nothing to transfer
+                results = await self.budpay_service.transfer_batch(
+                    self._payment_transfers(
+                        buyer_virtual, store_virtual, app_virtual, credit_txn, fee_txn, product_id
                     )
+                )
+                if not await self._settle_transfer_legs(results):
+                    # Keep the legs PENDING for reconcile_pending_payment
+                    self.session.commit()
+                    return {
+                        "status": "pending",
+                        "message": "Payment submitted and awaiting confirmation",
+                        "data": payment
+                    }
+
+                # Keep cached provider balances in step with our own transfers
+                adjust_cached_balance(buyer_virtual.account_number, -amount)
+                adjust_cached_balance(store_virtual.account_number, store_amount)
+                adjust_cached_balance(app_virtual.account_number, fee)
                 
+                # Update account balances and leg statuses, then commit once
+                self.account_repo.apply_payment_balances([
+                    (buyer_account, -amount, None),
+                    (store_account, store_amount, credit_txn.reference),
+                    (app_account, fee, fee_txn.reference)
+                ])
+                self.transaction_repo.update_statuses(legs, TransactionStatus.COMPLETED)
                 self.session.commit()
                 
                 return {
                     "status": "success",
                     "message": "Payment processed successfully",
-                    "data": {
-                        "buyer_transaction": debit_txn,
-                        "store_transaction": credit_txn,
-                        "fee_transaction": fee_txn,
-                        "amount": amount,
-                        "store_amount": store_amount,
-                        "fee": fee
-                    }
+                    "data": payment
                 }
                 
             except Exception as e:
                 self.session.rollback()
-                
-                # Update transaction statuses to FAILED
-                for txn in [debit_txn, credit_txn, fee_txn]:
-                    self.transaction_repo.update_status(
-                        txn,
-                        TransactionStatus.FAILED,
-                        commit=True
-                    )
-                
+                self._record_failed_payment(reference, TransactionType.PRODUCT_PAYMENT, leg_rows)
                 raise e
             
         except ValueError as e:
@@ -169,51 +368,70 @@ class TransactionService:
                 raise ValueError("Invalid account configuration")
             
             # Verify user has sufficient balance
-            user_balance = await self.budpay_service.get_virtual_account_balance(
-                user_virtual.account_number
+            user_balance = await self._get_provider_balance(
+                user_virtual.account_number, amount
             )
-            if Decimal(str(user_balance["balance"])) < amount:
+            if user_balance < amount:
                 raise ValueError("Insufficient funds")
             
-            # Create transactions
-            debit_txn = self.transaction_repo.create_transaction({
-                "type": TransactionType.SUBSCRIPTION,
-                "amount": amount,
-                "description": f"Store subscription payment - Store ID: {store_id}",
-                "status": TransactionStatus.PENDING,
-                "account_id": user_account_id
-            })
-            
-            credit_txn = self.transaction_repo.create_transaction({
-                "type": TransactionType.SUBSCRIPTION,
-                "amount": amount,
-                "description": f"Subscription payment received - Store ID: {store_id}",
-                "status": TransactionStatus.PENDING,
-                "account_id": app_account.id,
-                "reference": debit_txn.reference
-            })
+            # Create both legs in PENDING state with one INSERT
+            leg_rows = [
+                {
+                    "type": TransactionType.SUBSCRIPTION,
+                    "amount": amount,
+                    "description": f"Store subscription payment - Store ID: {store_id}",
+                    "status": TransactionStatus.PENDING,
+                    "account_id": user_account_id
+                },
+                {
+                    "type": TransactionType.SUBSCRIPTION,
+                    "amount": amount,
+                    "description": f"Subscription payment received - Store ID: {store_id}",
+                    "status": TransactionStatus.PENDING,
+                    "account_id": app_account.id
+                }
+            ]
+            reference, legs = self.transaction_repo.create_payment(
+                TransactionType.SUBSCRIPTION, leg_rows, ["", "-PLATFORM"]
+            )
+            debit_txn, credit_txn = legs
             
             try:
-                # Transfer amount to platform's virtual account
-                await self.budpay_service.transfer_to_virtual_account(
-                    from_account=user_virtual.account_number,
-                    to_account=app_virtual.account_number,
-                    amount=amount,
-                    description=f"Subscription payment for store {store_id}"
-                )
-                
-                # Update account balances
-                self.account_repo.debit_account(user_account, amount)
-                self.account_repo.credit_account(app_account, amount)
-                
-                # Update transaction statuses
-                for txn in [debit_txn, credit_txn]:
-                    self.transaction_repo.update_status(
-                        txn,
-                        TransactionStatus.COMPLETED,
-                        commit=False
+                # Transfer amount to platform's virtual account under the credit
+                # leg's reference, so an unconfirmed transfer can be looked up
+                transfer = self._subscription_transfer(user_virtual, app_virtual, credit_txn, store_id)
+                try:
+                    await self.budpay_service.transfer_to_virtual_account(
+                        from_account=transfer.from_account,
+                        to_account=transfer.to_account,
+                        amount=transfer.amount,
+                        description=transfer.description,
+                        reference=transfer.reference
                     )
+                except HTTPException as e:
+                    if e.status_code != status.HTTP_504_GATEWAY_TIMEOUT:
+                        raise
+                    # Keep the legs PENDING for reconcile_pending_payment
+                    self.session.commit()
+                    return {
+                        "status": "pending",
+                        "message": "Subscription payment submitted and awaiting confirmation",
+                        "data": {
+                            "user_transaction": debit_txn,
+                            "platform_transaction": credit_txn,
+                            "amount": amount
+                        }
+                    }
+
+                adjust_cached_balance(user_virtual.account_number, -amount)
+                adjust_cached_balance(app_virtual.account_number, amount)
                 
+                # Update account balances and leg statuses, then commit once
+                self.account_repo.apply_payment_balances([
+                    (user_account, -amount, None),
+                    (app_account, amount, credit_txn.reference)
+                ])
+                self.transaction_repo.update_statuses(legs, TransactionStatus.COMPLETED)
                 self.session.commit()
                 
                 return {
@@ -228,15 +446,7 @@ class TransactionService:
                 
             except Exception as e:
                 self.session.rollback()
-                
-                # Update transaction statuses to FAILED
-                for txn in [debit_txn, credit_txn]:
-                    self.transaction_repo.update_status(
-                        txn,
-                        TransactionStatus.FAILED,
-                        commit=True
-                    )
-                
+                self._record_failed_payment(reference, TransactionType.SUBSCRIPTION, leg_rows)
                 raise e
             
         except ValueError as e:
@@ -256,7 +466,8 @@ class TransactionService:
         skip: int = 0,
         limit: int = 50,
         type: Optional[TransactionType] = None,
-        status: Optional[TransactionStatus] = None
+        status: Optional[TransactionStatus] = None,
+        include_total: bool = True
     ) -> Dict:
         """Get user's transaction history"""
         return self.transaction_repo.get_user_transactions(
@@ -264,5 +475,121 @@ class TransactionService:
             skip=skip,
             limit=limit,
             type=type,
-            status=status
-        )
\ No newline at end of file
+            status=status,
+            include_total=include_total
+        )
+
+    def get_account_transactions(
+        self,
+        account_id: int,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 50,
+        type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        include_total: bool = True,
+        include_archived: bool = False
+    ) -> Dict:
+        """Get transaction history for one of the user's accounts, optionally with archived history"""
+        if not include_archived:
+            return self.transaction_repo.get_account_transactions(
+                account_id=account_id,
+                user_id=user_id,
+                skip=skip,
+                limit=limit,
+                type=type,
+                status=status,
+                include_total=include_total
+            )
+
+        # Step 1: The newest skip + limit hot rows; nothing past them can land on the page
+        window = skip + limit
+        hot = self.transaction_repo.get_account_transactions(
+            account_id=account_id,
+            user_id=user_id,
+            skip=0,
+            limit=window,
+            type=type,
+            status=status,
+            include_total=include_total
+        )
+
+        # Step 2: The same window from the archive, only for the caller's own account
+        account = self.account_repo.get_by_id(account_id)
+        archived = []
+        archived_total = 0
+        if account and account.user_id == user_id:
+            archive = TransactionArchive()
+            archived = [
+                {**row, "account": None}
+                for row in archive.newest_account_rows(account_id, window, type=type, status=status)
+            ]
+            if include_total:
+                archived_total = archive.count_account_rows(account_id, type=type, status=status)
+
+        # Step 3: Merge the two windows newest first and cut the page
+        def sort_key(txn):
+            if isinstance(txn, dict):
+                return txn["created_at"], txn["id"]
+            return txn.created_at, txn.id
+
+        merged = sorted(hot["data"] + archived, key=sort_key, reverse=True)
+        return {
+            "data": merged[skip:window],
+            "total": hot["total"] + archived_total if include_total else None,
+            "page": (skip // limit) + 1,
+            "size": limit
+        }
+
+    def export_statement(
+        self,
+        user_id: int,
+        format: StatementFormat = StatementFormat.CSV,
+        type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        rows_per_chunk: int = 500
+    ) -> Iterator[str]:
+        """
+        Stream a user's full statement as CSV or NDJSON text chunks.
+        Runs on its own session because the response body is produced after
+        the request-scoped session has been closed.
+        """
+        session = SessionLocal()
+        try:
+            rows = TransactionRepository(session).stream_user_transactions(
+                user_id=user_id,
+                type=type,
+                status=status,
+                start_date=start_date,
+                end_date=end_date
+            )
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer) if format == StatementFormat.CSV else None
+            if writer:
+                writer.writerow(STATEMENT_COLUMNS)
+
+            pending = 0
+            for row in rows:
+                if writer:
+                    writer.writerow([_statement_value(value) for value in row])
+                else:
+                    buffer.write(json.dumps({
+                        column: _statement_value(value)
+                        for column, value in zip(STATEMENT_COLUMNS, row)
+                    }))
+                    buffer.write("\n")
+
+                pending += 1
+                if pending >= rows_per_chunk:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                    pending = 0
+
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            session.close()
\ No newline at end of file
@@ -0,0 +1,163 @@
+# app/service/webhook_batcher.py
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple, Union
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from app.core.config import WEBHOOK_BATCH_MAX_SIZE, WEBHOOK_BATCH_MAX_WAIT_MS
+from app.data.models.transaction_models import TransactionType, TransactionStatus
+from app.data.utils.database import SessionLocal
+from app.repository.account_repo import AccountRepository
+from app.repository.transaction_repo import TransactionRepository
+
+
+class CreditBatcher:
+    """
+    Collects webhook credit events and applies them in size- or time-bounded
+    batches: one multi-row transaction INSERT and one summed balance UPDATE
+    per batch, committed together.
+    """
+
+    def __init__(self, max_size: int = WEBHOOK_BATCH_MAX_SIZE, max_wait_ms: int = WEBHOOK_BATCH_MAX_WAIT_MS):
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, account_number: str, amount: Decimal, reference: str) -> Dict:
+        """Queue a credit and wait until the batch containing it is committed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((
+            {"account_number": account_number, "amount": amount, "reference": reference},
+            future
+        ))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the pending events to a background flush task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        try:
+            results = await run_in_threadpool(self._apply_batch, [event for event, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _apply_batch(self, events: List[Dict]) -> List[Union[Dict, Exception]]:
+        """Apply a batch in its own session, retrying once if a reference raced in"""
+        session = SessionLocal()
+        try:
+            try:
+                return self._apply_events(session, events)
+            except IntegrityError:
+                # Another worker committed one of these references first;
+                # the retry sees it as already processed.
+                session.rollback()
+                return self._apply_events(session, events)
+        finally:
+            session.close()
+
+    def _apply_events(self, session, events: List[Dict]) -> List[Union[Dict, Exception]]:
+        account_repo = AccountRepository(session)
+        transaction_repo = TransactionRepository(session)
+
+        # Idempotency per reference, both against the table and within the batch
+        existing = transaction_repo.get_existing_references(
+            list({event["reference"] for event in events})
+        )
+        accounts = account_repo.get_by_virtual_accounts(
+            list({event["account_number"] for event in events})
+        )
+
+        now = datetime.utcnow()
+        results: List[Union[Dict, Exception]] = []
+        rows: List[Dict] = []
+        deltas: Dict[int, Decimal] = defaultdict(Decimal)
+        seen: Set[str] = set()
+
+        for event in events:
+            reference = event["reference"]
+            account = accounts.get(event["account_number"])
+
+            if reference in existing or reference in seen:
+                results.append({
+                    "status": "success",
+                    "message": "Transaction already processed",
+                    "data": {"reference": reference}
+                })
+                continue
+
+            if not account:
+                results.append(HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Account not found"
+                ))
+                continue
+
+            if not account_repo.can_credit(account):
+                results.append(HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Account cannot be credited"
+                ))
+                continue
+
+            seen.add(reference)
+            rows.append({
+                "type": TransactionType.CREDIT,
+                "amount": event["amount"],
+                "description": "Virtual Account Credit",
+                "status": TransactionStatus.COMPLETED,
+                "reference": reference,
+                "account_id": account.id,
+                "completed_at": now
+            })
+            deltas[account.id] += event["amount"]
+            results.append({
+                "status": "success",
+                "message": "Payment processed successfully",
+                "data": {
+                    "reference": reference,
+                    "account_id": account.id,
+                    "amount": str(event["amount"])
+                }
+            })
+
+        if rows:
+            transaction_repo.bulk_create_transactions(rows)
+            account_repo.apply_balance_deltas(deltas)
+            session.commit()
+
+        return results
+
+
+# Shared per-process batcher used by the webhook handler
+credit_batcher = CreditBatcher()
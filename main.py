@@ -1,24 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.service.budpay_service import get_budpay_client, close_budpay_client
 from app.routes.user import user_router
 from app.routes.auth import auth_router
 from app.routes.account import account_router
 from app.routes.password import password_reset_router
 from app.routes.admin import admin_router
+from app.routes.metrics import metrics_router
 from app.routes.product import product_router
 from app.routes.store import store_router
 from app.routes.transaction import transaction_router
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pooled Budpay client up front and close it cleanly on shutdown
+    get_budpay_client()
+    try:
+        yield
+    finally:
+        await close_budpay_client()
+
+
 app = FastAPI(
     title="E commerce app API",
     description="API Documentation",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Include routers
 app.include_router(account_router)
 app.include_router(admin_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
 app.include_router(password_reset_router)
 app.include_router(product_router)
 app.include_router(store_router)
@@ -0,0 +1,78 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The engine is created from POSTGRES_DATABASE_URL at import time, so point it
+# at a throwaway SQLite file before anything under app/ is imported
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = Path(tempfile.mkdtemp()) / "test.sqlite"
+os.environ["POSTGRES_DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, str(ROOT))
+
+import importlib
+import pytest
+from app.data.utils.database import Base, SessionLocal, engine
+
+for module in sorted((ROOT / "app" / "data" / "models").glob("*.py")):
+    importlib.import_module(f"app.data.models.{module.stem}")
+
+from app.data.models.account_models import Account, VirtualBankAccount
+from app.data.models.user_models import User
+from app.repository.account_repo import virtual_account_cache
+from app.core.search_index import product_search_indexes
+from app.repository.analytics_repo import store_analytics_cache
+
+# Tables whose server defaults are Postgres-only
+POSTGRES_ONLY_TABLES = ("admins", "password_resets")
+TABLES = [table for name, table in Base.metadata.tables.items() if name not in POSTGRES_ONLY_TABLES]
+
+USER_ACCOUNT_ID = 1
+PLATFORM_ACCOUNT_ID = 2
+
+
+def seed(session) -> None:
+    """One user with a user account (virtual account 111) and the platform account (222)"""
+    session.add(User(id=1, username="user", email="user@example.com", phone="08000000000"))
+    session.add(Account(id=USER_ACCOUNT_ID, user_id=1, type="user", key="k1", balance=0))
+    session.add(Account(id=PLATFORM_ACCOUNT_ID, user_id=1, type="platform", key="k2", balance=0))
+    for id, account_number in ((USER_ACCOUNT_ID, "111"), (PLATFORM_ACCOUNT_ID, "222")):
+        session.add(VirtualBankAccount(
+            id=id, user_id=1, account_id=id, account_number=account_number,
+            account_name="name", bank_name="bank", bank_code="000",
+            email="user@example.com", phone="08000000000", reference=f"VA-{id}"
+        ))
+    session.commit()
+
+
+@pytest.fixture
+def db():
+    """A freshly created and seeded database; yields a session on it"""
+    Base.metadata.drop_all(engine, tables=TABLES)
+    Base.metadata.create_all(engine, tables=TABLES)
+    virtual_account_cache.clear()
+    store_analytics_cache.clear()
+    product_search_indexes.clear()
+
+    session = SessionLocal()
+    seed(session)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    """TestClient for the app, authenticated as the seeded user"""
+    from fastapi.testclient import TestClient
+    from app.core.auth_dependency import get_current_user
+    import main
+
+    main.app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+    try:
+        with TestClient(main.app) as client:
+            yield client
+    finally:
+        main.app.dependency_overrides.clear()
@@ -0,0 +1,68 @@
+# tests/test_account_stripes.py
+from decimal import Decimal
+from sqlalchemy import update
+from conftest import USER_ACCOUNT_ID
+from app.data.models.account_models import Account, AccountStripe
+from app.repository.account_repo import AccountRepository
+
+
+def _striped_account(db, credits):
+    account_repo = AccountRepository(db)
+    account = db.get(Account, USER_ACCOUNT_ID)
+    account_repo.enable_stripes(account, 4)
+    for key, amount in credits:
+        account_repo.credit_account(account, Decimal(amount), stripe_key=key)
+    return account_repo, account
+
+
+def test_credits_land_on_stripes_and_count_in_balance(db):
+    account_repo, account = _striped_account(db, [("a", "10.00"), ("b", "15.00"), ("c", "5.00")])
+
+    assert account.balance == Decimal("0")
+    assert account_repo.get_balance(account) == Decimal("30.00")
+
+
+def test_fold_does_not_commit(db):
+    account_repo, account = _striped_account(db, [("a", "10.00"), ("b", "15.00")])
+
+    assert account_repo.fold_stripes(account) == Decimal("25.00")
+    assert account.balance == Decimal("25.00")
+
+    db.rollback()
+    assert db.get(Account, USER_ACCOUNT_ID).balance == Decimal("0")
+    assert account_repo.get_balance(account) == Decimal("25.00")
+
+
+def test_fold_does_not_overwrite_a_concurrent_balance_change(db):
+    account_repo, account = _striped_account(db, [("a", "10.00")])
+    assert account.balance == Decimal("0")
+
+    # Another writer moves the main balance after this session loaded the account
+    db.execute(
+        update(Account).where(Account.id == account.id).values(balance=Account.balance + 7)
+        .execution_options(synchronize_session=False)
+    )
+
+    account_repo.fold_stripes(account)
+    db.commit()
+
+    assert db.get(Account, USER_ACCOUNT_ID).balance == Decimal("17.00")
+
+
+def test_debit_folds_stripes_when_main_balance_is_short(db):
+    account_repo, account = _striped_account(db, [("a", "10.00"), ("b", "15.00")])
+
+    account_repo.debit_account(account, Decimal("20.00"))
+
+    db.expire_all()
+    assert db.get(Account, USER_ACCOUNT_ID).balance == Decimal("5.00")
+    assert all(stripe.balance == 0 for stripe in db.query(AccountStripe).all())
+
+
+def test_account_endpoint_includes_striped_credits(db, client):
+    _striped_account(db, [("a", "10.00"), ("b", "15.00")])
+
+    response = client.get("/accounts/me")
+
+    assert response.status_code == 200
+    assert Decimal(response.json()["balance"]) == Decimal("25.00")
@@ -0,0 +1,51 @@
+# tests/test_budpay_fake.py
+import asyncio
+from decimal import Decimal
+import httpx
+from app.data.models.account_models import VirtualBankAccount
+from app.data.models.user_models import User
+from app.service.account_service import AccountService
+from app.service.budpay_service import BudpayService
+from tools import budpay_fake
+
+
+def _budpay() -> BudpayService:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=budpay_fake.app))
+    return BudpayService(client=client)
+
+
+def test_account_creation_reads_every_field_from_the_fake(db):
+    db.add(User(id=2, username="buyer", email="buyer@example.com", phone="08000000001"))
+    db.commit()
+    service = AccountService(db)
+    service.budpay_service = _budpay()
+
+    result = asyncio.run(service.create_account_with_virtual(2, {
+        "email": "buyer@example.com", "first_name": "Ada", "last_name": "Obi", "phone": "08000000001"
+    }))
+
+    virtual_account = db.query(VirtualBankAccount).filter(VirtualBankAccount.user_id == 2).one()
+    assert virtual_account.account_id == result["account"].id
+    assert virtual_account.account_name == "Ada Obi"
+    assert virtual_account.reference == f"FAKE-VA-{virtual_account.account_number}"
+
+
+def test_transfer_balance_and_verify_round_trip():
+    budpay = _budpay()
+
+    async def run():
+        source = await budpay.create_virtual_account("a@example.com", "A", "One", "1")
+        target = await budpay.create_virtual_account("b@example.com", "B", "Two", "2")
+        await budpay_fake.ledger.fund(source["account_number"], Decimal("50.00"), "FUND-1")
+
+        await budpay.transfer_to_virtual_account(
+            source["account_number"], target["account_number"], Decimal("20.00"), reference="T-1"
+        )
+        balance = await budpay.get_virtual_account_balance(target["account_number"], strict=True)
+        verified = await budpay.verify_payment("T-1")
+        return balance, verified
+
+    balance, verified = asyncio.run(run())
+
+    assert Decimal(balance["balance"]) == Decimal("20.00")
+    assert verified["status"] == "success"
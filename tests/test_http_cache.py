@@ -0,0 +1,77 @@
+# tests/test_http_cache.py
+from decimal import Decimal
+import pytest
+from app.data.models.product_models import Product, ProductImage
+from app.data.schemas.product_schemas import ProductCondition, ProductCreate, ProductUpdate
+from app.service.product_service import ProductService
+
+
+def _product(name, url="https://example.com/a.jpg"):
+    return ProductCreate(
+        name=name, condition=ProductCondition.NEW, prices=Decimal("10.00"),
+        state="Lagos", lga="Ikeja", images=[{"url": url}]
+    )
+
+
+def test_product_list_revalidates_with_etag(db, client):
+    service = ProductService(db)
+    service.create_product(1, _product("lamp"))
+    service.create_product(1, _product("desk"))
+
+    response = client.get("/products/")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    assert client.get("/products/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/products/", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/products/", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/products/", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    # Any edit moves the ETag
+    product_id = response.json()[0]["id"]
+    service.update_product(1, product_id, ProductUpdate(name="floor lamp"))
+    updated = client.get("/products/", headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] != etag
+
+
+def test_deleting_a_product_is_never_answered_with_a_stale_304(db, client):
+    service = ProductService(db)
+    service.create_product(1, _product("lamp"))
+    kept = service.create_product(1, _product("desk"))
+
+    response = client.get("/products/")
+    etag = response.headers["etag"]
+    assert "last-modified" not in response.headers
+
+    service.delete_product(1, kept.id)
+    since = "Fri, 31 Dec 9999 23:59:59 GMT"
+    assert client.get("/products/", headers={"If-Modified-Since": since}).status_code == 200
+    after_delete = client.get("/products/", headers={"If-None-Match": etag})
+    assert after_delete.status_code == 200
+    assert [product["name"] for product in after_delete.json()] == ["lamp"]
+
+
+def test_image_changes_and_version_bump_commit_together(db, monkeypatch):
+    service = ProductService(db)
+    product = service.create_product(1, _product("lamp", "https://example.com/old.jpg"))
+    product_id = product.id
+
+    # Fail the commit that carries the product's version bump
+    commit = db.commit
+
+    def failing_commit():
+        if any(isinstance(obj, Product) for obj in db.dirty):
+            raise RuntimeError("commit failed")
+        commit()
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        service.update_product(1, product_id, ProductUpdate(images=[{"url": "https://example.com/new.jpg"}]))
+    monkeypatch.undo()
+
+    db.expire_all()
+    urls = [url for url, in db.query(ProductImage.url).filter(ProductImage.product_id == product_id)]
+    assert urls == ["https://example.com/old.jpg"]
+    assert db.get(Product, product_id).version == 1
@@ -0,0 +1,47 @@
+# tests/test_id_generator.py
+from datetime import datetime
+from decimal import Decimal
+from conftest import USER_ACCOUNT_ID
+from app.core import id_generator
+from app.core.id_generator import MAX_SEQUENCE, SEQUENCE_BITS, IdGenerator
+from app.data.models.transaction_models import Transaction, TransactionReference, TransactionType
+from app.repository.transaction_repo import TransactionRepository
+
+
+def test_ids_strictly_increase_through_sequence_exhaustion(monkeypatch):
+    monkeypatch.setattr(id_generator.time, "time", lambda: 1767225600.0)
+    generator = IdGenerator(node_id=7)
+
+    ids = [generator.next_id() for _ in range(3 * (MAX_SEQUENCE + 1))]
+
+    assert ids == sorted(set(ids))
+    assert {(value >> SEQUENCE_BITS) & 1023 for value in ids} == {7}
+
+
+def test_each_millisecond_starts_at_a_random_sequence(monkeypatch):
+    monkeypatch.setattr(id_generator.time, "time", lambda: 1767225600.0)
+    starts = {IdGenerator(node_id=7).next_id() & MAX_SEQUENCE for _ in range(20)}
+
+    assert len(starts) > 1
+
+
+def _leg(amount: str):
+    return {"type": TransactionType.PRODUCT_PAYMENT, "amount": Decimal(amount),
+            "status": "pending", "account_id": USER_ACCOUNT_ID}
+
+
+def test_payment_reference_collision_is_retried_once(db, monkeypatch):
+    db.add(TransactionReference(reference="TXN-TAKEN-FEE", created_at=datetime.utcnow()))
+    db.commit()
+    references = iter(["TXN-TAKEN", "TXN-FRESH"])
+    transaction_repo = TransactionRepository(db)
+    monkeypatch.setattr(transaction_repo, "_generate_reference", lambda: next(references))
+
+    reference, legs = transaction_repo.create_payment(
+        TransactionType.PRODUCT_PAYMENT, [_leg("10.00"), _leg("0.15")], ["", "-FEE"]
+    )
+    db.commit()
+
+    assert reference == "TXN-FRESH"
+    assert [leg.reference for leg in legs] == ["TXN-FRESH", "TXN-FRESH-FEE"]
+    assert db.query(Transaction).count() == 2
@@ -0,0 +1,64 @@
+# tests/test_product_images.py
+from decimal import Decimal
+from sqlalchemy import event
+from app.data.models.product_models import ProductImage
+from app.data.schemas.product_schemas import ProductCondition, ProductCreate, ProductUpdate
+from app.data.utils.database import engine
+from app.service.product_service import ProductService
+
+
+def _url(name):
+    return f"https://example.com/{name}.jpg"
+
+
+def _images(db, product_id):
+    return {
+        url: (id, order, is_primary)
+        for id, url, order, is_primary in db.query(
+            ProductImage.id, ProductImage.url, ProductImage.order, ProductImage.is_primary
+        ).filter(ProductImage.product_id == product_id)
+    }
+
+
+def test_image_update_touches_only_changed_rows(db):
+    service = ProductService(db)
+    product = service.create_product(1, ProductCreate(
+        name="lamp", condition=ProductCondition.NEW, prices=Decimal("10.00"), state="Lagos", lga="Ikeja",
+        images=[
+            {"url": _url("a"), "order": 0, "is_primary": True},
+            {"url": _url("b"), "order": 1},
+            {"url": _url("c"), "order": 2},
+            {"url": _url("e"), "order": 3}
+        ]
+    ))
+    before = _images(db, product.id)
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "product_images" in statement.split("WHERE")[0]:
+            statements.append(statement.split()[0])
+
+    # c becomes primary and first, a moves back, e is unchanged, b goes, d is new
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        service.update_product(1, product.id, ProductUpdate(images=[
+            {"url": _url("c"), "order": 0, "is_primary": True},
+            {"url": _url("a"), "order": 1},
+            {"url": _url("e"), "order": 3},
+            {"url": _url("d"), "order": 2}
+        ]))
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    writes = [statement for statement in statements if statement != "SELECT"]
+    assert sorted(writes) == ["DELETE", "INSERT", "UPDATE"]
+
+    after = _images(db, product.id)
+    assert set(after) == {_url("a"), _url("c"), _url("d"), _url("e")}
+    for kept in ("a", "c", "e"):
+        assert after[_url(kept)][0] == before[_url(kept)][0]
+    assert after[_url("c")][1:] == ("0", True)
+    assert after[_url("a")][1:] == ("1", False)
+    assert after[_url("e")] == before[_url("e")]
+    assert after[_url("d")][1:] == ("2", False)
@@ -0,0 +1,54 @@
+# tests/test_product_import.py
+import json
+from app.data.models.product_models import Product, ProductImage
+from app.service import product_service
+
+CSV_HEADER = "name,description,code,condition,prices,state,lga,images\n"
+
+
+def _import(client, filename, body, **params):
+    return client.post("/products/import", params=params, files={"file": (filename, body.encode())})
+
+
+def test_csv_import_skips_and_reports_invalid_rows(db, client, monkeypatch):
+    monkeypatch.setattr(product_service, "PRODUCT_IMPORT_CHUNK_SIZE", 2)
+    body = CSV_HEADER + "".join([
+        "Lamp,,L1,new,10.00,Lagos,Ikeja,https://example.com/a.jpg|https://example.com/b.jpg\n",
+        "Desk,,D1,broken,10.00,Lagos,Ikeja,https://example.com/c.jpg\n",
+        "Chair,,C1,used,10.001,Lagos,Ikeja,https://example.com/d.jpg\n",
+        "Shelf,,S1,used,25.50,Lagos,Ikeja,\n",
+        "Stool,,S2,refurbished,5.00,Lagos,Ikeja,https://example.com/e.jpg\n",
+        "Rug,,R1,new,7.00,Lagos,Ikeja,https://example.com/f.jpg\n",
+    ])
+
+    result = _import(client, "products.csv", body).json()
+
+    assert (result["imported"], result["failed"], result["errors_truncated"]) == (3, 3, False)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["errors"][0].startswith("condition:")
+    assert result["errors"][2]["errors"][0].startswith("images:")
+
+    assert sorted(name for name, in db.query(Product.name)) == ["Lamp", "Rug", "Stool"]
+    primary = db.query(ProductImage.url).filter(ProductImage.is_primary.is_(True)).all()
+    assert len(primary) == 3
+
+
+def test_ndjson_import_reports_bad_lines_and_truncates_errors(db, client, monkeypatch):
+    monkeypatch.setattr(product_service, "PRODUCT_IMPORT_MAX_ERRORS", 2)
+    good = json.dumps({
+        "name": "Lamp", "condition": "new", "prices": "10.00", "state": "Lagos", "lga": "Ikeja",
+        "images": ["https://example.com/a.jpg"]
+    })
+    body = "\n".join(["{not json", good, "", '{"name": ""}', "[1, 2]"])
+
+    result = _import(client, "products.jsonl", body).json()
+
+    assert (result["imported"], result["failed"], result["errors_truncated"]) == (1, 3, True)
+    assert [error["row"] for error in result["errors"]] == [1, 4]
+    assert result["errors"][0]["errors"][0].startswith("Invalid JSON")
+
+
+def test_unknown_upload_type_is_rejected(client):
+    response = _import(client, "products.xlsx", "")
+    assert response.status_code == 400
+    assert _import(client, "products.txt", CSV_HEADER, format="csv").json()["imported"] == 0
@@ -0,0 +1,203 @@
+# tests/test_product_payment.py
+import asyncio
+from decimal import Decimal
+from typing import Dict, List
+import httpx
+from fastapi import HTTPException
+from conftest import PLATFORM_ACCOUNT_ID, USER_ACCOUNT_ID
+from app.data.models.account_models import Account, VirtualBankAccount
+from app.data.models.transaction_models import Transaction, TransactionStatus, TransactionType
+from app.data.schemas.transfer_schemas import TransferLeg, TransferLegResult, TransferLegStatus
+from app.service.budpay_service import BudpayService
+from app.service.transaction_service import TransactionService
+
+STORE_ACCOUNT_ID = 3
+
+
+class FakeBudpay:
+    """Stands in for BudpayService; transfers get `transfer_status`, lookups read `applied`"""
+
+    def __init__(self, transfer_status: TransferLegStatus = TransferLegStatus.SUCCESS):
+        self.transfer_status = transfer_status
+        self.sent: List[TransferLeg] = []
+        self.applied: Dict[str, str] = {}
+
+    async def get_virtual_account_balance(self, account_number: str, strict: bool = False) -> Dict:
+        return {"balance": "1000.00"}
+
+    async def transfer_batch(self, legs: List[TransferLeg]) -> List[TransferLegResult]:
+        self.sent.extend(legs)
+        return [TransferLegResult(leg=leg, status=self.transfer_status) for leg in legs]
+
+    async def transfer_to_virtual_account(self, from_account, to_account, amount, description=None, reference=None):
+        self.sent.append(TransferLeg(
+            from_account=from_account, to_account=to_account, amount=amount,
+            description=description, reference=reference
+        ))
+        if self.transfer_status == TransferLegStatus.PENDING:
+            raise HTTPException(status_code=504, detail="Payment service did not confirm the transfer")
+        return {"reference": reference}
+
+    async def verify_payment(self, reference: str) -> Dict:
+        if reference not in self.applied:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return {"reference": reference, "status": self.applied[reference]}
+
+
+def _service(db, budpay: FakeBudpay) -> TransactionService:
+    db.add(Account(id=STORE_ACCOUNT_ID, user_id=1, type="user", key="k3", balance=0))
+    db.add(VirtualBankAccount(
+        id=STORE_ACCOUNT_ID, user_id=1, account_id=STORE_ACCOUNT_ID, account_number="333",
+        account_name="store", bank_name="bank", bank_code="000",
+        email="store@example.com", phone="08000000000", reference="VA-3"
+    ))
+    db.get(Account, USER_ACCOUNT_ID).balance = Decimal("100.00")
+    db.commit()
+
+    service = TransactionService(db)
+    service.budpay_service = budpay
+    return service
+
+
+def _pay(service: TransactionService, amount: str) -> Dict:
+    return asyncio.run(service.process_product_payment(
+        USER_ACCOUNT_ID, STORE_ACCOUNT_ID, product_id=7, amount=Decimal(amount)
+    ))
+
+
+def _balances(db):
+    db.expire_all()
+    return [db.get(Account, id).balance for id in (USER_ACCOUNT_ID, STORE_ACCOUNT_ID, PLATFORM_ACCOUNT_ID)]
+
+
+def test_fee_that_rounds_to_zero_is_not_transferred(db):
+    budpay = FakeBudpay()
+    result = _pay(_service(db, budpay), "0.20")
+
+    assert result["status"] == "success"
+    assert [(leg.to_account, leg.amount) for leg in budpay.sent] == [("333", Decimal("0.20"))]
+    assert _balances(db) == [Decimal("99.80"), Decimal("0.20"), Decimal("0.00")]
+
+
+def test_timed_out_transfer_stays_pending_and_reconciles_to_completed(db):
+    budpay = FakeBudpay(transfer_status=TransferLegStatus.PENDING)
+    service = _service(db, budpay)
+
+    result = _pay(service, "10.00")
+
+    assert result["status"] == "pending"
+    db.expire_all()
+    legs = db.query(Transaction).order_by(Transaction.id).all()
+    assert [leg.status for leg in legs] == [TransactionStatus.PENDING] * 3
+    assert _balances(db)[0] == Decimal("100.00")
+
+    # Both transfers turn out to have gone through
+    budpay.applied = {leg.reference: "success" for leg in budpay.sent}
+    group_ids = service.transaction_repo.get_pending_payment_groups(
+        TransactionType.PRODUCT_PAYMENT, legs[0].created_at.replace(year=9999), 0, 10
+    )
+    assert group_ids == [legs[0].group_id]
+    assert asyncio.run(service.reconcile_pending_payment(group_ids[0])) == TransactionStatus.COMPLETED
+
+    db.expire_all()
+    assert {leg.status for leg in db.query(Transaction).all()} == {TransactionStatus.COMPLETED}
+    assert _balances(db) == [Decimal("90.00"), Decimal("9.85"), Decimal("0.15")]
+
+
+def test_partially_applied_payment_is_reversed_and_failed(db):
+    budpay = FakeBudpay(transfer_status=TransferLegStatus.PENDING)
+    service = _service(db, budpay)
+    _pay(service, "10.00")
+
+    store_leg, fee_leg = budpay.sent
+    budpay.applied = {store_leg.reference: "success"}
+    budpay.transfer_status = TransferLegStatus.SUCCESS
+    group_id = db.query(Transaction.group_id).first()[0]
+
+    assert asyncio.run(service.reconcile_pending_payment(group_id)) == TransactionStatus.FAILED
+
+    reversal = budpay.sent[-1]
+    assert (reversal.from_account, reversal.to_account, reversal.reference) == (
+        "333", "111", f"{store_leg.reference}-REV"
+    )
+    db.expire_all()
+    assert {leg.status for leg in db.query(Transaction).all()} == {TransactionStatus.FAILED}
+    assert _balances(db) == [Decimal("100.00"), Decimal("0.00"), Decimal("0.00")]
+
+
+def test_unknown_outcome_is_left_for_the_next_pass(db):
+    budpay = FakeBudpay(transfer_status=TransferLegStatus.PENDING)
+    service = _service(db, budpay)
+    _pay(service, "10.00")
+
+    budpay.applied = {leg.reference: "processing" for leg in budpay.sent}
+    group_id = db.query(Transaction.group_id).first()[0]
+
+    assert asyncio.run(service.reconcile_pending_payment(group_id)) is None
+    db.expire_all()
+    assert {leg.status for leg in db.query(Transaction).all()} == {TransactionStatus.PENDING}
+
+
+class TimingOutClient:
+    async def request(self, method, url, **kwargs):
+        raise httpx.ReadTimeout("timed out", request=httpx.Request(method, url))
+
+
+def test_transfer_timeout_is_reported_pending_not_failed():
+    legs = [TransferLeg(from_account="111", to_account="333", amount=Decimal("1.00"), reference="T-1")]
+    results = asyncio.run(BudpayService(client=TimingOutClient()).transfer_batch(legs))
+
+    assert [result.status for result in results] == [TransferLegStatus.PENDING]
+
+
+def test_failure_recording_error_does_not_mask_the_payment_error(db):
+    budpay = FakeBudpay()
+    service = _service(db, budpay)
+
+    def broken_insert(*args, **kwargs):
+        raise RuntimeError("duplicate reference")
+
+    async def failing_transfer(legs):
+        # Recording the FAILED legs will break as well
+        service.transaction_repo.create_payment_legs = broken_insert
+        raise RuntimeError("provider unavailable")
+
+    budpay.transfer_batch = failing_transfer
+    try:
+        _pay(service, "10.00")
+    except HTTPException as e:
+        assert e.detail == "provider unavailable"
+    else:
+        raise AssertionError("payment did not fail")
+
+    assert db.query(Transaction).count() == 0
+    assert _balances(db)[0] == Decimal("100.00")
+
+
+def test_timed_out_subscription_stays_pending_and_is_refunded(db):
+    budpay = FakeBudpay(transfer_status=TransferLegStatus.PENDING)
+    service = _service(db, budpay)
+
+    result = asyncio.run(service.process_subscription_payment(USER_ACCOUNT_ID, store_id=5, amount=Decimal("20.00")))
+
+    assert result["status"] == "pending"
+    db.expire_all()
+    legs = db.query(Transaction).order_by(Transaction.id).all()
+    assert [leg.status for leg in legs] == [TransactionStatus.PENDING] * 2
+    assert budpay.sent[0].reference == legs[1].reference
+
+    # The transfer did go through; the store change was never applied, so it is reversed
+    budpay.applied = {legs[1].reference: "success"}
+    budpay.transfer_status = TransferLegStatus.SUCCESS
+    group_ids = service.transaction_repo.get_pending_payment_groups(
+        TransactionType.SUBSCRIPTION, legs[0].created_at.replace(year=9999), 0, 10
+    )
+    assert asyncio.run(service.reconcile_pending_payment(group_ids[0])) == TransactionStatus.FAILED
+
+    reversal = budpay.sent[-1]
+    assert (reversal.from_account, reversal.to_account, reversal.reference) == (
+        "222", "111", f"{legs[1].reference}-REV"
+    )
+    db.expire_all()
+    assert {leg.status for leg in db.query(Transaction).all()} == {TransactionStatus.FAILED}
+    assert _balances(db) == [Decimal("100.00"), Decimal("0"), Decimal("0")]
@@ -0,0 +1,114 @@
+# tests/test_product_reads.py
+from contextlib import contextmanager
+from decimal import Decimal
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from app.data.models.user_models import User
+from app.data.schemas.product_schemas import (
+    ProductCondition,
+    ProductCreate,
+    ProductRead,
+    ProductSort,
+    ProductUpdate
+)
+from app.data.utils.database import engine
+from app.service.product_service import ProductService
+
+
+@contextmanager
+def count_queries():
+    """Statements sent to the database inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _product(name, price="10.00", images=2):
+    return ProductCreate(
+        name=name, condition=ProductCondition.NEW, prices=Decimal(price), state="Lagos", lga="Ikeja",
+        images=[{"url": f"https://example.com/{name}/{i}.jpg", "order": i} for i in range(images)]
+    )
+
+
+def _list_queries(db, client):
+    # Hold the authenticated user loaded so only the endpoint's own queries count
+    user = db.get(User, 1)
+    with count_queries() as statements:
+        response = client.get("/products/")
+    assert user.id == 1
+    assert response.status_code == 200
+    return response.json(), len(statements)
+
+
+def test_product_list_query_count_does_not_grow_with_products(db, client):
+    service = ProductService(db)
+    service.create_product(1, _product("first"))
+    products, one = _list_queries(db, client)
+    assert [product["name"] for product in products] == ["first"]
+    assert len(products[0]["images"]) == 2
+
+    for i in range(9):
+        service.create_product(1, _product(f"more-{i}"))
+    products, many = _list_queries(db, client)
+    assert len(products) == 10
+    assert all(len(product["images"]) == 2 for product in products)
+
+    # Version check, products, then every image in one IN query
+    assert one == many == 3
+
+
+def test_create_and_update_responses_serialise_without_lazy_loads(db):
+    service = ProductService(db)
+
+    product = service.create_product(1, _product("lamp"))
+    with count_queries() as statements:
+        read = ProductRead.model_validate(product)
+    assert statements == []
+    assert len(read.images) == 2
+
+    product = service.update_product(1, product.id, ProductUpdate(
+        name="desk lamp", images=[{"url": "https://example.com/lamp/new.jpg"}]
+    ))
+    with count_queries() as statements:
+        read = ProductRead.model_validate(product)
+    assert statements == []
+    assert read.name == "desk lamp"
+    assert [str(image.url) for image in read.images] == ["https://example.com/lamp/new.jpg"]
+
+
+def _walk(service, sort, size):
+    """Every page of the catalogue, as lists of names"""
+    pages, cursor = [], None
+    while True:
+        page = service.get_catalogue(sort=sort, cursor=cursor, size=size)
+        pages.append([item.name for item in page["data"]])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_catalogue_keyset_cursors_walk_every_product_once(db):
+    service = ProductService(db)
+    for name, price in (("a", "30.00"), ("b", "10.00"), ("c", "20.00"), ("d", "10.00"), ("e", "50.00")):
+        service.create_product(1, _product(name, price, images=1))
+
+    assert _walk(service, ProductSort.NEWEST, 2) == [["e", "d"], ["c", "b"], ["a"]]
+    assert _walk(service, ProductSort.PRICE_ASC, 2) == [["b", "d"], ["c", "a"], ["e"]]
+    assert _walk(service, ProductSort.PRICE_DESC, 3) == [["e", "a", "c"], ["d", "b"]]
+
+    # A cursor only fits the listing that issued it
+    cursor = service.get_catalogue(sort=ProductSort.NEWEST, size=2)["next_cursor"]
+    for bad in (cursor + "x", "not-a-cursor"):
+        with pytest.raises(HTTPException) as error:
+            service.get_catalogue(sort=ProductSort.PRICE_ASC, cursor=bad, size=2)
+        assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        service.get_catalogue(sort=ProductSort.PRICE_ASC, cursor=cursor, size=2)
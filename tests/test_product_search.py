@@ -0,0 +1,51 @@
+# tests/test_product_search.py
+import io
+import json
+from decimal import Decimal
+from sqlalchemy import create_engine
+from app.core.search_index import get_product_search_index
+from app.data.schemas.product_schemas import ProductCondition, ProductCreate, ProductImportFormat
+from app.repository.product_repo import ProductRepository
+from app.service.product_service import ProductService
+
+
+def _product(name, description=None):
+    return ProductCreate(
+        name=name, description=description, condition=ProductCondition.NEW, prices=Decimal("10.00"),
+        state="Lagos", lga="Ikeja", images=[{"url": "https://example.com/a.jpg"}]
+    )
+
+
+def _names(service, query):
+    return [item.name for item in service.search_products(query)["data"]]
+
+
+def test_in_process_search_sees_created_and_imported_products(db):
+    service = ProductService(db)
+    service.create_product(1, _product("Blue phone", "A phone with a blue case"))
+    assert _names(service, "phone") == ["Blue phone"]
+
+    upload = "\n".join(json.dumps(_product(name).model_dump(mode="json")) for name in ("Red phone", "Lamp"))
+    service.import_products(1, io.BytesIO(upload.encode()), ProductImportFormat.NDJSON)
+
+    assert sorted(_names(service, "phones")) == ["Blue phone", "Red phone"]
+    assert _names(service, "lamp") == ["Lamp"]
+
+
+def test_uncommitted_products_never_reach_the_index(db):
+    service = ProductService(db)
+    service.create_product(1, _product("Blue phone"))
+    assert _names(service, "phone") == ["Blue phone"]
+
+    # A chunk that is rolled back leaves no ids behind in the index
+    ProductRepository(db).bulk_create_products(1, [_product("Ghost phone")])
+    db.rollback()
+
+    index = get_product_search_index(db.get_bind())
+    assert len(index.search("phone")) == 1
+
+
+def test_each_engine_has_its_own_index(db):
+    other = create_engine("sqlite://")
+    assert get_product_search_index(other) is not get_product_search_index(db.get_bind())
+    assert not get_product_search_index(other).built
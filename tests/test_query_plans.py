@@ -0,0 +1,18 @@
+# tests/test_query_plans.py
+from tools.check_query_plans import _seq_scans
+
+
+def test_seq_scans_on_partitions_count_against_their_table():
+    plan = {
+        "Node Type": "Append",
+        "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "transactions_2026_09"},
+            {"Node Type": "Seq Scan", "Relation Name": "transactions_2026_10"},
+            {"Node Type": "Seq Scan", "Relation Name": "unseeded"},
+        ]
+    }
+    relations = {"transactions": "transactions", "transactions_2026_09": "transactions",
+                 "transactions_2026_10": "transactions"}
+
+    assert _seq_scans(plan, relations) == ["transactions"]
+
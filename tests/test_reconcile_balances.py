@@ -0,0 +1,44 @@
+# tests/test_reconcile_balances.py
+import asyncio
+from decimal import Decimal
+from fastapi import HTTPException
+from app.data.models.reconciliation_models import BalanceMismatch, ReconciliationRun, ReconciliationStatus
+from app.jobs import reconcile_balances
+
+
+class FlakyBudpay:
+    """Balances of 0; the listed account numbers get a breaker-open 503 until `down` is cleared"""
+    down = set()
+    lookups = []
+
+    def __init__(self, client=None):
+        pass
+
+    async def get_virtual_account_balance(self, account_number, strict=False):
+        FlakyBudpay.lookups.append(account_number)
+        if account_number in FlakyBudpay.down:
+            raise HTTPException(status_code=503, detail="Payment service temporarily unavailable")
+        return {"balance": "0"}
+
+
+def test_unanswered_lookups_are_retried_not_recorded(db, monkeypatch):
+    monkeypatch.setattr(reconcile_balances, "BudpayService", FlakyBudpay)
+    monkeypatch.setattr(reconcile_balances, "SessionLocal", lambda: db)
+    FlakyBudpay.down, FlakyBudpay.lookups = {"222"}, []
+
+    # Budpay never recovers: the run stops unfinished, past only the account it checked
+    finished = asyncio.run(reconcile_balances.reconcile(chunk_size=10, retry_delay=0, max_retries=2))
+    assert finished is False
+    run = db.query(ReconciliationRun).one()
+    assert (run.status, run.last_virtual_account_id, run.checked_count, run.error_count) == (
+        ReconciliationStatus.RUNNING, 1, 1, 0
+    )
+    assert db.query(BalanceMismatch).count() == 0
+    assert FlakyBudpay.lookups.count("222") == 4
+
+    # Once Budpay answers, the resumed run checks what was left and completes
+    FlakyBudpay.down, FlakyBudpay.lookups = set(), []
+    assert asyncio.run(reconcile_balances.reconcile(chunk_size=10, retry_delay=0)) is True
+    db.expire_all()
+    assert FlakyBudpay.lookups == ["222"]
+    assert (run.status, run.checked_count, run.error_count) == (ReconciliationStatus.COMPLETED, 2, 0)
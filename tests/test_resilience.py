@@ -0,0 +1,55 @@
+# tests/test_resilience.py
+import asyncio
+import pytest
+from app.core import resilience
+from app.core.resilience import CircuitBreaker
+from app.service.budpay_service import BudpayService
+
+
+def _half_open(breaker: CircuitBreaker) -> CircuitBreaker:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_half_open_trial_decides_the_state():
+    breaker = _half_open(CircuitBreaker("test", failure_threshold=2, reset_timeout=30))
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_abandoned_trial_slot_times_out(monkeypatch):
+    breaker = _half_open(CircuitBreaker("test", failure_threshold=2, reset_timeout=30))
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    now = resilience.time.monotonic()
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now + 31)
+    assert breaker.allow_request()
+
+
+class HangingClient:
+    async def request(self, method, url, **kwargs):
+        await asyncio.sleep(3600)
+
+
+def test_cancelled_trial_releases_its_slot():
+    breaker = _half_open(resilience.get_circuit_breaker("budpay.cancelled", failure_threshold=2))
+    service = BudpayService(client=HangingClient())
+
+    async def run():
+        call = asyncio.create_task(service._request("cancelled", "GET", "/hang"))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(run())
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
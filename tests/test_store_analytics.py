@@ -0,0 +1,41 @@
+# tests/test_store_analytics.py
+from datetime import date, datetime
+from decimal import Decimal
+from conftest import USER_ACCOUNT_ID
+from app.data.models.store_models import Store
+from app.data.models.transaction_models import TransactionStatus, TransactionType
+from app.data.utils.database import SessionLocal
+from app.repository.transaction_repo import TransactionRepository
+from app.service.store_service import StoreService
+
+DAY = date(2026, 10, 1)
+
+
+def _sell(session, reference):
+    TransactionRepository(session).bulk_create_transactions([{
+        "type": TransactionType.PRODUCT_PAYMENT, "amount": Decimal("9.00"), "fee_amount": Decimal("1.00"),
+        "status": TransactionStatus.COMPLETED, "account_id": USER_ACCOUNT_ID,
+        "reference": reference, "created_at": datetime(2026, 10, 1, 12)
+    }])
+
+
+def test_analytics_refresh_only_once_a_sale_commits(db):
+    db.add(Store(id=1, user_id=1, name="store"))
+    db.commit()
+    service = StoreService(db)
+    assert service.get_store_analytics(1, DAY, DAY).total_orders == 0
+
+    # A sale written elsewhere is not visible until it commits...
+    writer = SessionLocal()
+    try:
+        _sell(writer, "SALE-1")
+        writer.flush()
+        db.rollback()
+        assert service.get_store_analytics(1, DAY, DAY).total_orders == 0
+
+        # ...and once it has, the cached result is not served again
+        writer.commit()
+    finally:
+        writer.close()
+    db.rollback()
+    assert service.get_store_analytics(1, DAY, DAY).total_orders == 1
@@ -0,0 +1,70 @@
+# tests/test_transaction_archive.py
+import gzip
+from datetime import datetime, timedelta
+from decimal import Decimal
+from conftest import USER_ACCOUNT_ID, PLATFORM_ACCOUNT_ID
+from app.data.models.transaction_models import TransactionStatus, TransactionType
+from app.repository import archive_repo
+from app.repository.archive_repo import TransactionArchive
+from app.repository.transaction_repo import TransactionRepository
+from app.service.transaction_service import TransactionService
+
+START = datetime(2025, 1, 1)
+
+
+def _row(row_id, account_id, days):
+    created_at = START + timedelta(days=days)
+    return {
+        "id": row_id, "type": TransactionType.FEE, "amount": Decimal("1.00"),
+        "fee_amount": Decimal("0"), "description": None, "status": TransactionStatus.COMPLETED,
+        "reference": f"ARCH-{row_id}", "account_id": account_id, "virtual_account_id": None,
+        "group_id": None, "completed_at": created_at, "created_at": created_at, "updated_at": created_at
+    }
+
+
+def _archive(root, batches):
+    archive = TransactionArchive(str(root))
+    for rows in batches:
+        archive.mark_deleted(archive.write_batch(rows)["file"])
+    return archive
+
+
+def test_newest_rows_stop_before_older_files(tmp_path, monkeypatch):
+    # Three files of increasing age ranges, the other account interleaved
+    archive = _archive(tmp_path, [
+        [_row(1, USER_ACCOUNT_ID, 0), _row(2, PLATFORM_ACCOUNT_ID, 1), _row(3, USER_ACCOUNT_ID, 2)],
+        [_row(4, USER_ACCOUNT_ID, 10), _row(5, USER_ACCOUNT_ID, 11)],
+        [_row(6, USER_ACCOUNT_ID, 20), _row(7, USER_ACCOUNT_ID, 21), _row(8, PLATFORM_ACCOUNT_ID, 22)],
+    ])
+
+    opened = []
+    real_open = gzip.open
+    monkeypatch.setattr(archive_repo.gzip, "open", lambda path, *args: opened.append(path) or real_open(path, *args))
+
+    rows = archive.newest_account_rows(USER_ACCOUNT_ID, 3)
+    assert [row["id"] for row in rows] == [7, 6, 5]
+    assert len(opened) == 2
+
+    assert archive.count_account_rows(USER_ACCOUNT_ID) == 6
+    assert archive.count_account_rows(USER_ACCOUNT_ID, status=TransactionStatus.FAILED) == 0
+
+
+def test_archived_history_merges_only_the_page_window(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_repo, "TRANSACTION_ARCHIVE_DIR", str(tmp_path))
+    _archive(tmp_path, [[_row(1000 + i, USER_ACCOUNT_ID, i) for i in range(5)]])
+
+    transaction_repo = TransactionRepository(db)
+    for i in range(3):
+        transaction_repo.bulk_create_transactions([{
+            "type": TransactionType.FEE, "amount": Decimal("2.00"), "fee_amount": Decimal("0"),
+            "status": TransactionStatus.COMPLETED, "account_id": USER_ACCOUNT_ID,
+            "reference": f"HOT-{i}", "created_at": datetime(2026, 10, 1 + i)
+        }])
+    db.commit()
+
+    page = TransactionService(db).get_account_transactions(
+        USER_ACCOUNT_ID, user_id=1, skip=2, limit=3, include_archived=True
+    )
+    ids = [txn["id"] if isinstance(txn, dict) else txn.reference for txn in page["data"]]
+    assert ids == ["HOT-0", 1004, 1003]
+    assert page["total"] == 8
@@ -0,0 +1,27 @@
+# tests/test_transaction_rollups.py
+from datetime import datetime, timedelta
+from decimal import Decimal
+from conftest import PLATFORM_ACCOUNT_ID
+from app.data.models.transaction_models import TransactionRollup, TransactionStatus, TransactionType
+from app.repository.transaction_repo import TransactionRepository
+
+
+def test_rollups_spread_over_stripes_and_sum_in_summaries(db):
+    transaction_repo = TransactionRepository(db)
+    created_at = datetime(2026, 10, 1, 12)
+    for i in range(40):
+        transaction_repo.bulk_create_transactions([{
+            "type": TransactionType.FEE, "amount": Decimal("1.50"), "fee_amount": Decimal("0"),
+            "status": TransactionStatus.COMPLETED, "account_id": PLATFORM_ACCOUNT_ID,
+            "reference": f"FEE-{i}", "created_at": created_at
+        }])
+        db.commit()
+
+    rollups = db.query(TransactionRollup).all()
+    assert len({rollup.stripe for rollup in rollups}) > 1
+    assert sum(rollup.count for rollup in rollups) == 40
+
+    summary = transaction_repo.get_transaction_summary(
+        PLATFORM_ACCOUNT_ID, created_at - timedelta(days=3), created_at + timedelta(days=3)
+    )
+    assert summary[TransactionType.FEE] == {"count": 40, "total_amount": 60.0, "total_fees": 0.0}
@@ -0,0 +1,19 @@
+# tests/test_virtual_account_cache.py
+from conftest import PLATFORM_ACCOUNT_ID, USER_ACCOUNT_ID
+from app.repository.account_repo import AccountRepository, virtual_account_cache
+
+
+def test_resolver_fills_lazily_and_stays_bounded(db, monkeypatch):
+    monkeypatch.setattr(virtual_account_cache, "max_size", 1)
+    account_repo = AccountRepository(db)
+    assert len(virtual_account_cache) == 0
+
+    assert account_repo.get_by_virtual_account("111").id == USER_ACCOUNT_ID
+    assert virtual_account_cache.get("111") == USER_ACCOUNT_ID
+
+    resolved = account_repo.get_by_virtual_accounts(["111", "222"])
+    assert {number: account.id for number, account in resolved.items()} == {
+        "111": USER_ACCOUNT_ID, "222": PLATFORM_ACCOUNT_ID
+    }
+    assert len(virtual_account_cache) == 1
+    assert virtual_account_cache.get("222") == PLATFORM_ACCOUNT_ID
@@ -0,0 +1,55 @@
+# tests/test_webhook_batcher.py
+import asyncio
+from decimal import Decimal
+from conftest import PLATFORM_ACCOUNT_ID, USER_ACCOUNT_ID
+from app.data.models.account_models import Account
+from app.data.models.transaction_models import Transaction
+from app.repository.transaction_repo import TransactionRepository
+from app.service.webhook_batcher import CreditBatcher
+
+
+def test_batch_credits_once_per_reference(db):
+    batcher = CreditBatcher(max_size=50, max_wait_ms=5)
+
+    async def run():
+        events = [batcher.submit("111", Decimal("10.00"), f"ref{i % 30}") for i in range(60)]
+        events.append(batcher.submit("222", Decimal("5.00"), "platform"))
+        events.append(batcher.submit("999", Decimal("1.00"), "unknown"))
+        return await asyncio.gather(*events, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert results[-1].status_code == 404
+    assert db.get(Account, USER_ACCOUNT_ID).balance == Decimal("300.00")
+    assert db.get(Account, PLATFORM_ACCOUNT_ID).balance == Decimal("5.00")
+    assert db.query(Transaction).count() == 31
+
+
+def test_batch_retries_when_a_reference_races_in(db, monkeypatch):
+    # Another worker commits "raced" between the idempotency check and the INSERT
+    TransactionRepository(db).bulk_create_transactions([{
+        "type": "credit", "amount": Decimal("10.00"), "status": "completed",
+        "reference": "raced", "account_id": USER_ACCOUNT_ID
+    }])
+    db.commit()
+
+    lookups = []
+    real_lookup = TransactionRepository.get_existing_references
+
+    def stale_lookup(self, references):
+        lookups.append(references)
+        return set() if len(lookups) == 1 else real_lookup(self, references)
+
+    monkeypatch.setattr(TransactionRepository, "get_existing_references", stale_lookup)
+
+    results = CreditBatcher()._apply_batch([
+        {"account_number": "111", "amount": Decimal("10.00"), "reference": "raced"},
+        {"account_number": "111", "amount": Decimal("2.50"), "reference": "fresh"},
+    ])
+
+    assert len(lookups) == 2
+    assert results[0]["message"] == "Transaction already processed"
+    assert results[1]["message"] == "Payment processed successfully"
+    db.expire_all()
+    assert db.query(Transaction).count() == 2
+    assert db.get(Account, USER_ACCOUNT_ID).balance == Decimal("2.50")
@@ -0,0 +1,315 @@
+# tools/budpay_fake.py
+"""
+Local stand-in for the Budpay API, for load tests and failure drills.
+
+    uvicorn tools.budpay_fake:app --port 8001
+    BUDPAY_BASE_URL=http://localhost:8001/api/v2 uvicorn main:app --port 8000
+
+Implements the endpoints BudpayService calls (virtual-account create,
+balance, transfer, bulk-transfer and transaction verify) against in-memory
+balances. Deposits made through POST /_fake/fund are reported back to the
+app as signed webhooks, exactly as Budpay would send them.
+
+Behaviour is tuned through environment variables:
+
+    FAKE_BUDPAY_LATENCY          fixed:<ms> | uniform:<min_ms>:<max_ms> |
+                                 lognormal:<median_ms>:<sigma>  (default fixed:0)
+    FAKE_BUDPAY_ERROR_RATE       share of calls answered with a 500 (default 0)
+    FAKE_BUDPAY_TIMEOUT_RATE     share of calls that hang past client timeouts (default 0)
+    FAKE_BUDPAY_TIMEOUT_SECONDS  how long a hanging call sleeps (default 30)
+    FAKE_BUDPAY_INITIAL_BALANCE  balance of newly created accounts (default 0)
+    FAKE_BUDPAY_WEBHOOK_URL      where webhooks go
+                                 (default http://localhost:8000/accounts/webhook/budpay)
+    FAKE_BUDPAY_WEBHOOK_DELAY_MS delay before a webhook is sent (default 0)
+    FAKE_BUDPAY_TRANSFER_WEBHOOKS also send webhooks for transfer credits (default false)
+    FAKE_BUDPAY_SEED             seed for latency and fault sampling
+
+Webhooks are signed with BUDPAY_SECRET_KEY, so both processes must share it.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.core.config import BUDPAY_SECRET_KEY
+
+LATENCY = os.getenv("FAKE_BUDPAY_LATENCY", "fixed:0")
+ERROR_RATE = float(os.getenv("FAKE_BUDPAY_ERROR_RATE", "0"))
+TIMEOUT_RATE = float(os.getenv("FAKE_BUDPAY_TIMEOUT_RATE", "0"))
+TIMEOUT_SECONDS = float(os.getenv("FAKE_BUDPAY_TIMEOUT_SECONDS", "30"))
+INITIAL_BALANCE = Decimal(os.getenv("FAKE_BUDPAY_INITIAL_BALANCE", "0"))
+WEBHOOK_URL = os.getenv("FAKE_BUDPAY_WEBHOOK_URL", "http://localhost:8000/accounts/webhook/budpay")
+WEBHOOK_DELAY_MS = int(os.getenv("FAKE_BUDPAY_WEBHOOK_DELAY_MS", "0"))
+TRANSFER_WEBHOOKS = os.getenv("FAKE_BUDPAY_TRANSFER_WEBHOOKS", "false").lower() == "true"
+
+_random = random.Random(os.getenv("FAKE_BUDPAY_SEED"))
+
+
+class LatencyProfile:
+    """Samples a response delay, in seconds, from a spec such as uniform:20:200"""
+
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(param) for param in params]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency profile: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0] / 1000
+        if self.kind == "uniform":
+            return _random.uniform(self.params[0], self.params[1]) / 1000
+        median, sigma = self.params
+        return _random.lognormvariate(0, sigma) * median / 1000
+
+
+class FakeLedger:
+    """In-memory accounts, balances and transfer history"""
+
+    def __init__(self):
+        self.accounts: Dict[str, Dict] = {}
+        self.transactions: Dict[str, Dict] = {}
+        self._lock = asyncio.Lock()
+
+    def create_account(self, payload: Dict) -> Dict:
+        account_number = f"{_random.randrange(10 ** 9, 10 ** 10)}"
+        while account_number in self.accounts:
+            account_number = f"{_random.randrange(10 ** 9, 10 ** 10)}"
+
+        account = {
+            "account_number": account_number,
+            "account_name": f"{payload.get('first_name', '')} {payload.get('last_name', '')}".strip(),
+            "bank_name": "Fake Budpay Bank",
+            "bank_code": "999",
+            "email": payload.get("email"),
+            "reference": f"FAKE-VA-{account_number}",
+            "balance": INITIAL_BALANCE
+        }
+        self.accounts[account_number] = account
+        return account
+
+    async def transfer(self, from_account: str, to_account: str, amount: Decimal, reference: str) -> Dict:
+        """Move funds atomically; raises ValueError with a Budpay-style message"""
+        async with self._lock:
+            if reference in self.transactions:
+                raise ValueError("Duplicate transfer reference")
+            source = self.accounts.get(from_account)
+            target = self.accounts.get(to_account)
+            if not source or not target:
+                raise ValueError("Account not found")
+            if amount <= 0:
+                raise ValueError("Invalid amount")
+            if source["balance"] < amount:
+                raise ValueError("Insufficient funds")
+
+            source["balance"] -= amount
+            target["balance"] += amount
+            transaction = {
+                "reference": reference,
+                "from_account": from_account,
+                "to_account": to_account,
+                "amount": str(amount),
+                "status": "success",
+                "created_at": time.time()
+            }
+            self.transactions[reference] = transaction
+            return transaction
+
+    async def fund(self, account_number: str, amount: Decimal, reference: str) -> Dict:
+        """Credit an account from outside, like a bank transfer into it"""
+        async with self._lock:
+            account = self.accounts.get(account_number)
+            if not account:
+                raise ValueError("Account not found")
+            account["balance"] += amount
+            transaction = {
+                "reference": reference,
+                "to_account": account_number,
+                "amount": str(amount),
+                "status": "success",
+                "created_at": time.time()
+            }
+            self.transactions[reference] = transaction
+            return transaction
+
+
+class FundRequest(BaseModel):
+    account_number: str
+    amount: Decimal
+    reference: Optional[str] = None
+
+
+latency = LatencyProfile(LATENCY)
+ledger = FakeLedger()
+stats = {"requests": 0, "errors": 0, "timeouts": 0, "webhooks_sent": 0, "webhooks_failed": 0}
+_webhook_tasks = set()
+
+app = FastAPI(title="Fake Budpay")
+
+
+def _ok(data) -> JSONResponse:
+    return JSONResponse({"status": True, "message": "success", "data": data})
+
+
+def _fail(message: str, status_code: int = 400) -> JSONResponse:
+    return JSONResponse({"status": False, "message": message}, status_code=status_code)
+
+
+def _public(account: Dict) -> Dict:
+    return {**account, "balance": str(account["balance"])}
+
+
+def _sign(payload: bytes) -> str:
+    return hmac.new(BUDPAY_SECRET_KEY.encode(), payload, hashlib.sha512).hexdigest()
+
+
+async def _send_webhook(account_number: str, amount: Decimal, reference: str) -> None:
+    if WEBHOOK_DELAY_MS:
+        await asyncio.sleep(WEBHOOK_DELAY_MS / 1000)
+
+    payload = json.dumps({
+        "event": "virtual_account.credit",
+        "account": {"account_number": account_number},
+        "amount": str(amount),
+        "reference": reference
+    }).encode()
+
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(
+                WEBHOOK_URL,
+                content=payload,
+                headers={"Content-Type": "application/json", "X-Budpay-Signature": _sign(payload)}
+            )
+        if response.status_code == 200:
+            stats["webhooks_sent"] += 1
+        else:
+            stats["webhooks_failed"] += 1
+    except httpx.HTTPError:
+        stats["webhooks_failed"] += 1
+
+
+def _emit_webhook(account_number: str, amount: Decimal, reference: str) -> None:
+    task = asyncio.create_task(_send_webhook(account_number, amount, reference))
+    _webhook_tasks.add(task)
+    task.add_done_callback(_webhook_tasks.discard)
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """Apply the latency profile and fault rates to every API call"""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+
+    stats["requests"] += 1
+    if request.headers.get("Authorization") != f"Bearer {BUDPAY_SECRET_KEY}":
+        return _fail("Invalid API key", status_code=401)
+
+    await asyncio.sleep(latency.sample())
+
+    roll = _random.random()
+    if roll < TIMEOUT_RATE:
+        stats["timeouts"] += 1
+        await asyncio.sleep(TIMEOUT_SECONDS)
+    elif roll < TIMEOUT_RATE + ERROR_RATE:
+        stats["errors"] += 1
+        return _fail("Internal server error", status_code=500)
+
+    return await call_next(request)
+
+
+@app.post("/api/v2/virtual-account/create")
+async def create_virtual_account(request: Request):
+    return _ok(_public(ledger.create_account(await request.json())))
+
+
+@app.get("/api/v2/virtual-account/balance/{account_number}")
+async def get_balance(account_number: str):
+    account = ledger.accounts.get(account_number)
+    if not account:
+        return _fail("Account not found", status_code=404)
+    return _ok({
+        "account_number": account_number,
+        "balance": str(account["balance"]),
+        "currency": "NGN"
+    })
+
+
+async def _apply_transfer(item: Dict) -> Dict:
+    reference = item.get("reference") or f"FAKE-{uuid.uuid4().hex[:16].upper()}"
+    try:
+        amount = Decimal(str(item.get("amount")))
+        transaction = await ledger.transfer(item.get("from_account"), item.get("to_account"), amount, reference)
+    except (InvalidOperation, ValueError) as e:
+        return {"reference": reference, "status": "failed", "message": str(e) or "Invalid amount"}
+
+    if TRANSFER_WEBHOOKS:
+        _emit_webhook(item["to_account"], amount, reference)
+    return transaction
+
+
+@app.post("/api/v2/virtual-account/transfer")
+async def transfer(request: Request):
+    result = await _apply_transfer(await request.json())
+    if result["status"] != "success":
+        return _fail(result["message"])
+    return _ok(result)
+
+
+@app.post("/api/v2/virtual-account/bulk-transfer")
+async def bulk_transfer(request: Request):
+    body = await request.json()
+    results: List[Dict] = []
+    for item in body.get("transfers", []):
+        results.append(await _apply_transfer(item))
+    return _ok(results)
+
+
+@app.get("/api/v2/transaction/verify/{reference}")
+async def verify_transaction(reference: str):
+    transaction = ledger.transactions.get(reference)
+    if not transaction:
+        return _fail("Transaction not found", status_code=404)
+    return _ok(transaction)
+
+
+@app.post("/_fake/fund")
+async def fund(fund_request: FundRequest):
+    """Simulate an inbound deposit and notify the app by webhook"""
+    reference = fund_request.reference or f"FUND-{uuid.uuid4().hex[:16].upper()}"
+    try:
+        transaction = await ledger.fund(fund_request.account_number, fund_request.amount, reference)
+    except ValueError as e:
+        return _fail(str(e), status_code=404)
+
+    _emit_webhook(fund_request.account_number, fund_request.amount, reference)
+    return _ok(transaction)
+
+
+@app.get("/_fake/stats")
+async def get_stats():
+    return {
+        **stats,
+        "accounts": len(ledger.accounts),
+        "transactions": len(ledger.transactions),
+        "pending_webhooks": len(_webhook_tasks)
+    }
+
+
+@app.post("/_fake/reset")
+async def reset():
+    ledger.accounts.clear()
+    ledger.transactions.clear()
+    for key in stats:
+        stats[key] = 0
+    return {"status": True}
@@ -0,0 +1,246 @@
+# tools/check_query_plans.py
+"""
+Fail when a hot repository query is planned as a sequential scan.
+
+    python -m tools.check_query_plans
+    python -m tools.check_query_plans --users 50000 --transactions-per-user 40
+
+Seeds users, accounts, virtual accounts, transactions, stores and products
+inside one transaction, ANALYZEs them, runs the repository methods behind
+the busy endpoints while recording the SQL they emit, and EXPLAINs each
+statement with its real parameters. Any Seq Scan on a seeded table is
+reported and the script exits with status 1. The transaction is rolled back
+at the end, so nothing is left behind, but point it at a scratch database
+rather than production.
+
+Needs PostgreSQL; POSTGRES_DATABASE_URL is used unless --database-url is given.
+"""
+import argparse
+import sys
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from app.data.utils.database import POSTGRES_DATABASE_URL
+from app.data.models.transaction_models import TransactionStatus, TransactionType
+from app.repository.account_repo import AccountRepository, virtual_account_cache
+from app.repository.product_repo import ProductRepository
+from app.repository.store_repo import StoreRepository
+from app.repository.transaction_repo import TransactionRepository
+from app.repository.user_repo import UserRepository
+
+SEEDED_TABLES = [
+    "users", "accounts", "virtual_bank_accounts", "transactions",
+    "stores", "store_subscriptions", "products", "product_images"
+]
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO users (username, email, phone, first_name, last_name, password,
+                       is_email_verified, is_phone_verified, is_suspended)
+    SELECT 'qpcheck_' || g, 'qpcheck_' || g || '@example.com', 'qpcheck_' || g,
+           'Query', 'Plan', 'x', true, true, false
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO accounts (user_id, type, key, balance, currency, stripe_count, created_at, updated_at)
+    SELECT id, 'user', 'qpcheck-' || id, 0, 'NGN', 0, now(), now()
+    FROM users WHERE username LIKE 'qpcheck\\_%'
+    """,
+    """
+    INSERT INTO virtual_bank_accounts (user_id, account_id, account_number, account_name, bank_name,
+                                       bank_code, email, phone, reference, is_active, created_at, updated_at)
+    SELECT user_id, id, 'QP' || id, 'Query Plan', 'Check', '000', 'qpcheck-' || id || '@example.com',
+           '0', 'QPCHECK-VA-' || id, true, now(), now()
+    FROM accounts WHERE key LIKE 'qpcheck-%'
+    """,
+    """
+    INSERT INTO transactions (type, amount, fee_amount, status, reference, account_id, created_at, updated_at)
+    SELECT (ARRAY['credit', 'debit', 'fee', 'product_payment'])[1 + g % 4],
+           10, 0,
+           (ARRAY['pending', 'completed', 'failed'])[1 + g % 3],
+           'QPCHECK-TXN-' || a.id || '-' || g,
+           a.id,
+           now() - g * interval '1 hour',
+           now()
+    FROM accounts a CROSS JOIN generate_series(1, :transactions_per_user) AS g
+    WHERE a.key LIKE 'qpcheck-%'
+    """,
+    """
+    INSERT INTO stores (user_id, name, description)
+    SELECT id, 'Store ' || id, 'Query plan check'
+    FROM users WHERE username LIKE 'qpcheck\\_%'
+    """,
+    """
+    INSERT INTO store_subscriptions (store_id, subscription_id, start_date, end_date, is_active)
+    SELECT s.id, 1, now(), now() + interval '30 days', s.id % 2 = 0
+    FROM stores s JOIN users u ON u.id = s.user_id
+    WHERE u.username LIKE 'qpcheck\\_%'
+    """,
+    """
+    INSERT INTO products (name, description, code, condition, user_id, prices, state, lga)
+    SELECT 'Product ' || g, 'Query plan check', 'QP' || g, 'new', u.id, 1000, 'Lagos', 'Ikeja'
+    FROM users u CROSS JOIN generate_series(1, :products_per_user) AS g
+    WHERE u.username LIKE 'qpcheck\\_%'
+    """,
+    """
+    INSERT INTO product_images (product_id, url, is_primary, "order")
+    SELECT p.id, 'https://example.com/' || p.id || '.jpg', true, '0'
+    FROM products p WHERE p.code LIKE 'QP%' AND p.description = 'Query plan check'
+    """,
+]
+
+
+def _seed(connection, users: int, transactions_per_user: int, products_per_user: int) -> Dict:
+    params = {
+        "users": users,
+        "transactions_per_user": transactions_per_user,
+        "products_per_user": products_per_user
+    }
+    for statement in SEED_STATEMENTS:
+        connection.execute(text(statement), params)
+    for table in SEEDED_TABLES:
+        connection.execute(text(f"ANALYZE {table}"))
+
+    # Pick a user from the middle of the seeded range
+    sample = connection.execute(text("""
+        SELECT u.id AS user_id, u.username, a.id AS account_id, va.account_number, s.id AS store_id
+        FROM users u
+        JOIN accounts a ON a.user_id = u.id
+        JOIN virtual_bank_accounts va ON va.account_id = a.id
+        JOIN stores s ON s.user_id = u.id
+        WHERE u.username = :username
+    """), {"username": f"qpcheck_{max(users // 2, 1)}"}).mappings().one()
+    return dict(sample)
+
+
+def _checks(session: Session, sample: Dict) -> List[Tuple[str, Callable[[], object]]]:
+    transaction_repo = TransactionRepository(session)
+    account_repo = AccountRepository(session)
+    store_repo = StoreRepository(session)
+
+    return [
+        ("transactions.get_user_transactions", lambda: transaction_repo.get_user_transactions(
+            user_id=sample["user_id"]
+        )),
+        ("transactions.get_account_transactions", lambda: transaction_repo.get_account_transactions(
+            account_id=sample["account_id"],
+            user_id=sample["user_id"],
+            type=TransactionType.CREDIT,
+            status=TransactionStatus.COMPLETED
+        )),
+        ("accounts.get_user_account", lambda: account_repo.get_user_account(sample["user_id"])),
+        ("accounts.get_by_virtual_account", lambda: account_repo.get_by_virtual_account(
+            sample["account_number"]
+        )),
+        ("users.get_user_by_username", lambda: UserRepository(session).get_user_by_username(
+            sample["username"]
+        )),
+        ("products.get_user_products", lambda: ProductRepository(session).get_user_products(
+            sample["user_id"]
+        )),
+        ("stores.get_user_store", lambda: store_repo.get_user_store(sample["user_id"])),
+        ("stores.has_active_store", lambda: store_repo.has_active_store(sample["user_id"])),
+        ("stores.get_store_subscription", lambda: store_repo.get_store_subscription(sample["store_id"])),
+    ]
+
+
+def _seeded_relations(connection) -> Dict[str, str]:
+    """Seeded tables and their partitions (e.g. transactions_2026_10), mapped to the seeded table"""
+    relations = {table: table for table in SEEDED_TABLES}
+    partitions = connection.execute(text("""
+        WITH RECURSIVE tree AS (
+            SELECT inhrelid AS child, parent.relname AS root
+            FROM pg_inherits JOIN pg_class parent ON parent.oid = inhparent
+            WHERE parent.relname = ANY(:tables)
+            UNION ALL
+            SELECT pg_inherits.inhrelid, tree.root
+            FROM pg_inherits JOIN tree ON pg_inherits.inhparent = tree.child
+        )
+        SELECT child.relname, tree.root
+        FROM tree JOIN pg_class child ON child.oid = tree.child
+    """), {"tables": SEEDED_TABLES})
+    relations.update({partition: root for partition, root in partitions})
+    return relations
+
+
+def _seq_scans(plan: Dict, relations: Dict[str, str]) -> List[str]:
+    """Seeded tables read by a Seq Scan anywhere in the plan tree, partitions reported as their table"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in relations:
+        found.append(relations[plan["Relation Name"]])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child, relations))
+    return found
+
+
+def check(database_url: str, users: int, transactions_per_user: int, products_per_user: int) -> int:
+    engine = create_engine(database_url)
+    failures = 0
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            sample = _seed(connection, users, transactions_per_user, products_per_user)
+            relations = _seeded_relations(connection)
+            session = Session(bind=connection)
+            virtual_account_cache.clear()
+
+            captured = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if not statement.lstrip().upper().startswith("EXPLAIN"):
+                    captured.append((statement, parameters))
+
+            event.listen(connection, "before_cursor_execute", capture)
+            try:
+                for name, run in _checks(session, sample):
+                    captured.clear()
+                    run()
+                    statements = list(captured)
+
+                    for statement, parameters in statements:
+                        plan = connection.exec_driver_sql(
+                            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                        ).scalar()[0]["Plan"]
+                        scans = _seq_scans(plan, relations)
+                        if scans:
+                            failures += 1
+                            print(f"FAIL {name}: seq scan on {', '.join(sorted(set(scans)))}")
+                            print(f"     {' '.join(statement.split())}")
+                        else:
+                            print(f"ok   {name}: {plan['Node Type']} (cost {plan['Total Cost']})")
+            finally:
+                event.remove(connection, "before_cursor_execute", capture)
+                session.close()
+        finally:
+            transaction.rollback()
+
+    engine.dispose()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check repository query plans for sequential scans")
+    parser.add_argument("--database-url", default=POSTGRES_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--transactions-per-user", type=int, default=20)
+    parser.add_argument("--products-per-user", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith("postgresql"):
+        parser.error("a PostgreSQL database URL is required")
+
+    failures = check(
+        args.database_url,
+        users=args.users,
+        transactions_per_user=args.transactions_per_user,
+        products_per_user=args.products_per_user
+    )
+    if failures:
+        print(f"{failures} statement(s) use a sequential scan")
+        sys.exit(1)
+    print("No sequential scans on seeded tables")
+
+
+if __name__ == "__main__":
+    main()